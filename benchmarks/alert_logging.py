@@ -0,0 +1,55 @@
+"""Compare the time the scan thread spends logging an alert burst: opening the CSV per alert against the
+buffered alert log writer.
+
+Run from the repository root:
+    python -m benchmarks.alert_logging [--alerts N]
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+from datetime import datetime
+from time import perf_counter
+from src.alert_log import AlertLogWriter
+from src.data_models.alert import Alert
+from src.data_models.flow import Flow
+from src.data_models.flow_packets import FlowPackets
+
+def build_alerts(count: int) -> list[Alert]:
+    alerts = []
+    for index in range(count):
+        source_ip = f"192.168.{index // 250 % 256}.{index % 250 + 1}"
+        flow = Flow(FlowPackets("TCP", source_ip, "10.0.0.1", 50000, 443), source_ip, "10.0.0.1", 50000, 443, index, index + 1)
+        alerts.append(Alert(datetime.now(), 0.99, flow))
+    return alerts
+
+def log_per_alert(alerts: list[Alert], path: str):
+    for alert in alerts:
+        with open(path, mode="a") as file:
+            writer = csv.writer(file)
+            writer.writerow(alert.to_csv())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=10_000)
+    args = parser.parse_args()
+
+    alerts = build_alerts(args.alerts)
+    with tempfile.TemporaryDirectory() as directory:
+        start = perf_counter()
+        log_per_alert(alerts, os.path.join(directory, "per_alert.csv"))
+        print(f"{'open per alert':<32}{(perf_counter() - start) * 1_000:>10.1f} ms on the scan thread")
+
+        for name in ("alerts.csv", "alerts.csv.gz", "alerts.jsonl.gz"):
+            writer = AlertLogWriter(os.path.join(directory, name))
+            start = perf_counter()
+            for alert in alerts:
+                writer.write(alert)
+            scan_time = perf_counter() - start
+            writer.close()
+            total_time = perf_counter() - start
+            print(f"{'buffered ' + name:<32}{scan_time * 1_000:>10.1f} ms on the scan thread, {total_time * 1_000:.1f} ms until written, {os.path.getsize(os.path.join(directory, name)):,} bytes")
+
+if __name__ == "__main__":
+    main()
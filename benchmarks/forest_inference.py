@@ -0,0 +1,63 @@
+"""Compare random forest scoring latency of sklearn predict_proba against the compiled forest at several
+batch sizes, checking that both give identical probabilities.
+
+Run from the repository root:
+    python -m benchmarks.forest_inference [--model PATH] [--trees N] [--repeats N]
+
+Without --model, a 100-tree forest is trained on random data with the live feature set, since the shipped
+model is stored in Git LFS.
+"""
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+
+from time import perf_counter
+from sklearn.ensemble import RandomForestClassifier
+from src.compiled_forest import CompiledForest
+from src.signal_manager import FEATURES
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000]
+
+def build_inputs(rng, rows: int) -> np.ndarray:
+    scales = np.array([1, 100, 10_000, 1_000_000])[np.arange(len(FEATURES)) % 4]
+    return np.abs(rng.standard_normal((rows, len(FEATURES)))) * scales
+
+def build_model(rng, trees: int) -> RandomForestClassifier:
+    input_matrix = build_inputs(rng, 50_000)
+    labels = (input_matrix[:, 0] + input_matrix[:, 1] / 100 + rng.standard_normal(len(input_matrix)) > 1.5).astype(int)
+    return RandomForestClassifier(n_estimators=trees, class_weight="balanced", random_state=42, n_jobs=-1).fit(pd.DataFrame(input_matrix, columns=FEATURES), labels)
+
+def measure(predict_proba, input_vectors, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        predict_proba(input_vectors)
+        times.append(perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=None, help="Trained RandomForestClassifier pickle")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = joblib.load(args.model) if args.model else build_model(rng, args.trees)
+    compiled_model = CompiledForest(model, sklearn_batch_size=None) # Measure the vectorized traversal at every batch size
+    print(f"{model.n_estimators} trees, {compiled_model.leaf_probabilities.shape[0]:,} nodes, max depth {compiled_model.max_depth}")
+
+    print(f"{'batch':>8}{'sklearn':>14}{'compiled':>14}{'speedup':>10}")
+    for batch_size in BATCH_SIZES:
+        # Scored as a DataFrame with feature names, like SignalManager does
+        input_vectors = pd.DataFrame(build_inputs(rng, batch_size), columns=FEATURES)
+        if not np.array_equal(model.predict_proba(input_vectors), compiled_model.predict_proba(input_vectors)):
+            raise AssertionError(f"Probabilities differ at batch size {batch_size}")
+
+        sklearn_time = measure(model.predict_proba, input_vectors, args.repeats)
+        compiled_time = measure(compiled_model.predict_proba, input_vectors, args.repeats)
+        print(f"{batch_size:>8}{sklearn_time * 1_000:>11.2f} ms{compiled_time * 1_000:>11.2f} ms{sklearn_time / compiled_time:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare loading a pickled random forest against memory-mapping a compiled forest directory: load time, and
+the memory of several processes holding the same model at once.
+
+Run from the repository root:
+    python -m benchmarks.model_loading [--model PATH] [--trees N] [--processes N]
+
+Memory is read from /proc/<pid>/smaps_rollup (Linux only) while every process is alive. PSS splits shared pages
+between the processes mapping them, so it is the per-process cost when the processes run side by side.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import joblib
+import numpy as np
+
+from benchmarks.forest_inference import build_model
+from src.compiled_forest import CompiledForest
+
+LOADER = """
+import sys
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from src.compiled_forest import load_model
+from src.signal_manager import FEATURES
+start = perf_counter()
+model = load_model(sys.argv[1])
+load_time = perf_counter() - start
+model.predict_proba(pd.DataFrame(np.ones((100, len(FEATURES))), columns=FEATURES)) # Touch the pages scoring needs
+print(load_time, flush=True)
+sys.stdin.readline()
+"""
+
+def read_memory(pid: int) -> dict:
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == "kB":
+                memory[fields[0].rstrip(":")] = int(fields[1]) / 1_024
+    return memory
+
+def measure(mode: str, model_path: str, processes: int):
+    loaders = [subprocess.Popen([sys.executable, "-c", LOADER, model_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(processes)]
+    try:
+        load_times = [float(loader.stdout.readline()) for loader in loaders]
+        memory = [read_memory(loader.pid) for loader in loaders]
+    finally:
+        for loader in loaders:
+            loader.communicate("\n")
+
+    rss = np.mean([process_memory["Rss"] for process_memory in memory])
+    pss = np.mean([process_memory["Pss"] for process_memory in memory])
+    print(f"{mode:<12}{np.median(load_times) * 1_000:>10.1f} ms{rss:>10.1f} MB{pss:>10.1f} MB{pss * processes:>12.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=None, help="Trained RandomForestClassifier pickle")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=4, help="Processes loading the model at the same time")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model) if args.model else build_model(np.random.default_rng(0), args.trees)
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "model.pkl")
+        compiled_path = os.path.join(directory, "model")
+        joblib.dump(model, model_path)
+        CompiledForest(model).save(compiled_path)
+
+        print(f"{args.processes} processes, pickle {os.path.getsize(model_path) / 1_000_000:.1f} MB")
+        print(f"{'model':<12}{'load':>13}{'RSS':>13}{'PSS':>13}{'total PSS':>15}")
+        measure("pickle", model_path, args.processes)
+        measure("compiled", compiled_path, args.processes)
+
+if __name__ == "__main__":
+    main()
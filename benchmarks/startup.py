@@ -0,0 +1,69 @@
+"""Measure startup time and peak RSS of the headless and GUI entry points, from interpreter start until the
+detection pipeline is built.
+
+Run from the repository root:
+    python -m benchmarks.startup [--runs N]
+
+The GUI window is only created when a display is available, otherwise the GUI run measures its imports.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import joblib
+import numpy as np
+
+from time import perf_counter
+from sklearn.ensemble import RandomForestClassifier
+from src.signal_manager import FEATURES
+
+STARTUP = """
+import resource, sys
+from threading import Lock
+from apscheduler.schedulers.background import BackgroundScheduler
+import joblib
+from src.capture import CAPTURE_BACKENDS
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.headless import HeadlessDisplay
+from src.settings import load_settings
+if sys.argv[2] == "gui":
+    import customtkinter
+    from src.display_gui import DisplayGUI
+    display = DisplayGUI(load_settings()) if sys.argv[3] else None
+else:
+    display = HeadlessDisplay(load_settings())
+flow_mutex = Lock()
+flow_manager = FlowManager("10.0.0.1", flow_mutex)
+signal_manager = SignalManager(flow_manager, joblib.load(sys.argv[1]), flow_mutex, 0.95, display)
+scheduler = BackgroundScheduler()
+scheduler.start()
+scheduler.shutdown()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def measure(mode: str, model_path: str, runs: int):
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP, model_path, mode, os.environ.get("DISPLAY", "")], capture_output=True, text=True, check=True).stdout
+        times.append(perf_counter() - start)
+    print(f"{mode:<12}{min(times) * 1_000:>10.0f} ms{int(output) / 1_024:>10.1f} MB peak RSS")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Startups per mode, the fastest is reported")
+    args = parser.parse_args()
+
+    # The shipped model is stored in Git LFS, so a random forest of the same shape is trained on random data
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=100, random_state=0).fit(rng.random((2_000, len(FEATURES))), rng.integers(0, 2, 2_000))
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "model.pkl")
+        joblib.dump(model, model_path)
+        for mode in ("headless", "gui"):
+            measure(mode, model_path, args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,143 @@
+import argparse
+import os
+import signal
 import socket
-import json
-import joblib
-import customtkinter
+import sys
 
 from threading import Lock, Thread
 from apscheduler.schedulers.background import  BackgroundScheduler
-from scapy.all import sniff
+from src.capture import CAPTURE_BACKENDS
 from src.flow_manager import FlowManager
-from src.signal_manager import SignalManager
-from src.display_gui import DisplayGUI
+from src.compiled_forest import load_model
+from src.data_models.timestamp_source import TimestampSource
+from src.signal_manager import SignalManager, SCORE_TICK_INTERVAL
+from src.sharding import ShardedFlowManager, ShardedSignalManager
+from src.headless import HeadlessDisplay
+from src.model_registry import ModelRegistry
+from src.replay import replay_capture
+from src.settings import load_settings
 
 MODEL_PATH = "src/models/all_attacks_random_forest_model_v1.pkl"
+COMPILED_MODEL_PATH = "src/models/all_attacks_random_forest_model_v1" # Written by python -m src.compiled_forest, preferred when present
+SCAN_INTERVAL = 45 # Seconds between scans of every flow with --scoring interval
+DISPLAY_REFRESH_INTERVAL = 5 # Seconds between flow table refreshes with --scoring event
 
-def sniff_packets(flow_manager: FlowManager):
-    sniff(filter="ip", prn=flow_manager.packet_callback, store=False)
-
-if __name__ == "__main__":
+def get_ipv4_address() -> str:
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
         s.connect(("8.8.8.8", 80))
-        ipv4_address = s.getsockname()[0]
+        return s.getsockname()[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ML-Powered IDS")
+    parser.add_argument("--capture-backend", choices=CAPTURE_BACKENDS.keys(), default="scapy", help="scapy dissects every packet, raw decodes headers directly (from an AF_PACKET socket when capturing live, Linux only)")
+    parser.add_argument("--interface", default=None, help="Interface to capture on")
+    parser.add_argument("--timestamp-source", choices=[source.value for source in TimestampSource], default=TimestampSource.CAPTURE.value, help="Use kernel capture timestamps or the time the packet callback runs as packet arrival times")
+    parser.add_argument("--ipv4-address", default=None, help="IPv4 address of the monitored host. Defaults to this host's address, and is required with --replay")
+    parser.add_argument("--replay", metavar="CAPTURE_FILE", default=None, help="Replay a pcap/pcapng file headlessly and report throughput instead of capturing live")
+    parser.add_argument("--replay-speed", type=float, default=0, help="Replay speed as a multiple of the recorded speed, 0 for maximum speed")
+    parser.add_argument("--headless", action="store_true", help="Capture live without the GUI, printing alerts to stdout. The GUI stack is not imported")
+    parser.add_argument("--config", metavar="SETTINGS_FILE", default=None, help="JSON file with attack_probability_threshold and alert_log_output_path settings")
+    parser.add_argument("--alert-log", default=None, help="Alert log output path, overriding the settings file")
+    parser.add_argument("--shards", type=int, default=1, help="Number of worker processes tracking and scoring flows, each owning a shard of the flow table. Only faster than one process on multi-core hosts, compare with --replay first")
+    parser.add_argument("--model", default=None, help="Pickled model or compiled forest directory. Defaults to the compiled forest if it has been generated, otherwise the pickled model")
+    parser.add_argument("--sklearn-large-batches", action="store_true", help="With a compiled forest directory, also load the pickle it was compiled from and score batches of 500 flows or more with sklearn. Faster for large batches, but the process holds its own copy of the forest")
+    parser.add_argument("--watch-model", action="store_true", help="Reload the model when the model file or compiled forest directory changes. SIGHUP always triggers a reload")
+    parser.add_argument("--scoring", choices=["event", "interval"], default=None, help="event scores flows shortly after they change, interval scores every flow every 45 seconds. Defaults to event, or interval with --shards")
+    args = parser.parse_args()
+
+    if args.replay and not args.ipv4_address:
+        parser.error("--ipv4-address is required with --replay")
+
+    if args.model is None:
+        args.model = COMPILED_MODEL_PATH if os.path.isdir(COMPILED_MODEL_PATH) else MODEL_PATH
+
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.scoring is None:
+        args.scoring = "interval" if args.shards > 1 else "event"
+    elif args.scoring == "event" and args.shards > 1:
+        parser.error("--scoring event is not supported with --shards")
+    if args.watch_model and args.shards > 1:
+        parser.error("--watch-model is not supported with --shards")
+    if args.sklearn_large_batches and args.shards > 1:
+        parser.error("--sklearn-large-batches is not supported with --shards")
 
-    model = joblib.load(MODEL_PATH)
+    try:
+        settings = load_settings(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(f"Could not load settings: {e}")
+    if args.alert_log is not None:
+        settings["alert_log_output_path"] = args.alert_log
+
+    ipv4_address = args.ipv4_address or get_ipv4_address()
 
     flow_mutex = Lock()
 
-    customtkinter.set_appearance_mode("Dark")
-    display_gui = DisplayGUI()
-    flow_manager = FlowManager(ipv4_address, flow_mutex)
-    signal_manager = SignalManager(flow_manager, model, flow_mutex, 0.95, display_gui)
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(signal_manager.scan_flows, "interval", seconds=45)
-    scheduler.start()
+    def create_managers(display):
+        threshold = settings["attack_probability_threshold"]
+        if args.shards > 1:
+            flow_manager = ShardedFlowManager(ipv4_address, flow_mutex, args.model, args.shards)
+            return flow_manager, ShardedSignalManager(flow_manager, flow_mutex, threshold, display)
+        flow_manager = FlowManager(ipv4_address, flow_mutex)
+        return flow_manager, SignalManager(flow_manager, load_model(args.model, args.sklearn_large_batches), flow_mutex, threshold, display)
+
+    def start_model_registry(signal_manager) -> ModelRegistry:
+        if args.shards > 1:
+            return None # Each shard loads its own model
+        model_registry = ModelRegistry(signal_manager, args.model, watch=args.watch_model, load_source_model=args.sklearn_large_batches)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda *_: model_registry.request_reload()) # Reload the model without stopping capture
+        return model_registry
+
+    def start_scheduler(signal_manager, refresh_display: bool) -> BackgroundScheduler:
+        scheduler = BackgroundScheduler()
+        if args.scoring == "event":
+            scheduler.add_job(signal_manager.score_due_flows, "interval", seconds=SCORE_TICK_INTERVAL / 1_000_000, max_instances=1, coalesce=True)
+            if refresh_display:
+                scheduler.add_job(signal_manager.refresh_display, "interval", seconds=DISPLAY_REFRESH_INTERVAL)
+        else:
+            scheduler.add_job(signal_manager.scan_flows, "interval", seconds=SCAN_INTERVAL)
+        scheduler.start()
+        return scheduler
+
+    model_registry = None
+    if args.replay:
+        replay_display = HeadlessDisplay(settings)
+        flow_manager, signal_manager = create_managers(replay_display)
+        if args.scoring == "event":
+            print(replay_capture(args.replay, flow_manager, signal_manager, replay_display, SCORE_TICK_INTERVAL, args.capture_backend, args.replay_speed, event_driven=True))
+        else:
+            print(replay_capture(args.replay, flow_manager, signal_manager, replay_display, SCAN_INTERVAL * 1_000_000, args.capture_backend, args.replay_speed))
+    elif args.headless:
+        flow_manager, signal_manager = create_managers(HeadlessDisplay(settings, print_alerts=True))
+        model_registry = start_model_registry(signal_manager)
+        scheduler = start_scheduler(signal_manager, refresh_display=False)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # Stop capturing and flush the alert log on SIGTERM
+        try:
+            CAPTURE_BACKENDS[args.capture_backend](flow_manager, args.interface, TimestampSource(args.timestamp_source))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.shutdown()
+    else:
+        import customtkinter # GUI stack is only loaded when the GUI is used
+        from src.display_gui import DisplayGUI
+
+        customtkinter.set_appearance_mode("Dark")
+        display_gui = DisplayGUI(settings)
+        flow_manager, signal_manager = create_managers(display_gui)
+        model_registry = start_model_registry(signal_manager)
+        scheduler = start_scheduler(signal_manager, refresh_display=True)
+
+        sniff_thread = Thread(target=CAPTURE_BACKENDS[args.capture_backend], args=(flow_manager, args.interface, TimestampSource(args.timestamp_source)), daemon=True)
+        sniff_thread.start()
+
+        display_gui.mainloop()
+        scheduler.shutdown()
 
-    sniff_thread = Thread(target=sniff_packets, args=(flow_manager, ), daemon=True)
-    sniff_thread.start()
+    if model_registry is not None:
+        model_registry.close()
 
-    display_gui.mainloop()
-    scheduler.shutdown()
\ No newline at end of file
+    signal_manager.close()
+    if isinstance(flow_manager, ShardedFlowManager):
+        flow_manager.close()
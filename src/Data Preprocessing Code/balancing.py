@@ -0,0 +1,156 @@
+# balancing.py
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import NearestNeighbors
+from sklearn.utils.class_weight import compute_sample_weight
+from imblearn.over_sampling import SMOTE
+from config import BALANCE_STRATEGY, NEIGHBORS_BACKEND, SMOTE_K_NEIGHBORS, SMOTE_CHUNK_SIZE, BALANCE_N_JOBS, RANDOM_STATE
+from utils import print_progress
+
+BALANCE_STRATEGIES = ['smote', 'smote_chunked', 'sample_weight']
+NEIGHBORS_BACKENDS = ['exact', 'pynndescent']
+
+class ApproximateNeighbors(BaseEstimator):
+    """
+    Approximate k-nearest neighbours with the KNeighborsMixin interface (kneighbors and kneighbors_graph),
+    backed by pynndescent's NN-descent graph instead of an exact tree search.
+    """
+    def __init__(self, n_neighbors=SMOTE_K_NEIGHBORS + 1, n_jobs=BALANCE_N_JOBS, random_state=RANDOM_STATE):
+        self.n_neighbors = n_neighbors
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        import pynndescent  # Optional dependency, only needed for the pynndescent backend
+        self.fit_X_ = X
+        self.n_samples_fit_ = len(X)
+        # The graph holds each row itself followed by its neighbours, so it needs one more than n_neighbors
+        self.index_ = pynndescent.NNDescent(
+            np.asarray(X, dtype=np.float32), n_neighbors=max(self.n_neighbors + 1, 15),
+            n_jobs=self.n_jobs, random_state=self.random_state
+        )
+        return self
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        n_neighbors = n_neighbors or self.n_neighbors
+        if X is None or X is self.fit_X_:
+            # The neighbours of the fitted rows are already in the NN-descent graph. As with KNeighborsMixin,
+            # a row is not its own neighbour when X is None, but is when the fitted rows are queried
+            start = 1 if X is None else 0
+            indices, distances = self.index_.neighbor_graph
+            indices, distances = indices[:, start:start + n_neighbors], distances[:, start:start + n_neighbors]
+        else:
+            indices, distances = self.index_.query(np.asarray(X, dtype=np.float32), k=n_neighbors)
+        return (distances, indices) if return_distance else indices
+
+    def kneighbors_graph(self, X=None, n_neighbors=None, mode='connectivity'):
+        """
+        Returns the neighbours of each row as a sparse (rows, fitted rows) matrix, holding ones with
+        mode='connectivity' or the distances with mode='distance', like KNeighborsMixin.kneighbors_graph.
+        """
+        n_neighbors = n_neighbors or self.n_neighbors
+        if mode == 'connectivity':
+            indices = self.kneighbors(X, n_neighbors, return_distance=False)
+            data = np.ones(indices.size)
+        elif mode == 'distance':
+            distances, indices = self.kneighbors(X, n_neighbors)
+            data = distances.ravel()
+        else:
+            raise ValueError(f"Unsupported mode {mode}, expected 'connectivity' or 'distance'")
+
+        indptr = np.arange(0, indices.size + 1, indices.shape[1])
+        return csr_matrix((data, indices.ravel(), indptr), shape=(indices.shape[0], self.n_samples_fit_))
+
+def make_neighbors(k_neighbors=SMOTE_K_NEIGHBORS, backend=NEIGHBORS_BACKEND, n_jobs=BALANCE_N_JOBS):
+    """
+    Builds the neighbour search used by SMOTE. Each sample is its own first neighbour, so k + 1 are searched.
+    """
+    if backend == 'pynndescent':
+        return ApproximateNeighbors(n_neighbors=k_neighbors + 1, n_jobs=n_jobs)
+    return NearestNeighbors(n_neighbors=k_neighbors + 1, n_jobs=n_jobs)
+
+def smote_resample(X, y, k_neighbors=SMOTE_K_NEIGHBORS, backend=NEIGHBORS_BACKEND, n_jobs=BALANCE_N_JOBS):
+    """
+    Oversamples every minority class up to the majority class with SMOTE over the whole class.
+    Returns the original rows followed by the synthetic rows.
+    """
+    neighbors = make_neighbors(k_neighbors, backend, n_jobs)
+    return SMOTE(k_neighbors=neighbors, random_state=RANDOM_STATE).fit_resample(X, y)
+
+def chunked_smote_resample(X, y, chunk_size=SMOTE_CHUNK_SIZE, k_neighbors=SMOTE_K_NEIGHBORS, backend=NEIGHBORS_BACKEND, n_jobs=BALANCE_N_JOBS):
+    """
+    Oversamples every minority class up to the majority class with SMOTE run on shuffled chunks of at most
+    chunk_size rows of the class. Neighbours are only searched within a chunk, so the search and its
+    memory stay bounded by the chunk size whatever the class size. Each chunk contributes synthetic rows
+    in proportion to its size. Returns the original rows followed by the synthetic rows.
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    X_values = np.asarray(X)
+    y_values = np.asarray(y)
+    classes, counts = np.unique(y_values, return_counts=True)
+
+    new_rows = []
+    new_labels = []
+    for klass, count in zip(classes, counts):
+        n_samples = counts.max() - count
+        if n_samples == 0:
+            continue
+
+        class_indices = rng.permutation(np.flatnonzero(y_values == klass))
+        chunks = np.array_split(class_indices, -(-len(class_indices) // chunk_size))
+
+        # A single row has no neighbour to interpolate towards, so its share goes to the other chunks
+        chunks = [chunk for chunk in chunks if len(chunk) >= 2]
+        if not chunks:
+            raise ValueError(f"Class {klass} has {count} row(s), SMOTE needs at least 2")
+        chunk_sizes = np.cumsum([0] + [len(chunk) for chunk in chunks])
+        chunk_samples = np.diff(np.round(chunk_sizes * n_samples / chunk_sizes[-1]).astype(int))
+        for chunk, samples in zip(chunks, chunk_samples):
+            if samples == 0:
+                continue
+            X_chunk = X_values[chunk]
+            neighbors = make_neighbors(min(k_neighbors, len(chunk) - 1), backend, n_jobs).fit(X_chunk)
+            nns = neighbors.kneighbors(X_chunk, return_distance=False)[:, 1:]
+
+            # Interpolate between a random row of the chunk and one of its nearest neighbours, as SMOTE does
+            rows = rng.integers(0, len(chunk), samples)
+            neighbor_rows = nns[rows, rng.integers(0, nns.shape[1], samples)]
+            steps = rng.random((samples, 1))
+            new_rows.append((X_chunk[rows] + steps * (X_chunk[neighbor_rows] - X_chunk[rows])).astype(X_values.dtype))
+            new_labels.append(np.full(samples, klass, dtype=y_values.dtype))
+
+    X_resampled = pd.DataFrame(np.concatenate([X_values] + new_rows), columns=X.columns).astype(X.dtypes.to_dict())
+    y_resampled = pd.Series(np.concatenate([y_values] + new_labels), name=y.name)
+    return X_resampled, y_resampled
+
+def balanced_sample_weights(y):
+    """
+    Weights every row by the inverse frequency of its class, the same weighting as class_weight='balanced',
+    so the classes carry equal total weight without adding rows.
+    """
+    return compute_sample_weight('balanced', y)
+
+def balance(X, y, strategy=BALANCE_STRATEGY):
+    """
+    Balances the training set with one of BALANCE_STRATEGIES.
+
+    Returns:
+    - X, y: the balanced training set. SMOTE strategies return the original rows followed by the synthetic rows.
+    - sample_weight: per-row weights for the classifier with the sample_weight strategy, which leaves the
+      rows unchanged, otherwise None.
+    """
+    if strategy == 'smote':
+        print_progress(f"Balancing data with SMOTE ({NEIGHBORS_BACKEND} neighbours)...")
+        X_resampled, y_resampled = smote_resample(X, y)
+        return X_resampled, y_resampled, None
+    if strategy == 'smote_chunked':
+        print_progress(f"Balancing data with SMOTE in chunks of {SMOTE_CHUNK_SIZE} rows ({NEIGHBORS_BACKEND} neighbours)...")
+        X_resampled, y_resampled = chunked_smote_resample(X, y)
+        return X_resampled, y_resampled, None
+    if strategy == 'sample_weight':
+        print_progress("Balancing data with sample weights...")
+        return X, y, balanced_sample_weights(y)
+    raise ValueError(f"Unknown balancing strategy {strategy}, expected one of {BALANCE_STRATEGIES}")
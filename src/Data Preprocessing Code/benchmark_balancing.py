@@ -0,0 +1,98 @@
+# benchmark_balancing.py
+# Compares the training set balancing strategies in balancing.py: SMOTE over each whole class and SMOTE in
+# chunks, each with exact and approximate (pynndescent) neighbours, and sample weights, against no balancing.
+# Reports the wall-clock time and peak memory allocated while balancing, the training set size, and the
+# ROC-AUC and F1 of a random forest trained on the balanced set and scored on an untouched test set.
+# Usage:
+#   python benchmark_balancing.py                                (1,000,000 synthetic rows, 10% attacks)
+#   python benchmark_balancing.py --synthetic 200000 --attack-share 0.05
+#   python benchmark_balancing.py --data output/all_attacks_28features_preprocessed_cicids2017_test.parquet
+# The pynndescent rows are skipped when pynndescent is not installed.
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score, f1_score
+from sklearn.model_selection import train_test_split
+from balancing import smote_resample, chunked_smote_resample, balanced_sample_weights
+from config import RANDOM_STATE, NUM_TOP_FEATURES, SMOTE_CHUNK_SIZE
+from utils import print_progress
+
+def make_dataset(rows, attack_share):
+    """
+    Generates an imbalanced binary dataset with NUM_TOP_FEATURES float32 features.
+    """
+    X, y = make_classification(
+        n_samples=rows, n_features=NUM_TOP_FEATURES, n_informative=12, n_redundant=8, class_sep=0.8,
+        weights=[1 - attack_share], flip_y=0.01, random_state=RANDOM_STATE
+    )
+    return pd.DataFrame(X.astype(np.float32), columns=[f'feature_{i}' for i in range(X.shape[1])]), pd.Series(y, name='Attack')
+
+def read_dataset(path):
+    """
+    Reads a preprocessed dataset (features and an 'Attack' column) from a Parquet or CSV file.
+    """
+    data = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    data = data.drop(columns=['Sample_Weight'], errors='ignore')
+    return data.drop(columns=['Attack']), data['Attack']
+
+def measure(balance, X, y):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        X_balanced, y_balanced, sample_weight = balance(X, y)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return X_balanced, y_balanced, sample_weight, elapsed, peak
+
+def evaluate(X_train, y_train, sample_weight, X_test, y_test, trees):
+    # Weighted rows are not reweighted by class, as in train_and_evaluate_rf
+    model = RandomForestClassifier(
+        n_estimators=trees, class_weight="balanced" if sample_weight is None else None, random_state=RANDOM_STATE, n_jobs=-1
+    )
+    model.fit(X_train, y_train, sample_weight=sample_weight)
+    y_proba = model.predict_proba(X_test)[:, 1]
+    return roc_auc_score(y_test, y_proba), f1_score(y_test, y_proba >= 0.5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training set balancing strategies")
+    parser.add_argument("--synthetic", type=int, default=1_000_000, help="Rows of the generated dataset")
+    parser.add_argument("--attack-share", type=float, default=0.1, help="Share of attack rows in the generated dataset")
+    parser.add_argument("--data", default=None, help="Preprocessed Parquet or CSV file to use instead of generated data")
+    parser.add_argument("--chunk-size", type=int, default=SMOTE_CHUNK_SIZE, help="Rows per chunk for chunked SMOTE")
+    parser.add_argument("--trees", type=int, default=50, help="Trees of the evaluation forest")
+    args = parser.parse_args()
+
+    X, y = read_dataset(args.data) if args.data else make_dataset(args.synthetic, args.attack_share)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y)
+    X_train, y_train = X_train.reset_index(drop=True), y_train.reset_index(drop=True)
+    print_progress(f"Training set: {len(X_train)} rows, {y_train.mean() * 100:.1f}% attacks. Testing set: {len(X_test)} rows.")
+
+    backends = ['exact']
+    if importlib.util.find_spec('pynndescent') is not None:
+        backends.append('pynndescent')
+        # Compile pynndescent's numba functions before timing it
+        chunked_smote_resample(X_train.iloc[:2_000], y_train.iloc[:2_000], backend='pynndescent')
+
+    strategies = [('none', lambda X, y: (X, y, None))]
+    for backend in backends:
+        strategies.append((f'smote/{backend}', lambda X, y, backend=backend: (*smote_resample(X, y, backend=backend), None)))
+        strategies.append((f'chunked/{backend}', lambda X, y, backend=backend: (*chunked_smote_resample(X, y, args.chunk_size, backend=backend), None)))
+    strategies.append(('sample_weight', lambda X, y: (X, y, balanced_sample_weights(y))))
+
+    print(f"{'strategy':<20}{'time':>10}{'peak alloc':>14}{'rows':>12}{'ROC-AUC':>10}{'F1':>8}")
+    for name, balance in strategies:
+        X_balanced, y_balanced, sample_weight, elapsed, peak = measure(balance, X_train, y_train)
+        roc_auc, f1 = evaluate(X_balanced, y_balanced, sample_weight, X_test, y_test, args.trees)
+        print(f"{name:<20}{elapsed:>9.2f}s{peak:>11.0f} MB{len(X_balanced):>12}{roc_auc:>10.4f}{f1:>8.4f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmark_clean_data.py
+# Compares the original clean_data (per-column string stripping, a full-frame replace of infinities and
+# separate drop_duplicates and dropna passes) against the single-pass clean_data, checking that both keep
+# the same rows and reporting wall-clock time and peak memory allocated during cleaning.
+# Usage:
+#   python benchmark_clean_data.py                      (loads the CICIDS2017 files in DATASET_DIR)
+#   python benchmark_clean_data.py --synthetic 100000   (generates 8 files of 100000 rows each)
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from config import DATASET_DIR
+from data_preprocessing import clean_data
+from benchmark_data_loader import load_data_legacy, write_synthetic_dataset
+from utils import print_progress
+
+def clean_data_legacy(data):
+    """
+    clean_data before the single-pass rewrite, without its progress output.
+    """
+    data.dropna(axis=1, how='all', inplace=True)
+    data.drop_duplicates(inplace=True)
+    data.columns = data.columns.str.strip()
+    data.columns = data.columns.str.replace(' ', '_')
+    str_cols = data.select_dtypes(include=['object', 'string']).columns
+    for col in str_cols:
+        data[col] = data[col].str.strip()
+    data.replace([np.inf, -np.inf], np.nan, inplace=True)
+    data.dropna(inplace=True)
+    return data
+
+def measure(clean, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaned = clean(data)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return cleaned, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_data")
+    parser.add_argument("--synthetic", type=int, default=0, help="Rows per generated file, 0 to load DATASET_DIR")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_dir = DATASET_DIR
+        if args.synthetic:
+            print_progress(f"Writing synthetic files of {args.synthetic} rows...")
+            write_synthetic_dataset(directory, args.synthetic, duplicate_share=0.1)
+            dataset_dir = directory
+
+        # Both run on the original loader's output, since load_data already drops non-finite rows
+        raw_data = load_data_legacy(dataset_dir)
+        legacy, legacy_time, legacy_peak = measure(clean_data_legacy, raw_data.copy())
+        cleaned, cleaned_time, cleaned_peak = measure(clean_data, raw_data)
+
+    if not legacy.index.equals(cleaned.index) or list(legacy.columns) != list(cleaned.columns):
+        raise AssertionError("clean_data kept different rows or columns")
+    if not (legacy['Label'].astype(str).to_numpy() == cleaned['Label'].astype(str).to_numpy()).all():
+        raise AssertionError("clean_data produced different labels")
+
+    print(f"{'clean_data':<10}{'time':>10}{'peak alloc':>14}{'rows':>12}{'columns':>10}")
+    print(f"{'legacy':<10}{legacy_time:>9.2f}s{legacy_peak:>11.0f} MB{len(legacy):>12}{legacy.shape[1]:>10}")
+    print(f"{'vectorized':<10}{cleaned_time:>9.2f}s{cleaned_peak:>11.0f} MB{len(cleaned):>12}{cleaned.shape[1]:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# benchmark_data_loader.py
+# Compares the original loader (pd.read_csv with low_memory=False on each file, then pd.concat)
+# against the chunked, typed, parallel load_data, reporting wall-clock time, peak RSS and the size
+# of the loaded DataFrame. Each loader runs in its own process so peak RSS is measured separately.
+# Usage:
+#   python benchmark_data_loader.py                  (uses the CICIDS2017 files in DATASET_DIR)
+#   python benchmark_data_loader.py --synthetic 100000  (generates 8 files of 100000 rows each)
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from config import DATASET_DIR, CSV_FILES, LABEL_COLUMN, INT32_COLUMNS, FLOAT32_COLUMNS
+from data_loader import load_data
+from utils import print_progress
+
+def load_data_legacy(dataset_dir):
+    """
+    The loader before chunked, typed loading: every file read whole with inferred dtypes, then concatenated.
+    """
+    data_list = []
+    for file_name in CSV_FILES:
+        file_path = os.path.join(dataset_dir, file_name)
+        if os.path.exists(file_path):
+            data_list.append(pd.read_csv(file_path, low_memory=False))
+    return pd.concat(data_list, ignore_index=True)
+
+def write_synthetic_dataset(dataset_dir, rows, duplicate_share=0.0):
+    """
+    Writes CSV files with the CICIDS2017 header, random feature values, a share of infinite and missing
+    flow rates, a mix of labels (some with stray whitespace) and optionally a share of duplicated rows.
+    """
+    rng = np.random.default_rng(0)
+    for file_name in CSV_FILES:
+        data = {}
+        for column in INT32_COLUMNS:
+            data[f" {column}"] = rng.integers(0, 65_536, rows)
+        for column in FLOAT32_COLUMNS:
+            data[f" {column}"] = rng.exponential(1_000_000, rows).round(3)
+        flow_bytes = data[" Flow Bytes/s"].astype(object)
+        flow_bytes[rng.random(rows) < 0.001] = "Infinity"
+        flow_bytes[rng.random(rows) < 0.001] = np.nan
+        data[" Flow Bytes/s"] = flow_bytes
+        data[f" {LABEL_COLUMN}"] = rng.choice(["BENIGN", "DoS Hulk", "PortScan", "DDoS", "DoS slowloris "], rows, p=[0.7, 0.1, 0.1, 0.05, 0.05])
+        data = pd.DataFrame(data)
+        if duplicate_share:
+            data = pd.concat([data, data.sample(frac=duplicate_share, random_state=0)], ignore_index=True)
+        data.to_csv(os.path.join(dataset_dir, file_name), index=False)
+
+def run_loader(loader, dataset_dir):
+    import resource # Unix only
+    start = time.perf_counter()
+    data = load_data_legacy(dataset_dir) if loader == "legacy" else load_data(dataset_dir=dataset_dir)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed} {peak_rss} {data.memory_usage(deep=True).sum() / 1024 ** 2} {len(data)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV loading")
+    parser.add_argument("--synthetic", type=int, default=0, help="Rows per generated file, 0 to load DATASET_DIR")
+    parser.add_argument("--run", choices=["legacy", "chunked"], help=argparse.SUPPRESS)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_loader(args.run, args.dataset_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_dir = args.dataset_dir
+        if args.synthetic:
+            print_progress(f"Writing {len(CSV_FILES)} synthetic files of {args.synthetic} rows...")
+            write_synthetic_dataset(directory, args.synthetic)
+            dataset_dir = directory
+
+        print(f"{'loader':<10}{'time':>10}{'peak RSS':>14}{'DataFrame':>14}{'rows':>12}")
+        for loader in ("legacy", "chunked"):
+            output = subprocess.run([sys.executable, __file__, "--run", loader, "--dataset-dir", dataset_dir], capture_output=True, text=True, check=True).stdout
+            elapsed, peak_rss, frame_size, rows = output.splitlines()[-1].split()
+            print(f"{loader:<10}{float(elapsed):>9.1f}s{float(peak_rss):>11.0f} MB{float(frame_size):>11.0f} MB{int(rows):>12}")
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Output directory for preprocessed data
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 
+# Directory of cached pipeline stages, keyed on input file hashes and configuration
+CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache')
+
+# Version of the cached stages, bump when the code of a stage changes its output
+PIPELINE_VERSION = 1
+
 # Dataset directory
 DATASET_DIR = os.path.join(
     BASE_DIR,
@@ -38,6 +44,44 @@ ATTACK_TYPES = [
 # Column name for labels (adjust if necessary)
 LABEL_COLUMN = 'Label'
 
+# Column types used when loading the CSV files, by column name with whitespace stripped.
+# Counts, flags, ports and window sizes fit in int32. Every other feature is read as float32,
+# which is the precision scikit-learn's trees split on anyway.
+INT32_COLUMNS = [
+    'Destination Port', 'Total Fwd Packets', 'Total Backward Packets',
+    'Fwd PSH Flags', 'Bwd PSH Flags', 'Fwd URG Flags', 'Bwd URG Flags',
+    'FIN Flag Count', 'SYN Flag Count', 'RST Flag Count', 'PSH Flag Count',
+    'ACK Flag Count', 'URG Flag Count', 'CWE Flag Count', 'ECE Flag Count',
+    'Subflow Fwd Packets', 'Subflow Bwd Packets',
+    'Init_Win_bytes_forward', 'Init_Win_bytes_backward', 'act_data_pkt_fwd'
+]
+FLOAT32_COLUMNS = [
+    'Flow Duration', 'Total Length of Fwd Packets', 'Total Length of Bwd Packets',
+    'Fwd Packet Length Max', 'Fwd Packet Length Min', 'Fwd Packet Length Mean', 'Fwd Packet Length Std',
+    'Bwd Packet Length Max', 'Bwd Packet Length Min', 'Bwd Packet Length Mean', 'Bwd Packet Length Std',
+    'Flow Bytes/s', 'Flow Packets/s', 'Flow IAT Mean', 'Flow IAT Std', 'Flow IAT Max', 'Flow IAT Min',
+    'Fwd IAT Total', 'Fwd IAT Mean', 'Fwd IAT Std', 'Fwd IAT Max', 'Fwd IAT Min',
+    'Bwd IAT Total', 'Bwd IAT Mean', 'Bwd IAT Std', 'Bwd IAT Max', 'Bwd IAT Min',
+    'Fwd Header Length', 'Bwd Header Length', 'Fwd Packets/s', 'Bwd Packets/s',
+    'Min Packet Length', 'Max Packet Length', 'Packet Length Mean', 'Packet Length Std', 'Packet Length Variance',
+    'Down/Up Ratio', 'Average Packet Size', 'Avg Fwd Segment Size', 'Avg Bwd Segment Size', 'Fwd Header Length.1',
+    'Fwd Avg Bytes/Bulk', 'Fwd Avg Packets/Bulk', 'Fwd Avg Bulk Rate',
+    'Bwd Avg Bytes/Bulk', 'Bwd Avg Packets/Bulk', 'Bwd Avg Bulk Rate',
+    'Subflow Fwd Bytes', 'Subflow Bwd Bytes', 'min_seg_size_forward',
+    'Active Mean', 'Active Std', 'Active Max', 'Active Min', 'Idle Mean', 'Idle Std', 'Idle Max', 'Idle Min'
+]
+COLUMN_DTYPES = {
+    **{column: 'Int32' for column in INT32_COLUMNS},  # Nullable, so an empty cell does not fail the load
+    **{column: 'float32' for column in FLOAT32_COLUMNS},
+    LABEL_COLUMN: 'category'
+}
+
+# Rows read at a time from each CSV file
+LOAD_CHUNK_SIZE = 200_000
+
+# CSV files read in parallel, None for one per CPU core
+LOAD_WORKERS = None
+
 
 # Route to choose optimal N:
 # 1. Trade-Off Between Attack Row Retention and Model Complexity:
@@ -55,3 +99,15 @@ NUM_TOP_FEATURES = 28
 
 # Random seed for reproducibility
 RANDOM_STATE = 42
+
+# Class balancing of the training set: 'smote' over each whole class, 'smote_chunked' over chunks of
+# SMOTE_CHUNK_SIZE rows of each class, or 'sample_weight' to weight rows in the classifier instead
+BALANCE_STRATEGY = 'smote'
+
+# Nearest neighbour search used by SMOTE: 'exact' (scikit-learn) or 'pynndescent' (approximate, needs pynndescent)
+NEIGHBORS_BACKEND = 'exact'
+SMOTE_K_NEIGHBORS = 5
+SMOTE_CHUNK_SIZE = 200_000
+
+# Parallel jobs for the neighbour search, -1 for every core
+BALANCE_N_JOBS = -1
@@ -1,28 +1,88 @@
 # data_loader.py
 
 import os
+import numpy as np
 import pandas as pd
-from config import DATASET_DIR, CSV_FILES, LABEL_COLUMN
+from concurrent.futures import ProcessPoolExecutor
+from config import DATASET_DIR, CSV_FILES, LABEL_COLUMN, COLUMN_DTYPES, LOAD_CHUNK_SIZE, LOAD_WORKERS
 from utils import print_progress
 
-def load_data():
+def read_dtypes(file_path):
     """
-    Loads data from the CSV files specified in the configuration.
-    Returns a concatenated pandas DataFrame.
+    Maps the raw (unstripped) column names of a CSV file to the dtypes in COLUMN_DTYPES.
+    Columns missing from the schema keep pandas' inferred dtype.
     """
-    data_list = []
+    columns = pd.read_csv(file_path, nrows=0).columns
+    return {column: COLUMN_DTYPES[column.strip()] for column in columns if column.strip() in COLUMN_DTYPES}
+
+def drop_non_finite_rows(chunk):
+    """
+    Drops rows with missing or infinite values, which clean_data would remove anyway,
+    so they are never held in memory or concatenated. Columns with no values in the chunk are
+    skipped, since clean_data drops the column instead if it is empty in every file, and
+    removes those rows itself otherwise. Nullable integer columns left without missing values
+    are narrowed to int32.
+    """
+    present = chunk.notna()
+    empty_columns = chunk.columns[~present.any().to_numpy()]
+    float_columns = chunk.select_dtypes(include=['floating']).columns.difference(empty_columns)
+    other_columns = chunk.columns.difference(float_columns).difference(empty_columns)
+    finite = np.isfinite(chunk[float_columns].to_numpy()).all(axis=1)
+    finite &= present[other_columns].to_numpy().all(axis=1)
+    chunk = chunk[finite]
+
+    nullable_columns = chunk.select_dtypes(include=['Int32']).columns.difference(empty_columns)
+    return chunk.astype({column: 'int32' for column in nullable_columns})
+
+def unify_label_categories(frames):
+    """
+    Gives the label column of every frame the same categories. Each chunk or file only has categories for the
+    labels it contains, and pd.concat turns categorical columns with different categories into plain strings.
+    """
+    labels = sorted(set().union(*(df[LABEL_COLUMN].cat.categories for df in frames)))
+    for df in frames:
+        df[LABEL_COLUMN] = df[LABEL_COLUMN].cat.set_categories(labels)
 
-    for idx, file_name in enumerate(CSV_FILES):
-        file_path = os.path.join(DATASET_DIR, file_name)
-        print_progress(f"Loading {file_name} ({idx + 1}/{len(CSV_FILES)})...")
-        try:
-            df = pd.read_csv(file_path, low_memory=False)
-            data_list.append(df)
-        except FileNotFoundError:
-            print(f"Error: {file_name} not found in {DATASET_DIR}")
-            continue
+def load_file(file_path, chunksize=LOAD_CHUNK_SIZE):
+    """
+    Loads one CSV file in chunks with the COLUMN_DTYPES schema, filtering each chunk before concatenation.
+    """
+    chunks = []
+    with pd.read_csv(file_path, dtype=read_dtypes(file_path), chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip()
+            chunks.append(drop_non_finite_rows(chunk))
+    unify_label_categories(chunks)
+    return pd.concat(chunks, ignore_index=True)
+
+def load_data(chunksize=LOAD_CHUNK_SIZE, workers=LOAD_WORKERS, dataset_dir=DATASET_DIR):
+    """
+    Loads data from the CSV files specified in the configuration, reading up to `workers` files in parallel.
+    Rows with missing or infinite values are dropped while loading.
+    Returns a concatenated pandas DataFrame with stripped column names.
+    """
+    file_paths = []
+    for file_name in CSV_FILES:
+        file_path = os.path.join(dataset_dir, file_name)
+        if os.path.exists(file_path):
+            file_paths.append(file_path)
+        else:
+            print(f"Error: {file_name} not found in {dataset_dir}")
+
+    data_list = []
+    workers = min(workers or os.cpu_count() or 1, len(file_paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for idx, (file_path, df) in enumerate(zip(file_paths, executor.map(load_file, file_paths, [chunksize] * len(file_paths)))):
+                print_progress(f"Loaded {os.path.basename(file_path)} ({idx + 1}/{len(file_paths)})...")
+                data_list.append(df)
+    else:
+        for idx, file_path in enumerate(file_paths):
+            print_progress(f"Loading {os.path.basename(file_path)} ({idx + 1}/{len(file_paths)})...")
+            data_list.append(load_file(file_path, chunksize))
 
     if data_list:
+        unify_label_categories(data_list)
         data = pd.concat(data_list, ignore_index=True)
         return data
     else:
@@ -9,12 +9,25 @@ from sklearn.model_selection import train_test_split
 from imblearn.over_sampling import SMOTE
 from config import LABEL_COLUMN, ATTACK_TYPES, RANDOM_STATE
 from feature_selection import rf_feature_selection, mi_feature_selection
-from utils import print_progress
+from utils import print_progress, hash_rows, duplicated_rows
 from sklearn.feature_selection import mutual_info_classif
 
+def strip_categories(column):
+    """
+    Strips whitespace from a string column by stripping its categories instead of every value.
+    Returns a categorical column, merging categories that only differed by whitespace.
+    """
+    column = column.astype('category')
+    stripped = column.cat.categories.str.strip()
+    categories = stripped.unique()
+    codes = np.where(column.cat.codes.to_numpy() >= 0, categories.get_indexer(stripped)[column.cat.codes.to_numpy()], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=column.index, name=column.name)
+
 def clean_data(data):
     """
     Cleans the data by handling missing values, duplicates, and standardizing column names.
+    Rows are checked in one pass: a row is kept if it is the first copy of its values and every value is
+    finite and present, and the frame is filtered once with that mask.
     """
     print_progress("Cleaning data...")
 
@@ -22,51 +35,72 @@ def clean_data(data):
     initial_shape = data.shape
     print(f"Initial dataset size: {initial_shape}")
 
+    # Build the finite mask one column at a time over views of the data, rather than copying the
+    # numeric columns into one block
+    finite = np.ones(len(data), dtype=bool)
+    empty_columns = []
+    for column in data.columns:
+        values = data[column]
+        if pd.api.types.is_float_dtype(values.dtype):
+            column_finite = np.isfinite(values.to_numpy())
+            if not column_finite.any() and values.isna().all():
+                empty_columns.append(column)
+                continue
+        elif pd.api.types.is_integer_dtype(values.dtype) and not isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            continue
+        else:
+            column_finite = values.notna().to_numpy()
+            if not column_finite.any():
+                empty_columns.append(column)
+                continue
+        finite &= column_finite
+
     # Step 1: Remove columns with all missing values
     cols_before = data.shape[1]
-    data.dropna(axis=1, how='all', inplace=True)
-    cols_after = data.shape[1]
-    cols_removed = cols_before - cols_after
+    cols_removed = len(empty_columns)
+    if empty_columns:
+        data = data.drop(columns=empty_columns)
     print(f"Step 1: Removed {cols_removed} columns with all missing values "
           f"({(cols_removed / cols_before) * 100:.2f}% reduction).")
     print(f"Dataset size after removing columns: {data.shape}")
 
     # Step 2: Remove duplicate rows
+    duplicates = duplicated_rows(hash_rows(data))
     rows_before = data.shape[0]
-    data.drop_duplicates(inplace=True)
-    rows_after = data.shape[0]
-    rows_removed = rows_before - rows_after
+    rows_removed = duplicates.sum()
     print(f"Step 2: Removed {rows_removed} duplicate rows "
           f"({(rows_removed / rows_before) * 100:.2f}% reduction).")
-    print(f"Dataset size after removing duplicates: {data.shape}")
+    print(f"Dataset size after removing duplicates: {(rows_before - rows_removed, data.shape[1])}")
 
     # Step 3: Standardize column names and strip whitespace
     print("Step 3: Standardizing column names and stripping whitespace...")
-    data.columns = data.columns.str.strip()
-    data.columns = data.columns.str.replace(' ', '_')
-    print(f"Dataset size after standardizing column names: {data.shape}")
+    data.columns = data.columns.str.strip().str.replace(' ', '_')
 
-    # Step 4: Strip whitespace from string columns
+    # Step 4: Strip whitespace from string columns, once per distinct value
     print("Step 4: Stripping whitespace from string columns...")
-    str_cols = data.select_dtypes(include=['object']).columns
+    str_cols = data.select_dtypes(include=['object', 'string', 'category']).columns
     for col in str_cols:
-        data[col] = data[col].str.strip()
-    print(f"Dataset size after stripping whitespace: {data.shape}")
+        data[col] = strip_categories(data[col])
 
-    # Step 5: Replace infinity values with NaN
-    print("Step 5: Replacing infinity values with NaN...")
-    data.replace([np.inf, -np.inf], np.nan, inplace=True)
-    print(f"Dataset size after replacing infinity values: {data.shape}")
-
-    # Step 6: Drop rows with NaN values
-    rows_before = data.shape[0]
-    data.dropna(inplace=True)
-    rows_after = data.shape[0]
-    rows_removed = rows_before - rows_after
-    print(f"Step 6: Removed {rows_removed} rows with NaN values "
+    # Steps 5 and 6: Drop rows with infinite or missing values, filtering them out together with the
+    # duplicates in a single copy of the frame
+    rows_before = rows_before - rows_removed
+    keep = finite & ~duplicates
+    rows_removed = rows_before - keep.sum()
+    print(f"Steps 5 and 6: Removed {rows_removed} rows with infinite or NaN values "
           f"({(rows_removed / rows_before) * 100:.2f}% reduction).")
+    if not keep.all():
+        data = data[keep]
     print(f"Dataset size after removing rows with NaN values: {data.shape}")
 
+    # Nullable integer columns have no missing values left, so they can use plain NumPy integers
+    nullable_columns = {
+        column: dtype.numpy_dtype for column, dtype in data.dtypes.items()
+        if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, pd.api.extensions.ExtensionDtype)
+    }
+    if nullable_columns:
+        data = data.astype(nullable_columns)
+
     # Final dataset size
     final_shape = data.shape
     print(f"Final dataset size: {final_shape}")
@@ -158,24 +192,16 @@ def balance_data(X, y):
     
     # Convert resampled features to a DataFrame for easier processing
     X_resampled = pd.DataFrame(X_resampled, columns=X.columns)
+    y_resampled = pd.Series(np.asarray(y_resampled), name='Attack')
     
-    # Combine X and y for easier handling of duplicates
-    balanced_data = X_resampled.copy()
-    balanced_data['Attack'] = y_resampled
-    
-    # Remove duplicates
-    num_duplicates_before = balanced_data.duplicated().sum()
-    balanced_data.drop_duplicates(inplace=True)
-    num_duplicates_after = balanced_data.duplicated().sum()
+    # Remove duplicates by row hash, without combining X and y into a copy
+    duplicates = duplicated_rows(hash_rows(X_resampled, y_resampled))
+    X_final = X_resampled[~duplicates]
+    y_final = y_resampled[~duplicates]
     
     # Print size after removing duplicates
-    print(f"Duplicates before removing: {num_duplicates_before}")
-    print(f"Duplicates after removing: {num_duplicates_after}")
-    print(f"Dataset size after removing duplicates: {balanced_data.shape}")
-    
-    # Separate features and target after duplicate removal
-    X_final = balanced_data.drop(columns=['Attack'])
-    y_final = balanced_data['Attack']
+    print(f"Duplicates before removing: {duplicates.sum()}")
+    print(f"Dataset size after removing duplicates: {(len(X_final), X_final.shape[1] + 1)}")
     
     return X_final, y_final
 
@@ -198,6 +224,19 @@ def preprocess_data(data):
     data = encode_labels(data)
     print_progress(f"Data size after encoding labels: {data.shape}")
     
+    return select_features(data)
+
+def select_features(data):
+    """
+    Scales the cleaned and encoded data and selects the top N features.
+    
+    Parameters:
+    - data: pandas DataFrame, the output of clean_data and encode_labels.
+    
+    Returns:
+    - X_selected: pandas DataFrame, preprocessed feature matrix with top N features (from Random Forest).
+    - y: pandas Series, the target vector.
+    """
     X = data.drop(columns=['Attack'])
     y = data['Attack']
     
@@ -0,0 +1,105 @@
+# dataset_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+from config import CACHE_DIR, PIPELINE_VERSION
+from utils import print_progress
+
+HASH_BLOCK_SIZE = 1024 * 1024  # Bytes read at a time when hashing input files
+
+def file_hash(file_path):
+    """
+    Returns the SHA-256 of a file. Hashes are recorded in the cache directory by path, size and
+    modification time, so an unchanged file is only read once.
+    """
+    index_path = os.path.join(CACHE_DIR, 'file_hashes.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+
+    stat = os.stat(file_path)
+    entry = index.get(os.path.abspath(file_path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            sha256.update(block)
+
+    index[os.path.abspath(file_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256.hexdigest()}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(f"{index_path}.tmp", 'w') as index_file:
+        json.dump(index, index_file, indent=2)
+    os.replace(f"{index_path}.tmp", index_path)
+    return sha256.hexdigest()
+
+def stage_key(stage, inputs, settings):
+    """
+    Builds the cache key of a pipeline stage from the hashes of its input files (or the keys of the
+    stages it builds on) and the configuration values that change its output.
+    """
+    payload = json.dumps({'stage': stage, 'version': PIPELINE_VERSION, 'inputs': inputs, 'settings': settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def load_stage(stage, key):
+    """
+    Loads the DataFrames saved for a stage key with memory-mapped Parquet reads.
+    Returns a dict of DataFrames by name, or None if the stage is not cached.
+    """
+    stage_dir = os.path.join(CACHE_DIR, f"{stage}-{key}")
+    if not os.path.isdir(stage_dir):
+        return None
+    return {
+        os.path.splitext(file_name)[0]: pd.read_parquet(os.path.join(stage_dir, file_name), memory_map=True)
+        for file_name in sorted(os.listdir(stage_dir)) if file_name.endswith('.parquet')
+    }
+
+def save_stage(stage, key, frames):
+    """
+    Saves the DataFrames of a stage as Parquet files. They are written to a temporary directory and
+    renamed into place, so an interrupted run never leaves a partial stage behind.
+    """
+    stage_dir = os.path.join(CACHE_DIR, f"{stage}-{key}")
+    temp_dir = f"{stage_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    for name, frame in frames.items():
+        frame.to_parquet(os.path.join(temp_dir, f"{name}.parquet"), index=False)
+    os.replace(temp_dir, stage_dir)
+
+def write_output(data, csv_path, key, write_csv=True):
+    """
+    Writes a pipeline output as CSV and as Parquet next to it, followed by a `.key.json` sidecar holding the
+    stage key and the size and modification time of the CSV. Readers use the Parquet copy only when the
+    sidecar matches the CSV, so a CSV replaced after this run is never shadowed by a stale Parquet file.
+    The CSV is kept when `write_csv` is False and it already exists.
+    """
+    base_path = os.path.splitext(csv_path)[0]
+    if write_csv or not os.path.exists(csv_path):
+        data.to_csv(csv_path, index=False)
+    data.to_parquet(f"{base_path}.parquet", index=False)
+
+    stat = os.stat(csv_path)
+    with open(f"{base_path}.key.json.tmp", 'w') as key_file:
+        json.dump({'key': key, 'csv_size': stat.st_size, 'csv_mtime_ns': stat.st_mtime_ns}, key_file, indent=2)
+    os.replace(f"{base_path}.key.json.tmp", f"{base_path}.key.json")
+
+def cached_stage(stage, key, compute):
+    """
+    Returns the cached output of a stage, or runs `compute` (which returns a dict of DataFrames
+    by name) and caches its output. Also returns whether the output came from the cache.
+    """
+    frames = load_stage(stage, key)
+    if frames is not None:
+        print_progress(f"Loaded {stage} stage from cache ({key}).")
+        return frames, True
+
+    frames = compute()
+    save_stage(stage, key, frames)
+    print_progress(f"Cached {stage} stage ({key}).")
+    return frames, False
@@ -1,116 +1,114 @@
 # main.py
 
 import os
+import numpy as np
 import pandas as pd
 from data_loader import load_data
-from data_preprocessing import preprocess_data, plot_class_distribution
-from utils import print_progress
-from config import OUTPUT_DIR, RANDOM_STATE
-from imblearn.over_sampling import SMOTE
+from data_preprocessing import clean_data, encode_labels, select_features, plot_class_distribution
+from dataset_cache import file_hash, stage_key, cached_stage, write_output
+from balancing import balance
+from utils import print_progress, hash_rows, duplicated_rows
+from config import (OUTPUT_DIR, RANDOM_STATE, DATASET_DIR, CSV_FILES, ATTACK_TYPES, LABEL_COLUMN, COLUMN_DTYPES, NUM_TOP_FEATURES,
+                    BALANCE_STRATEGY, NEIGHBORS_BACKEND, SMOTE_K_NEIGHBORS, SMOTE_CHUNK_SIZE)
 
 def remove_duplicates_after_feature_selection(X, y):
     """
     Removes duplicate rows from the feature set after feature selection and logs the number
-    of attack rows removed.
+    of attack rows removed. Also returns the feature hash of each kept row, which later stages
+    reuse instead of hashing the rows again.
     """
     print("[INFO] Removing duplicates after feature selection...")
 
-    # Combine X and y for duplicate analysis
-    combined_df = X.copy()
-    combined_df['Attack'] = y
+    # Hash each row once, and combine the feature hashes with the label instead of copying X
+    feature_hashes = hash_rows(X)
+    duplicates = duplicated_rows(hash_rows(X, y, feature_hashes))
 
-    # Count attack rows before deduplication
-    attack_rows_before = combined_df['Attack'].sum()
-
-    # Remove duplicates
-    initial_rows = combined_df.shape[0]
-    combined_df = combined_df.drop_duplicates()
-    removed_rows = initial_rows - combined_df.shape[0]
-
-    # Count attack rows after deduplication
-    attack_rows_after = combined_df['Attack'].sum()
-
-    # Calculate the number of attack rows removed
-    attack_rows_removed = attack_rows_before - attack_rows_after
+    # Count the attack rows among the duplicates
+    initial_rows = X.shape[0]
+    removed_rows = duplicates.sum()
+    attack_rows_removed = y[duplicates].sum()
 
     print(f"[INFO] Removed {removed_rows} duplicate rows after feature selection "
           f"({(removed_rows / initial_rows) * 100:.2f}% reduction).")
     print(f"[INFO] Of these, {attack_rows_removed} rows were attacks.")
 
-    # Separate X and y again
-    X_deduplicated = combined_df.drop(columns=['Attack'])
-    y_deduplicated = combined_df['Attack']
+    return X[~duplicates], y[~duplicates], feature_hashes[~duplicates]
 
-    return X_deduplicated, y_deduplicated
-
-def balance_data_with_debug(X, y):
+def balance_data_with_debug(X, y, feature_hashes=None):
     """
-    Balances the dataset using SMOTE and removes any duplicates that might be introduced.
+    Balances the dataset with the configured BALANCE_STRATEGY and removes any duplicates that SMOTE
+    might introduce. `feature_hashes` are the hash_rows(X) values of X if already known.
+    Returns the balanced X and y, and the sample weights of the rows with the 'sample_weight' strategy (otherwise None).
     """
-    print("[INFO] Balancing data with SMOTE...")
-    smote = SMOTE(random_state=RANDOM_STATE)
-    X_balanced, y_balanced = smote.fit_resample(X, y)
+    X_balanced, y_balanced, sample_weight = balance(X, y, BALANCE_STRATEGY)
+    if sample_weight is not None:
+        # The rows are unchanged, so there are no synthetic duplicates to remove
+        print(f"[INFO] Sample weights per class: {pd.Series(sample_weight).groupby(np.asarray(y)).first().to_dict()}")
+        return X, y, sample_weight
+
+    feature_hashes = hash_rows(X, hashes=feature_hashes)
 
     # Debug: Check for duplicates before and after SMOTE
-    print(f"[DEBUG] Number of duplicates before SMOTE: {X.duplicated().sum()}")
+    print(f"[DEBUG] Number of duplicates before SMOTE: {duplicated_rows(feature_hashes).sum()}")
     print(f"[DEBUG] Number of samples after SMOTE: {X_balanced.shape[0]}")
 
-    # Remove duplicates introduced by SMOTE
-    df_balanced = pd.DataFrame(X_balanced, columns=X.columns)
-    df_balanced['Attack'] = y_balanced
-    duplicates_after_smote = df_balanced.duplicated().sum()
-    print(f"[DEBUG] Number of duplicates after SMOTE: {duplicates_after_smote}")
+    # SMOTE returns the original rows first, so only the synthetic rows are hashed
+    X_balanced = pd.DataFrame(X_balanced, columns=X.columns).reset_index(drop=True)
+    y_balanced = pd.Series(np.asarray(y_balanced), name='Attack')
+    if (X_balanced.dtypes.to_numpy() == X.dtypes.to_numpy()).all():
+        balanced_hashes = pd.concat([pd.Series(feature_hashes.to_numpy()), hash_rows(X_balanced.iloc[len(X):])], ignore_index=True)
+    else:
+        balanced_hashes = hash_rows(X_balanced)
 
-    df_balanced = df_balanced.drop_duplicates()
-    duplicates_removed = duplicates_after_smote - df_balanced.duplicated().sum()
-    print(f"[DEBUG] Number of duplicates removed after SMOTE: {duplicates_removed}")
+    # Remove duplicates introduced by SMOTE
+    duplicates = duplicated_rows(hash_rows(X_balanced, y_balanced, balanced_hashes))
+    print(f"[DEBUG] Number of duplicates after SMOTE: {duplicates.sum()}")
 
-    X_balanced = df_balanced.drop(columns=['Attack'])
-    y_balanced = df_balanced['Attack']
+    X_balanced = X_balanced[~duplicates]
+    y_balanced = y_balanced[~duplicates]
+    print(f"[DEBUG] Number of duplicates removed after SMOTE: {duplicates.sum()}")
     print(f"[INFO] Dataset size after balancing and deduplication: {X_balanced.shape}")
 
-    return X_balanced, y_balanced
-
-def main():
-    print_progress("Starting data acquisition and preprocessing...")
+    return X_balanced, y_balanced, None
 
+def load_and_clean_data():
+    """
+    Loads the raw CSV files, cleans them and encodes the labels.
+    """
     # Load data
     data = load_data()
     if data is None:
-        print("Data loading failed. Exiting.")
-        return
+        raise FileNotFoundError("No data loaded. Please check the CSV files and paths.")
 
     # Standardize column names to remove leading/trailing whitespace
     data.columns = data.columns.str.strip()
 
-    # Debug: Check column names in the raw dataset
-    # print("[DEBUG] Columns in the raw dataset after standardization:", data.columns)
-
     # Ensure the 'Label' column exists
     if 'Label' not in data.columns:
         raise KeyError("'Label' column not found in the dataset. Check the dataset for correctness.")
 
-    # Visualize class distribution before feature selection
-    plot_class_distribution(
-        data['Label'], 
-        'Class Distribution Before Feature Selection', 
-        'class_distribution_before_feature_selection.png'
-    )
+    data = clean_data(data)
+    print_progress(f"Data size after cleaning: {data.shape}")
 
-    # Preprocess data and select top N features
-    X_preprocessed, y = preprocess_data(data)
+    data = encode_labels(data)
+    print_progress(f"Data size after encoding labels: {data.shape}")
 
-    # Debug: Check for NaN values before splitting
-    # print("[DEBUG] Checking for NaN values before splitting:")
-    # print(f"NaN values in X_preprocessed: {X_preprocessed.isnull().sum().sum()}")
-    # print(f"NaN values in y: {y.isnull().sum()}")
+    return {'data': data.reset_index(drop=True)}
+
+def split_and_balance_data(data):
+    """
+    Selects the top N features, removes duplicates, splits the data into training and testing sets
+    and balances the training set.
+    """
+    # Preprocess data and select top N features
+    X_preprocessed, y = select_features(data)
 
     # Ensure alignment between X and y
     X_preprocessed = X_preprocessed.reset_index(drop=True)
     y = y.reset_index(drop=True)
 
     # Remove duplicates after feature selection
-    X_preprocessed, y = remove_duplicates_after_feature_selection(X_preprocessed, y)
+    X_preprocessed, y, feature_hashes = remove_duplicates_after_feature_selection(X_preprocessed, y)
 
     # Split data into training and testing sets (20% testing and 80% training)
     from sklearn.model_selection import train_test_split
@@ -119,13 +117,6 @@ def main():
         X_preprocessed, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y
     )
 
-    # Debug: Check for NaN values after splitting
-    # print("[DEBUG] Checking for NaN values after splitting:")
-    # print(f"NaN values in X_train: {X_train.isnull().sum().sum()}")
-    # print(f"NaN values in y_train: {y_train.isnull().sum()}")
-    # print(f"NaN values in X_test: {X_test.isnull().sum().sum()}")
-    # print(f"NaN values in y_test: {y_test.isnull()}")
-
     # Assert no NaN values are present
     assert not X_train.isnull().values.any(), "X_train contains NaN values!"
     assert not y_train.isnull().values.any(), "y_train contains NaN values!"
@@ -140,7 +131,7 @@ def main():
     )
 
     # Balance only the training data
-    X_train_balanced, y_train_balanced = balance_data_with_debug(X_train, y_train)
+    X_train_balanced, y_train_balanced, sample_weight = balance_data_with_debug(X_train, y_train, feature_hashes)
 
     # Visualize class distribution after SMOTE
     plot_class_distribution(
@@ -150,31 +141,66 @@ def main():
     )
 
     # Combine features and target for training data
-    preprocessed_data_train = X_train_balanced.copy()
-    preprocessed_data_train['Attack'] = y_train_balanced
+    preprocessed_data_train = X_train_balanced.assign(Attack=y_train_balanced.to_numpy())
+    if sample_weight is not None:
+        preprocessed_data_train['Sample_Weight'] = sample_weight
 
     # Combine features and target for testing data
-    preprocessed_data_test = X_test.copy()
-    preprocessed_data_test['Attack'] = y_test
+    preprocessed_data_test = X_test.assign(Attack=y_test.to_numpy())
+
+    return {'train': preprocessed_data_train, 'test': preprocessed_data_test}
+
+def main():
+    print_progress("Starting data acquisition and preprocessing...")
+
+    # Each stage is cached under a key built from its inputs and the configuration it depends on,
+    # so a rerun with unchanged CSV files and settings loads the stage instead of recomputing it
+    file_paths = [os.path.join(DATASET_DIR, file_name) for file_name in CSV_FILES if os.path.exists(os.path.join(DATASET_DIR, file_name))]
+    if not file_paths:
+        print("Data loading failed. Exiting.")
+        return
+
+    cleaned_key = stage_key(
+        'cleaned',
+        [file_hash(file_path) for file_path in file_paths],
+        {'attack_types': ATTACK_TYPES, 'label_column': LABEL_COLUMN, 'column_dtypes': COLUMN_DTYPES}
+    )
+    data = cached_stage('cleaned', cleaned_key, load_and_clean_data)[0]['data']
+
+    # Visualize class distribution before feature selection
+    plot_class_distribution(
+        data['Attack'], 
+        'Class Distribution Before Feature Selection', 
+        'class_distribution_before_feature_selection.png'
+    )
+
+    split_key = stage_key('split', [cleaned_key], {
+        'num_top_features': NUM_TOP_FEATURES, 'random_state': RANDOM_STATE, 'balance_strategy': BALANCE_STRATEGY,
+        'neighbors_backend': NEIGHBORS_BACKEND, 'smote_k_neighbors': SMOTE_K_NEIGHBORS, 'smote_chunk_size': SMOTE_CHUNK_SIZE
+    })
+    split_data, split_cached = cached_stage('split', split_key, lambda: split_and_balance_data(data))
+    preprocessed_data_train = split_data['train']
+    preprocessed_data_test = split_data['test']
 
     # Debug: Check if the number of columns matches between train and test datasets
     print("[DEBUG] Checking the number of columns in train and test datasets:")
     print(f"Number of columns in training data: {preprocessed_data_train.shape[1]}")
     print(f"Number of columns in testing data: {preprocessed_data_test.shape[1]}")
 
-    # Assert the number of columns match between train and test datasets
-    assert preprocessed_data_train.shape[1] == preprocessed_data_test.shape[1], \
+    # Assert the number of columns match between train and test datasets, apart from the training sample weights
+    assert preprocessed_data_train.columns.drop('Sample_Weight', errors='ignore').equals(preprocessed_data_test.columns), \
         "Mismatch in the number of columns between training and testing datasets!"
 
-    # Save preprocessed training and testing data to CSV
+    # Save preprocessed training and testing data as CSV and Parquet, which the model training scripts
+    # read in place of the CSV files. The slower CSV copies are only rewritten when the split changed
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
     output_file_train = os.path.join(OUTPUT_DIR, 'all_attacks_28features_preprocessed_cicids2017_train.csv')
     output_file_test = os.path.join(OUTPUT_DIR, 'all_attacks_28features_preprocessed_cicids2017_test.csv')
 
-    preprocessed_data_train.to_csv(output_file_train, index=False)
-    preprocessed_data_test.to_csv(output_file_test, index=False)
+    for output_file, preprocessed_data in ((output_file_train, preprocessed_data_train), (output_file_test, preprocessed_data_test)):
+        write_output(preprocessed_data, output_file, split_key, write_csv=not split_cached)
 
     print_progress(f"Cleaned and Preprocessed training data saved to {output_file_train}")
     print_progress(f"Cleaned testing data saved to {output_file_test}")
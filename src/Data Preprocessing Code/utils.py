@@ -1,7 +1,34 @@
 # utils.py
 
+import numpy as np
+import pandas as pd
+
+HASH_MULTIPLIER = 0x100000001B3  # Mixes the label hash into the feature hash of each row
+
 def print_progress(message):
     """
     Prints a progress message.
     """
     print(f"[INFO] {message}")
+
+def hash_rows(X, y=None, hashes=None):
+    """
+    Hashes every row of X into one uint64, returned as a Series indexed like X. Pass y to include the
+    label in the hash. Pass `hashes` (an earlier hash_rows(X) result for the same columns) to reuse the
+    feature hashes of the rows of X instead of hashing X again.
+    Rows are compared by hash only, so two different rows are merged only on a 64-bit collision.
+    """
+    if hashes is None:
+        hashes = pd.util.hash_pandas_object(X, index=False)
+    else:
+        hashes = hashes.loc[X.index]
+    if y is not None:
+        label_hashes = pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy()
+        hashes = pd.Series(hashes.to_numpy() * np.uint64(HASH_MULTIPLIER) ^ label_hashes, index=hashes.index)
+    return hashes
+
+def duplicated_rows(hashes):
+    """
+    Returns a boolean mask of the rows whose hash appeared in an earlier row, like DataFrame.duplicated().
+    """
+    return pd.Series(hashes.to_numpy()).duplicated().to_numpy()
@@ -0,0 +1,174 @@
+import atexit
+import csv
+import gzip
+import json
+import os
+
+from collections import deque
+from datetime import date, datetime
+from threading import Condition, Lock, Thread
+from src.data_models.alert import Alert
+
+ALERT_LOG_BUFFER_SIZE = 100_000 # Alerts held in memory before the oldest are dropped
+ALERT_LOG_BATCH_SIZE = 1_000 # Buffered alerts that trigger a flush before the flush interval
+ALERT_LOG_FLUSH_INTERVAL = 1 # Maximum seconds an alert waits in the buffer
+ALERT_LOG_MAX_BYTES = 100_000_000 # File size after which the log is rotated, 0 to rotate by day only
+ALERT_LOG_FIELDS = ["timestamp", "attack_probability", "source_ip", "destination_ip", "source_port", "destination_port", "first_packet_timestamp", "last_packet_timestamp"]
+
+class AlertLogWriter:
+    """Buffered alert log written by a background thread. The format follows the file name: .csv, .jsonl or
+    .parquet, with .gz compressing CSV and JSONL. Files are rotated when they reach max_bytes or the day changes,
+    by renaming them to <name>.<date>.<n><extension>.
+    """
+    def __init__(self, path: str, max_bytes: int=ALERT_LOG_MAX_BYTES, rotate_daily: bool=True, buffer_size: int=ALERT_LOG_BUFFER_SIZE, batch_size: int=ALERT_LOG_BATCH_SIZE, flush_interval: float=ALERT_LOG_FLUSH_INTERVAL):
+        self.path = path
+        self._compressed = path.endswith(".gz")
+        self._root, self._extension = os.path.splitext(path[:-3] if self._compressed else path)
+        if self._compressed:
+            self._extension += ".gz"
+
+        if self._extension == ".parquet":
+            import pyarrow # Optional dependency, only needed for Parquet alert logs
+            import pyarrow.parquet
+            self._pyarrow = pyarrow
+            self._schema = pyarrow.schema([
+                ("timestamp", pyarrow.timestamp("us")),
+                ("attack_probability", pyarrow.float64()),
+                ("source_ip", pyarrow.string()),
+                ("destination_ip", pyarrow.string()),
+                ("source_port", pyarrow.int32()),
+                ("destination_port", pyarrow.int32()),
+                ("first_packet_timestamp", pyarrow.int64()),
+                ("last_packet_timestamp", pyarrow.int64())
+            ])
+        elif self._extension == ".parquet.gz":
+            raise ValueError("Parquet alert logs are compressed internally, remove the .gz extension")
+
+        self._max_bytes = max_bytes
+        self._rotate_daily = rotate_daily
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        self._buffer = deque(maxlen=buffer_size)
+        self._dropped_alerts = 0
+        self._condition = Condition()
+        self._closed = False
+
+        self._write_lock = Lock() # Serializes flushes from the writer thread and callers of flush()
+        self._file = None
+        self._file_date = None
+
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _record(self, alert: Alert) -> dict:
+        return dict(zip(ALERT_LOG_FIELDS, [alert.timestamp, alert.attack_probability] + alert.flow.to_csv()))
+
+    def _open(self):
+        if self._extension == ".parquet":
+            if os.path.exists(self.path):
+                self._rotate() # Parquet files cannot be appended to
+            self._file = self._pyarrow.parquet.ParquetWriter(self.path, self._schema)
+            self._file_date = date.today()
+            return
+
+        self._file_date = date.fromtimestamp(os.path.getmtime(self.path)) if os.path.exists(self.path) else date.today()
+        if self._compressed:
+            self._file = gzip.open(self.path, mode="at", newline="")
+        else:
+            self._file = open(self.path, mode="a", newline="")
+
+    def _rotate(self):
+        """Close the current file and move it aside, so the next batch starts a new file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        file_date = self._file_date or date.fromtimestamp(os.path.getmtime(self.path))
+        index = 0
+        while os.path.exists(rotated_path := f"{self._root}.{file_date.isoformat()}.{index}{self._extension}"):
+            index += 1
+        os.replace(self.path, rotated_path)
+
+    def _write_batch(self, alerts: list[Alert]):
+        if self._file is None:
+            self._open()
+        elif (self._rotate_daily and self._file_date != date.today()) or (self._max_bytes and os.path.getsize(self.path) >= self._max_bytes):
+            self._rotate()
+            self._open()
+
+        if self._extension == ".parquet":
+            self._file.write_table(self._pyarrow.Table.from_pylist([self._record(alert) for alert in alerts], schema=self._schema))
+            return
+        if self._extension.startswith(".jsonl"):
+            self._file.writelines(json.dumps(self._record(alert), default=datetime.isoformat) + "\n" for alert in alerts)
+        else:
+            csv.writer(self._file).writerows(alert.to_csv() for alert in alerts)
+        self._file.flush() # Readable on disk, and counted by the size check, once the batch is written
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._buffer) < self._batch_size:
+                    self._condition.wait(self._flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def write(self, alert: Alert):
+        """Buffer an alert for the writer thread, dropping the oldest buffered alert if the buffer is full
+
+        Args:
+            alert (Alert): Alert to log
+        """
+        with self._condition:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped_alerts += 1
+            self._buffer.append(alert)
+            if len(self._buffer) >= self._batch_size:
+                self._condition.notify()
+
+    def flush(self):
+        """Write every buffered alert"""
+        with self._write_lock:
+            with self._condition:
+                alerts = list(self._buffer)
+                self._buffer.clear()
+                dropped_alerts, self._dropped_alerts = self._dropped_alerts, 0
+
+            if dropped_alerts:
+                print(f"Error: alert log buffer full, {dropped_alerts} alerts were not logged")
+            if not alerts:
+                return
+            try:
+                self._write_batch(alerts)
+            except Exception as e:
+                # Any error is logged rather than raised, so the writer thread keeps running
+                print(f"Error: could not write alert log {self.path}: {e!r}")
+                self._discard_file()
+
+    def _discard_file(self):
+        """Close the current file after a failed write, so the next batch reopens it"""
+        file, self._file = self._file, None
+        if file is not None:
+            try:
+                file.close()
+            except Exception as e:
+                print(f"Error: could not close alert log {self.path}: {e!r}")
+
+    def close(self):
+        """Write every buffered alert, stop the writer thread and close the file"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        atexit.unregister(self.close)
@@ -0,0 +1,130 @@
+from collections import OrderedDict, deque
+from dataclasses import replace
+from datetime import datetime
+from time import time_ns
+from src.alert_log import AlertLogWriter
+from src.data_models.alert import Alert
+from src.data_models.alert_group import AlertGroup
+from src.data_models.flow import Flow
+
+ALERT_DEDUP_WINDOW = 300_000_000 # Microseconds during which repeated alerts for the same flow are suppressed
+ALERT_GROUP_WINDOW = 60_000_000 # Microseconds without alerts after which a destination's alert group is closed
+ALERT_RATE_LIMIT = 10 # Alerts raised per source IP in each rate limit period, further alerts are only counted
+ALERT_RATE_PERIOD = 60_000_000 # Rate limit period in microseconds
+MAX_CLOSED_ALERT_GROUPS = 100 # Closed alert groups kept for the summary view
+
+class AlertManager:
+    """The AlertManager class is responsible for turning signals into alerts: deduplicating them by flow,
+    rate limiting them per source IP, grouping them by destination and passing them to the display and alert log
+    """
+    def __init__(self, display_gui, dedup_window: int=ALERT_DEDUP_WINDOW, group_window: int=ALERT_GROUP_WINDOW, rate_limit: int=ALERT_RATE_LIMIT, rate_period: int=ALERT_RATE_PERIOD):
+        self._display_gui = display_gui
+        self._dedup_window = dedup_window
+        self._group_window = group_window
+        self._rate_limit = rate_limit
+        self._rate_period = rate_period
+        self._recent_flows = OrderedDict() # Flow key to last alert time, ordered from oldest to newest alert
+        self._alerted_scores = OrderedDict() # Flow key to (last seen time, score identity) of flows over the threshold, ordered by last seen
+        self._source_rates = OrderedDict() # Source IP to (period start, alerts raised), ordered by period start
+        self._open_groups = OrderedDict() # (destination IP, destination port) to group, ordered by last alert
+        self._closed_groups = deque(maxlen=MAX_CLOSED_ALERT_GROUPS)
+        self._alert_log = None
+
+    def _log_alert(self, alert: Alert, output_path: str):
+        if output_path == "":
+            return # Don't attempt to log outputs if an output path isn't set
+
+        if self._alert_log is None or self._alert_log.path != output_path:
+            if self._alert_log is not None:
+                self._alert_log.close() # The output path was changed in the settings
+            self._alert_log = AlertLogWriter(output_path)
+        self._alert_log.write(alert)
+
+    def _expire(self, current_time: int):
+        """Forget deduplication entries, rate limit periods and open groups that have aged out"""
+        while self._recent_flows and current_time - next(iter(self._recent_flows.values())) >= self._dedup_window:
+            self._recent_flows.popitem(last=False)
+        while self._alerted_scores and current_time - next(iter(self._alerted_scores.values()))[0] >= self._dedup_window:
+            self._alerted_scores.popitem(last=False)
+        while self._source_rates and current_time - next(iter(self._source_rates.values()))[0] >= self._rate_period:
+            self._source_rates.popitem(last=False)
+        while self._open_groups and current_time - next(iter(self._open_groups.values())).last_seen >= self._group_window:
+            self._closed_groups.append(self._open_groups.popitem(last=False)[1])
+
+    def _within_rate_limit(self, source_ip: str, current_time: int) -> bool:
+        period_start, alerts = self._source_rates.get(source_ip, (current_time, 0))
+        if alerts >= self._rate_limit:
+            return False
+        self._source_rates[source_ip] = (period_start, alerts + 1)
+        return True
+
+    def _group(self, flow: Flow, attack_probability: float, current_time: int) -> AlertGroup:
+        key = (flow.destination_ip, flow.destination_port)
+        group = self._open_groups.pop(key, None)
+        if group is None:
+            group = AlertGroup(flow.destination_ip, flow.destination_port, current_time, current_time)
+        self._open_groups[key] = group # Moved to the end, as the most recently alerted group
+
+        group.last_seen = current_time
+        group.alerts += 1
+        group.max_attack_probability = max(group.max_attack_probability, attack_probability)
+        group.source_ips.add(flow.source_ip)
+        return group
+
+    def add_alerts(self, flows: list[tuple], current_time: int=None) -> int:
+        """Raise alerts for flows over the attack probability threshold. A flow whose score is unchanged since it
+        was last passed in, such as an idle flow seen again by an interval scan, is not an alert. Every other alert
+        is counted in its group, but only alerts for flows that have not alerted within the deduplication window,
+        and whose source is within its rate limit, are shown and logged individually.
+
+        Args:
+            flows (list[tuple]): (flow, attack probability) pairs over the threshold
+            current_time (int, optional): Current time in microseconds. Defaults to the wall clock.
+
+        Returns:
+            int: Number of alerts raised individually
+        """
+        if current_time is None:
+            current_time = time_ns() // 1_000
+        self._expire(current_time)
+
+        output_path = self._display_gui.get_settings()["alert_log_output_path"]
+        raised = 0
+        for flow, attack_probability in flows:
+            flow_key = (flow.protocol, flow.source_ip, flow.destination_ip, flow.source_port, flow.destination_port)
+
+            # A flow is identified by its key and start time, and its score by the flow and model versions scored
+            score = (flow.first_packet_timestamp, flow.scored_version, flow.scored_model_version)
+            previous = self._alerted_scores.pop(flow_key, None)
+            self._alerted_scores[flow_key] = (current_time, score)
+            if previous is not None and previous[1] == score:
+                continue
+
+            group = self._group(flow, attack_probability, current_time)
+            if flow_key in self._recent_flows or not self._within_rate_limit(flow.source_ip, current_time):
+                group.suppressed += 1
+                continue
+
+            self._recent_flows[flow_key] = current_time
+            self._display_gui.alert_generated(flow, attack_probability)
+            self._log_alert(Alert(datetime.now(), attack_probability, flow), output_path)
+            raised += 1
+
+        if flows:
+            self._display_gui.update_alert_groups(self.get_alert_groups())
+        return raised
+
+    def get_alert_groups(self) -> list[AlertGroup]:
+        """Get a summary of recent alerts
+
+        Returns:
+            list[AlertGroup]: Copies of the open and recently closed alert groups, most recent first
+        """
+        groups = list(self._closed_groups) + list(self._open_groups.values())
+        return [replace(group, source_ips=set(group.source_ips)) for group in reversed(groups)]
+
+    def close(self):
+        """Write any buffered alerts and close the alert log"""
+        if self._alert_log is not None:
+            self._alert_log.close()
+            self._alert_log = None
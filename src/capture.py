@@ -0,0 +1,74 @@
+import socket
+import struct
+from scapy.all import sniff
+from src.flow_manager import FlowManager
+from src.data_models.timestamp_source import TimestampSource
+
+ETH_P_IP = 0x0800
+MAX_FRAME_SIZE = 65_535
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35) # Linux value, not exported by every Python build
+
+_TIMESPEC = struct.Struct("@qq")
+
+def capture_time(packet) -> int:
+    """Get the capture timestamp scapy recorded for a packet
+
+    Args:
+        packet (_type_): Packet from scapy, either sniffed or read from a capture file
+
+    Returns:
+        int: Capture timestamp in microseconds
+    """
+    return round(packet.time * 1_000_000)
+
+def sniff_packets(flow_manager: FlowManager, interface: str=None, timestamp_source: TimestampSource=TimestampSource.CAPTURE):
+    """Capture IPv4 packets with scapy, fully dissecting each packet
+
+    Args:
+        flow_manager (FlowManager): Flow manager receiving the packets
+        interface (str, optional): Interface to capture on. Defaults to scapy's default interface.
+        timestamp_source (TimestampSource, optional): Source of packet arrival times. Defaults to the kernel
+            timestamp scapy reads from the capture socket.
+    """
+    if timestamp_source == TimestampSource.CAPTURE:
+        callback = lambda packet: flow_manager.packet_callback(packet, capture_time(packet))
+    else:
+        callback = flow_manager.packet_callback
+    sniff(filter="ip", prn=callback, store=False, iface=interface)
+
+def sniff_raw_packets(flow_manager: FlowManager, interface: str=None, timestamp_source: TimestampSource=TimestampSource.CAPTURE):
+    """Capture IPv4 frames from an AF_PACKET socket and decode only the header fields needed for flows. Linux
+    only, and requires CAP_NET_RAW.
+
+    Args:
+        flow_manager (FlowManager): Flow manager receiving the frames
+        interface (str, optional): Interface to capture on. Defaults to all interfaces.
+        timestamp_source (TimestampSource, optional): Source of packet arrival times. Defaults to the kernel
+            receive timestamp (SO_TIMESTAMPNS).
+    """
+    with socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_IP)) as raw_socket:
+        if interface:
+            raw_socket.bind((interface, ETH_P_IP))
+
+        buffer = bytearray(MAX_FRAME_SIZE)
+        view = memoryview(buffer)
+        if timestamp_source == TimestampSource.WALL_CLOCK:
+            while True:
+                frame_length = raw_socket.recv_into(buffer)
+                flow_manager.raw_packet_callback(view[:frame_length])
+
+        raw_socket.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+        ancillary_size = socket.CMSG_SPACE(_TIMESPEC.size)
+        while True:
+            frame_length, ancillary_data, _, _ = raw_socket.recvmsg_into([buffer], ancillary_size)
+            arrival_time = None # Falls back to the wall clock if the kernel did not attach a timestamp
+            for level, message_type, data in ancillary_data:
+                if level == socket.SOL_SOCKET and message_type == SO_TIMESTAMPNS:
+                    seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+                    arrival_time = seconds * 1_000_000 + nanoseconds // 1_000
+            flow_manager.raw_packet_callback(view[:frame_length], arrival_time)
+
+CAPTURE_BACKENDS = {
+    "scapy": sniff_packets,
+    "raw": sniff_raw_packets
+}
@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import joblib
+import numpy as np
+
+from threading import Lock, Thread
+from sklearn.ensemble import RandomForestClassifier
+
+PAIRS_PER_GROUP = 65_536 # (row, tree) pairs walked together, trading per-step overhead against cache locality
+STEPS_PER_CHECK = 4 # Levels walked between dropping the pairs that reached a leaf
+SKLEARN_BATCH_SIZE = 500 # Batches at least this large are scored by sklearn, whose compiled traversal wins once its per-call overhead is amortized
+COMPILED_FOREST_FORMAT = 1 # Version of the saved array layout
+COMPILED_FOREST_ARRAYS = ["roots", "features", "thresholds", "is_leaf", "children", "leaf_probabilities"]
+
+class CompiledForest:
+    """Random forest flattened into NumPy node arrays, scored by walking every (row, tree) pair down one level
+    per step. Gives the same probabilities as RandomForestClassifier.predict_proba without its per-call overhead.
+
+    Args:
+        model (RandomForestClassifier): Trained forest
+        sklearn_batch_size (int, optional): Batches at least this large are scored by the original model, None to
+            score every batch with the compiled traversal. Defaults to SKLEARN_BATCH_SIZE.
+    """
+    def __init__(self, model: RandomForestClassifier, sklearn_batch_size: int=SKLEARN_BATCH_SIZE):
+        self._model = model
+        self.sklearn_batch_size = sklearn_batch_size
+        self._source_model = None
+        self._source_model_lock = Lock()
+        self._source_model_loader = None
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        node_counts = [tree.node_count for tree in trees]
+        self.roots = np.cumsum([0] + node_counts[:-1]).astype(np.int64)
+        self.n_trees = len(trees)
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.feature_names_in_ = getattr(model, "feature_names_in_", None)
+
+        self.features = np.concatenate([tree.feature for tree in trees]).astype(np.int64)
+        self.thresholds = np.concatenate([tree.threshold for tree in trees])
+        self.is_leaf = np.concatenate([tree.children_left for tree in trees]) == -1
+
+        # Children of node i are at 2i (left) and 2i + 1 (right), so one gather finds the next node
+        self.children = np.empty(2 * len(self.features), dtype=np.int64)
+        self.children[0::2] = np.concatenate([tree.children_left + root for tree, root in zip(trees, self.roots)])
+        self.children[1::2] = np.concatenate([tree.children_right + root for tree, root in zip(trees, self.roots)])
+
+        # Leaves lead back to themselves, so pairs can keep stepping between the checks for finished pairs
+        leaves = np.flatnonzero(self.is_leaf)
+        self.children[2 * leaves] = leaves
+        self.children[2 * leaves + 1] = leaves
+        self.features[leaves] = 0
+        self.thresholds[leaves] = np.inf
+
+        # Normalized like DecisionTreeClassifier.predict_proba
+        values = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        normalizer = values.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        self.leaf_probabilities = values / normalizer
+
+    def save(self, directory: str, source_model_path: str=None):
+        """Save the node arrays as uncompressed .npy files, which load() can memory-map. Files are written under
+        temporary names and renamed into place with the metadata last, so a directory can be overwritten while a
+        running process has it mapped or is watching it.
+
+        Args:
+            directory (str): Output directory, created if needed
+            source_model_path (str, optional): Pickle the forest was compiled from, recorded with its SHA-256 so a
+                forest loaded with load_source_model can hand large batches to it. Defaults to None.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in COMPILED_FOREST_ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            with open(f"{path}.tmp", "wb") as array_file:
+                np.save(array_file, getattr(self, name))
+            os.replace(f"{path}.tmp", path) # A new file, so existing mappings keep the old arrays
+        metadata = {
+            "format": COMPILED_FOREST_FORMAT,
+            "n_trees": self.n_trees,
+            "max_depth": int(self.max_depth),
+            "n_features_in": int(self.n_features_in_),
+            "classes": self.classes_.tolist(),
+            "feature_names": None if self.feature_names_in_ is None else list(self.feature_names_in_),
+            "source_model": None
+        }
+        if source_model_path is not None:
+            with open(source_model_path, "rb") as model_file:
+                sha256 = hashlib.sha256(model_file.read()).hexdigest()
+            metadata["source_model"] = {"path": os.path.relpath(source_model_path, directory), "sha256": sha256}
+        metadata_path = os.path.join(directory, "metadata.json")
+        with open(f"{metadata_path}.tmp", "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str="r", load_source_model: bool=False) -> "CompiledForest":
+        """Load a forest saved by save(). With mmap_mode, the node arrays are mapped rather than read, so loading
+        takes milliseconds and processes loading the same files share one copy in the page cache.
+
+        Args:
+            directory (str): Directory written by save()
+            mmap_mode (str, optional): numpy memory-map mode, or None to read the arrays into memory. Defaults to "r".
+            load_source_model (bool, optional): Load the pickle the forest was compiled from, if recorded, on the
+                first large batch and hand large batches to it. The process then holds its own unpickled copy of the
+                forest on top of the shared arrays. Defaults to False, scoring every batch with the compiled traversal.
+
+        Returns:
+            CompiledForest: Loaded forest
+        """
+        with open(os.path.join(directory, "metadata.json")) as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata.get("format") != COMPILED_FOREST_FORMAT:
+            raise ValueError(f"Unsupported compiled forest format {metadata.get('format')} in {directory}")
+
+        forest = cls.__new__(cls)
+        forest._model = None
+        forest.sklearn_batch_size = SKLEARN_BATCH_SIZE
+        source_model = metadata.get("source_model") if load_source_model else None
+        forest._source_model = None if source_model is None else {**source_model, "path": os.path.join(directory, source_model["path"])}
+        forest._source_model_lock = Lock()
+        forest._source_model_loader = None
+        forest.n_trees = metadata["n_trees"]
+        forest.max_depth = metadata["max_depth"]
+        forest.n_features_in_ = metadata["n_features_in"]
+        forest.classes_ = np.array(metadata["classes"])
+        forest.feature_names_in_ = None if metadata["feature_names"] is None else np.array(metadata["feature_names"], dtype=object)
+        for name in COMPILED_FOREST_ARRAYS:
+            # A plain ndarray view of the mapping, so indexing results are not wrapped as memmaps
+            setattr(forest, name, np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)))
+        return forest
+
+    def _load_source_model(self):
+        """Unpickle the model the forest was compiled from, if it is unchanged since compiling"""
+        path = self._source_model["path"]
+        try:
+            with open(path, "rb") as model_file:
+                pickled_model = model_file.read()
+            if hashlib.sha256(pickled_model).hexdigest() != self._source_model["sha256"]:
+                raise ValueError("it changed since the forest was compiled")
+            self._model = joblib.load(io.BytesIO(pickled_model))
+        except Exception as e:
+            print(f"Error: not scoring large batches with {path}: {e}")
+
+    def _large_batch_model(self) -> RandomForestClassifier:
+        """Get the sklearn model for large batches. A forest loaded with load_source_model loads its source pickle
+        in the background on the first large batch, which uses the compiled traversal meanwhile.
+
+        Returns:
+            RandomForestClassifier: Original model, or None while it is not loaded
+        """
+        if self._model is None and self._source_model is not None:
+            with self._source_model_lock:
+                if self._source_model_loader is None:
+                    self._source_model_loader = Thread(target=self._load_source_model, daemon=True)
+                    self._source_model_loader.start()
+        return self._model
+
+    def _validate(self, input_vectors) -> np.ndarray:
+        columns = getattr(input_vectors, "columns", None)
+        if columns is not None and self.feature_names_in_ is not None and list(columns) != list(self.feature_names_in_):
+            raise ValueError("The feature names should match those that were passed during fit")
+
+        # sklearn scores float32 inputs against float64 thresholds
+        input_matrix = np.asarray(input_vectors, dtype=np.float32).astype(np.float64)
+        if input_matrix.ndim != 2 or input_matrix.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got input of shape {input_matrix.shape}")
+        return input_matrix
+
+    def apply(self, input_vectors) -> np.ndarray:
+        """Find the leaf each row reaches in each tree
+
+        Args:
+            input_vectors (np.ndarray | pd.DataFrame): Input rows
+
+        Returns:
+            np.ndarray: Flattened leaf node index, one row per input row and one column per tree
+        """
+        input_matrix = self._validate(input_vectors)
+        flat_input = input_matrix.ravel()
+        leaves = np.empty((len(input_matrix), self.n_trees), dtype=np.int64)
+
+        # Trees are walked in groups, so the nodes being gathered from stay small enough to be cached
+        trees_per_group = max(1, min(self.n_trees, PAIRS_PER_GROUP // max(1, len(input_matrix))))
+        for first_tree in range(0, self.n_trees, trees_per_group):
+            group_trees = min(trees_per_group, self.n_trees - first_tree)
+            group_leaves = np.broadcast_to(self.roots[first_tree:first_tree + group_trees], (len(input_matrix), group_trees)).ravel()
+
+            # Walk the (row, tree) pairs still at internal nodes, dropping pairs as they reach a leaf
+            pairs = np.flatnonzero(~self.is_leaf[group_leaves])
+            group_leaves = group_leaves.copy()
+            nodes = group_leaves[pairs]
+            row_offsets = pairs // group_trees * self.n_features_in_
+            while len(pairs):
+                for _ in range(STEPS_PER_CHECK):
+                    go_right = flat_input[row_offsets + self.features[nodes]] > self.thresholds[nodes]
+                    nodes = self.children[2 * nodes + go_right]
+                reached_leaf = self.is_leaf[nodes]
+                group_leaves[pairs[reached_leaf]] = nodes[reached_leaf]
+                internal = ~reached_leaf
+                pairs, nodes, row_offsets = pairs[internal], nodes[internal], row_offsets[internal]
+
+            leaves[:, first_tree:first_tree + group_trees] = group_leaves.reshape(len(input_matrix), group_trees)
+        return leaves
+
+    def predict_proba(self, input_vectors) -> np.ndarray:
+        """Predict class probabilities, averaged over the trees in the same order as sklearn. Batches of
+        sklearn_batch_size rows or more are passed to the original model when it is available, which a loaded
+        forest only has once it has loaded its source pickle.
+
+        Args:
+            input_vectors (np.ndarray | pd.DataFrame): Input rows
+
+        Returns:
+            np.ndarray: Probability of each class, one row per input row
+        """
+        if self.sklearn_batch_size is not None and len(input_vectors) >= self.sklearn_batch_size:
+            model = self._large_batch_model()
+            if model is not None:
+                return model.predict_proba(input_vectors)
+
+        leaves = self.apply(input_vectors)
+        probabilities = np.zeros((len(leaves), len(self.classes_)))
+        for tree_index in range(self.n_trees):
+            probabilities += self.leaf_probabilities[leaves[:, tree_index]]
+        probabilities /= self.n_trees
+        return probabilities
+
+    def predict(self, input_vectors) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(input_vectors), axis=1)]
+
+def compile_model(model):
+    """Compile a random forest for faster scoring, returning any other model unchanged
+
+    Args:
+        model (_type_): Trained model
+
+    Returns:
+        _type_: CompiledForest, or the model itself if it is not a RandomForestClassifier
+    """
+    if isinstance(model, RandomForestClassifier):
+        return CompiledForest(model)
+    return model
+
+def load_model(path: str, load_source_model: bool=False):
+    """Load a model for scoring: a directory saved by CompiledForest.save() is memory-mapped, any other path is
+    unpickled with joblib and compiled
+
+    Args:
+        path (str): Compiled forest directory or pickled model file
+        load_source_model (bool, optional): Let a compiled forest directory hand large batches to the pickle it was
+            compiled from, see CompiledForest.load(). Defaults to False.
+
+    Returns:
+        _type_: Model with predict_proba
+    """
+    if os.path.isdir(path):
+        return CompiledForest.load(path, load_source_model=load_source_model)
+    return compile_model(joblib.load(path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a pickled random forest into a memory-mappable compiled forest directory")
+    parser.add_argument("model", help="Pickled RandomForestClassifier")
+    parser.add_argument("output", help="Output directory")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    if not isinstance(model, RandomForestClassifier):
+        parser.error(f"{args.model} is not a RandomForestClassifier")
+    CompiledForest(model).save(args.output, source_model_path=args.model)
+    print(f"Saved compiled forest to {args.output}")
+
+if __name__ == "__main__":
+    main()
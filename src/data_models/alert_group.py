@@ -0,0 +1,17 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+@dataclass
+class AlertGroup:
+    """Class for representing the alerts raised against one destination IP and port within a time window"""
+    destination_ip: str
+    destination_port: int
+    first_seen: int
+    last_seen: int
+    alerts: int = 0
+    suppressed: int = 0 # Alerts not raised individually because they were duplicates or over a source's rate limit
+    max_attack_probability: float = 0
+    source_ips: set = field(default_factory=set)
+
+    def __repr__(self):
+        return f"{self.destination_ip}:{self.destination_port} - {self.alerts} alerts ({self.suppressed} suppressed) from {len(self.source_ips)} sources, max attack probability {self.max_attack_probability:.3f}, {datetime.fromtimestamp(self.first_seen / 1000000).strftime('%H:%M:%S')} to {datetime.fromtimestamp(self.last_seen / 1000000).strftime('%H:%M:%S')}"
@@ -1,20 +1,33 @@
-from dataclasses import dataclass
-from src.data_models.flow_packet import FlowPacket
+from dataclasses import dataclass, field
+from src.data_models.flow_packets import FlowPackets
+from src.data_models.flow_statistics import FlowStatistics
 from datetime import datetime
 
 @dataclass
 class Flow:
     """Class for representing a flow"""
-    packets: list[FlowPacket]
+    packets: FlowPackets
     source_ip: str
     destination_ip: str
     source_port: int
     destination_port: int
     first_packet_timestamp: int
     last_packet_timestamp: int
+    statistics: FlowStatistics = field(default_factory=FlowStatistics)
+    version: int = 0 # Incremented for every packet added to the flow
+    scored_version: int = -1 # Version of the flow when it was last scored
+    scored_model_version: int = 0 # Version of the model that last scored the flow
+    feature_vector: list = None # Model input from the last time the flow was scored, None if it had too few packets
+    attack_probability: float = 0 # Probability from the last time the flow was scored
+    unscored_packets: int = 0 # Packets added since the flow was last scored
+    unscored_since: int = None # Arrival time of the first packet added since the flow was last scored
+
+    @property
+    def protocol(self) -> str:
+        return self.packets.protocol
 
     def __repr__(self):
-        return f"Source IP: {self.source_ip}\nDestination IP: {self.destination_ip}\nSource port: {self.source_port}\nDestination port: {self.destination_port}\nFirst packet timestamp: {datetime.fromtimestamp(self.first_packet_timestamp / 1000000).strftime("%Y-%m-%d %H:%M:%S")}\nLast packet timestamp: {datetime.fromtimestamp(self.last_packet_timestamp / 1000000).strftime("%Y-%m-%d %H:%M:%S")}"
+        return f"Source IP: {self.source_ip}\nDestination IP: {self.destination_ip}\nSource port: {self.source_port}\nDestination port: {self.destination_port}\nFirst packet timestamp: {datetime.fromtimestamp(self.first_packet_timestamp / 1000000).strftime('%Y-%m-%d %H:%M:%S')}\nLast packet timestamp: {datetime.fromtimestamp(self.last_packet_timestamp / 1000000).strftime('%Y-%m-%d %H:%M:%S')}"
 
     def to_csv(self):
         return [self.source_ip, self.destination_ip, self.source_port, self.destination_port, self.first_packet_timestamp, self.last_packet_timestamp]
\ No newline at end of file
@@ -18,4 +18,31 @@ class FlowPacket:
     arrival_time: int
     size: int
     segment_size: int
-    flags: set
\ No newline at end of file
+    flags: set
+
+TCP_FLAG_BITS = {"FIN": 0x01, "SYN": 0x02, "RST": 0x04, "PSH": 0x08, "ACK": 0x10, "URG": 0x20, "ECE": 0x40, "CWR": 0x80}
+
+def flags_to_bitmask(flags: set) -> int:
+    """Encode a set of TCP flag names as a bitmask
+
+    Args:
+        flags (set): TCP flag names, such as "PSH"
+
+    Returns:
+        int: Bitmask using the TCP header flag bit positions
+    """
+    bitmask = 0
+    for flag in flags:
+        bitmask |= TCP_FLAG_BITS[flag]
+    return bitmask
+
+def bitmask_to_flags(bitmask: int) -> set:
+    """Decode a TCP flag bitmask into a set of flag names
+
+    Args:
+        bitmask (int): Bitmask using the TCP header flag bit positions
+
+    Returns:
+        set: TCP flag names
+    """
+    return {flag for flag, bit in TCP_FLAG_BITS.items() if bitmask & bit}
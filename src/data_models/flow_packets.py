@@ -0,0 +1,59 @@
+from array import array
+from src.data_models.flow_packet import FlowPacket, Direction, flags_to_bitmask, bitmask_to_flags
+
+class FlowPackets:
+    """Class for compactly storing the packets of a flow in typed columns
+
+    The 5-tuple is stored once for the whole flow, and packets are rebuilt as FlowPacket instances on access, so
+    the functions in src/metrics.py work on it like on a list of packets.
+    """
+    def __init__(self, protocol: str, source_ip: str, destination_ip: str, source_port: int, destination_port: int):
+        self.protocol = protocol
+        self.source_ip = source_ip
+        self.destination_ip = destination_ip
+        self.source_port = source_port
+        self.destination_port = destination_port
+        self.arrival_times = array("q")
+        self.sizes = array("i")
+        self.segment_sizes = array("i")
+        self.directions = array("B")
+        self.flags = array("B")
+
+    def append(self, flow_packet: FlowPacket):
+        self.arrival_times.append(flow_packet.arrival_time)
+        self.sizes.append(flow_packet.size)
+        self.segment_sizes.append(flow_packet.segment_size)
+        self.directions.append(flow_packet.direction.value)
+        self.flags.append(flags_to_bitmask(flow_packet.flags))
+
+    def _packet(self, index: int) -> FlowPacket:
+        direction = Direction(self.directions[index])
+        if direction == Direction.FORWARD:
+            endpoints = (self.source_ip, self.destination_ip, self.source_port, self.destination_port)
+        else:
+            endpoints = (self.destination_ip, self.source_ip, self.destination_port, self.source_port)
+
+        return FlowPacket(
+            self.protocol,
+            direction,
+            *endpoints,
+            self.arrival_times[index],
+            self.sizes[index],
+            self.segment_sizes[index],
+            bitmask_to_flags(self.flags[index])
+        )
+
+    def __len__(self) -> int:
+        return len(self.arrival_times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._packet(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("packet index out of range")
+        return self._packet(index)
+
+    def __iter__(self):
+        return (self._packet(i) for i in range(len(self)))
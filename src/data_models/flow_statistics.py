@@ -0,0 +1,170 @@
+import math
+import sys
+from dataclasses import dataclass, field
+from src.data_models.flow_packet import FlowPacket, Direction
+from src.exceptions.exceptions import TooFewPacketsInFlowException
+
+_SQRT_BIT_WIDTH = 2 * sys.float_info.mant_dig + 3
+
+def _exact_quotient(numerator: int, denominator: int):
+    """Divide two integers the way the statistics module converts exact results (int when integral, otherwise
+    a correctly rounded float)
+    """
+    if numerator % denominator == 0:
+        return numerator // denominator
+    return numerator / denominator
+
+def _integer_sqrt_of_frac_rto(numerator: int, denominator: int) -> int:
+    """Square root of numerator/denominator rounded to the nearest integer using round-to-odd"""
+    root = math.isqrt(numerator // denominator)
+    return root | (root * root * denominator != numerator)
+
+def _float_sqrt_of_frac(numerator: int, denominator: int) -> float:
+    """Correctly rounded square root of numerator/denominator, identical to the conversion in statistics.stdev"""
+    q = (numerator.bit_length() - denominator.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if q >= 0:
+        return float(_integer_sqrt_of_frac_rto(numerator, denominator << 2 * q) << q)
+    return _integer_sqrt_of_frac_rto(numerator << -2 * q, denominator) / (1 << -q)
+
+@dataclass
+class RunningStatistics:
+    """Class for accumulating count, sum, max and sum of squares of an integer stream
+
+    Moments are kept as exact integers so mean, variance and standard deviation match the statistics module
+    without revisiting the underlying values.
+    """
+    count: int = 0
+    total: int = 0
+    sum_of_squares: int = 0
+    maximum: int = None
+
+    def push(self, value: int):
+        self.count += 1
+        self.total += value
+        self.sum_of_squares += value * value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def copy(self) -> "RunningStatistics":
+        return RunningStatistics(self.count, self.total, self.sum_of_squares, self.maximum)
+
+    def mean(self):
+        return _exact_quotient(self.total, self.count)
+
+    def _squared_deviations(self) -> tuple[int, int]:
+        return self.count * self.sum_of_squares - self.total * self.total, self.count * (self.count - 1)
+
+    def variance(self):
+        return _exact_quotient(*self._squared_deviations())
+
+    def stdev(self) -> float:
+        return _float_sqrt_of_frac(*self._squared_deviations())
+
+@dataclass
+class DirectionStatistics:
+    """Class for accumulating the metrics of packets travelling in one direction of a flow"""
+    packet_lengths: RunningStatistics = field(default_factory=RunningStatistics)
+    segment_sizes: RunningStatistics = field(default_factory=RunningStatistics)
+    interarrival_times: RunningStatistics = field(default_factory=RunningStatistics)
+    header_length: int = 0
+    flag_counts: dict = field(default_factory=dict)
+    last_arrival_time: int = None
+
+    def push(self, flow_packet: FlowPacket):
+        self.packet_lengths.push(flow_packet.size)
+        self.segment_sizes.push(flow_packet.segment_size)
+        self.header_length += flow_packet.size - flow_packet.segment_size
+        for flag in flow_packet.flags:
+            self.flag_counts[flag] = self.flag_counts.get(flag, 0) + 1
+
+        if self.last_arrival_time is not None:
+            self.interarrival_times.push(flow_packet.arrival_time - self.last_arrival_time)
+        self.last_arrival_time = flow_packet.arrival_time
+
+    def copy(self) -> "DirectionStatistics":
+        return DirectionStatistics(
+            self.packet_lengths.copy(),
+            self.segment_sizes.copy(),
+            self.interarrival_times.copy(),
+            self.header_length,
+            self.flag_counts.copy(),
+            self.last_arrival_time
+        )
+
+@dataclass
+class FlowStatistics:
+    """Class for incrementally tracking flow metrics as packets arrive
+
+    Each query mirrors the function of the same name in src/metrics.py, including when
+    TooFewPacketsInFlowException is raised, but runs in constant time.
+    """
+    forward: DirectionStatistics = field(default_factory=DirectionStatistics)
+    backward: DirectionStatistics = field(default_factory=DirectionStatistics)
+    bidirectional: DirectionStatistics = field(default_factory=DirectionStatistics)
+
+    def update(self, flow_packet: FlowPacket):
+        """Add a packet to the running statistics
+
+        Args:
+            flow_packet (FlowPacket): Packet appended to the flow
+        """
+        self.bidirectional.push(flow_packet)
+        if flow_packet.direction == Direction.FORWARD:
+            self.forward.push(flow_packet)
+        elif flow_packet.direction == Direction.BACKWARD:
+            self.backward.push(flow_packet)
+
+    def copy(self) -> "FlowStatistics":
+        """Snapshot the statistics so they can be read while packets keep arriving
+
+        Returns:
+            FlowStatistics: Independent copy of the statistics
+        """
+        return FlowStatistics(self.forward.copy(), self.backward.copy(), self.bidirectional.copy())
+
+    def _direction(self, direction: Direction) -> DirectionStatistics:
+        if direction == Direction.FORWARD:
+            return self.forward
+        if direction == Direction.BACKWARD:
+            return self.backward
+        return self.bidirectional
+
+    def packet_length(self, direction: Direction=Direction.BIDIRECTIONAL) -> dict:
+        packet_lengths = self._direction(direction).packet_lengths
+        if packet_lengths.count < 2:
+            raise TooFewPacketsInFlowException()
+
+        return {
+            "sum": packet_lengths.total,
+            "max": packet_lengths.maximum,
+            "mean": packet_lengths.mean(),
+            "variance": packet_lengths.variance(),
+            "stdev": packet_lengths.stdev()
+        }
+
+    def interarrival_time(self, direction: Direction=Direction.BIDIRECTIONAL) -> dict:
+        interarrival_times = self._direction(direction).interarrival_times
+        if interarrival_times.count < 2:
+            raise TooFewPacketsInFlowException()
+
+        return {"mean": interarrival_times.mean(), "stdev": interarrival_times.stdev(), "max": interarrival_times.maximum}
+
+    def segment_size(self, direction: Direction=Direction.BIDIRECTIONAL) -> dict:
+        segment_sizes = self._direction(direction).segment_sizes
+        if segment_sizes.count < 1:
+            raise TooFewPacketsInFlowException()
+
+        return {"mean": segment_sizes.mean()}
+
+    def header_length(self, direction: Direction=Direction.BIDIRECTIONAL) -> int:
+        statistics = self._direction(direction)
+        if statistics.packet_lengths.count < 1:
+            raise TooFewPacketsInFlowException()
+
+        return statistics.header_length
+
+    def flag_count(self, flag: str, direction: Direction=Direction.BIDIRECTIONAL) -> int:
+        return self._direction(direction).flag_counts.get(flag, 0)
+
+    def packet_count(self, direction: Direction=Direction.BIDIRECTIONAL) -> int:
+        return self._direction(direction).packet_lengths.count
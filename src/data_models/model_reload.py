@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+@dataclass
+class ModelReload:
+    """Class for recording a model reload and how long scoring went without a model"""
+    model_path: str
+    requested_at: int # Wall clock time of the reload request in microseconds
+    load_time: int = 0 # Microseconds spent loading and validating the model
+    swap_latency: int = None # Microseconds from the request until the new model was live, None if it was rejected
+    scoring_gap: int = None # Microseconds between the last scoring pass before the swap and the first pass with the new model
+    error: str = None # Reason the model was rejected
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"Rejected model {self.model_path}: {self.error}"
+        scoring_gap = "pending" if self.scoring_gap is None else f"{self.scoring_gap / 1000:.1f} ms"
+        return f"Loaded model {self.model_path} in {self.load_time / 1000:.1f} ms, live {self.swap_latency / 1000:.1f} ms after the request, scoring gap {scoring_gap}"
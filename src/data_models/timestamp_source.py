@@ -0,0 +1,6 @@
+from enum import Enum
+
+class TimestampSource(Enum):
+    """Where packet arrival times come from"""
+    CAPTURE = "capture" # Kernel or pcap timestamp recorded when the packet was captured
+    WALL_CLOCK = "wall-clock" # Time at which the packet callback runs
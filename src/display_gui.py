@@ -1,7 +1,17 @@
 import customtkinter
+from datetime import datetime
 from PIL import Image
 from tkinter import messagebox
 from src.data_models.flow import Flow
+from src.data_models.alert_group import AlertGroup
+from src.flow_table import FlowTableModel, SORT_KEYS
+from src.display_queue import DisplayQueue
+from src.settings import DEFAULT_SETTINGS
+
+VISIBLE_ROWS = 20 # Flow table rows rendered at once
+SCROLL_ROWS = 3 # Rows moved per mouse wheel step
+UPDATE_POLL_INTERVAL = 100 # Milliseconds between checks for queued display updates
+ALERT_LOG_LINES = 500 # Alerts kept in the alerts window
 
 class SettingsWindow(customtkinter.CTkToplevel):
     def __init__(self, parent, settings: dict):
@@ -42,13 +52,17 @@ class SettingsWindow(customtkinter.CTkToplevel):
         except ValueError as e:
             print(f"Error: {e}")
 
-class FlowWindow(customtkinter.CTkScrollableFrame):
-    def __init__(self, master, **kwargs):
+class FlowWindow(customtkinter.CTkFrame):
+    """Virtualized flow table: a fixed pool of row widgets shows the visible window of a FlowTableModel, so
+    updating, sorting and scrolling change label text instead of creating or destroying widgets
+    """
+    def __init__(self, master, model: FlowTableModel, visible_rows: int=VISIBLE_ROWS, **kwargs):
         super().__init__(master, **kwargs)
         self.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)  # 5 data columns + 1 button column
 
-        self.row_index = 1  # Start from row 1, row 0 will be header
-        self._flows = {}
+        self._model = model
+        self._visible_rows = visible_rows
+        self._offset = 0  # Index of the first visible row
 
         # Add headers
         headers = ["Source IP", "Destination IP", "Source Port", "Destination Port", "Attack Probability", "Details"]
@@ -56,51 +70,108 @@ class FlowWindow(customtkinter.CTkScrollableFrame):
             header_label = customtkinter.CTkLabel(self, text=header, font=("Helvetica", 12, "bold"))
             header_label.grid(row=0, column=col_index, padx=5, pady=(0, 10), sticky="w")
 
-    def add_flow(self, flow: Flow, attack_probability: str):
-        key = f"{flow.source_ip}:{flow.source_port}->{flow.destination_ip}:{flow.destination_port}"
-        if key in self._flows:
-            # Update button command if flow already exists
-            self._flows[key]["button"].configure(command=lambda: messagebox.showinfo("Flow Info", f"{flow}\nAttack probability: {attack_probability}"))
-            self._flows[key]["attack_label"].configure(text=str(attack_probability))
-        else:
-            # Create and place labels
-            source_ip_label = customtkinter.CTkLabel(self, text=flow.source_ip)
-            destination_ip_label = customtkinter.CTkLabel(self, text=flow.destination_ip)
-            source_port_label = customtkinter.CTkLabel(self, text=str(flow.source_port))
-            destination_port_label = customtkinter.CTkLabel(self, text=str(flow.destination_port))
-            attack_label = customtkinter.CTkLabel(self, text=str(attack_probability))
-
-            source_ip_label.grid(row=self.row_index, column=0, padx=5, pady=2, sticky="w")
-            destination_ip_label.grid(row=self.row_index, column=1, padx=5, pady=2, sticky="w")
-            source_port_label.grid(row=self.row_index, column=2, padx=5, pady=2, sticky="w")
-            destination_port_label.grid(row=self.row_index, column=3, padx=5, pady=2, sticky="w")
-            attack_label.grid(row=self.row_index, column=4, padx=5, pady=2, sticky="w")
+        # Create the row widgets once, they are reused for whichever flows are visible
+        self._row_widgets = []
+        for row_index in range(visible_rows):
+            labels = [customtkinter.CTkLabel(self, text="") for _ in range(5)]
+            for col_index, label in enumerate(labels):
+                label.grid(row=row_index + 1, column=col_index, padx=5, pady=2, sticky="w")
 
             # Add View button
-            button = customtkinter.CTkButton(self, text="View", width=60)
-            button.configure(command=lambda: messagebox.showinfo("Flow Info", f"{flow}\nAttack probability: {attack_probability}"))
-            button.grid(row=self.row_index, column=5, padx=5, pady=2, sticky="w")
-
-            # Save references
-            self._flows[key] = {
-                "button": button,
-                "attack_label": attack_label,
-                "flow": flow
-            }
-
-            self.row_index += 1
-
-    def clear(self):
-        # Clear all flow rows (keep header row)
-        for widget in self.winfo_children():
-            row = widget.grid_info().get("row", None)
-            if row is not None and row != 0:
-                widget.destroy()
-        self._flows.clear()
-        self.row_index = 1
+            button = customtkinter.CTkButton(self, text="View", width=60, command=lambda row_index=row_index: self._show_flow(row_index))
+            button.grid(row=row_index + 1, column=5, padx=5, pady=2, sticky="w")
+            self._row_widgets.append((labels, button))
+
+        self._scrollbar = customtkinter.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=1, column=6, rowspan=visible_rows, sticky="ns")
+
+        for widget in [self] + self.winfo_children():
+            widget.bind("<MouseWheel>", self._on_mouse_wheel)
+            widget.bind("<Button-4>", lambda _: self.scroll(-SCROLL_ROWS))
+            widget.bind("<Button-5>", lambda _: self.scroll(SCROLL_ROWS))
+
+    def _show_flow(self, row_index: int):
+        rows = self._model.rows(self._offset + row_index, 1)
+        if rows:
+            flow, attack_probability = rows[0]
+            messagebox.showinfo("Flow Info", f"{flow}\nAttack probability: {attack_probability}")
+
+    def _on_scrollbar(self, action: str, value, unit: str=None):
+        if action == "moveto":
+            self.scroll_to(round(float(value) * len(self._model)))
+        elif action == "scroll":
+            self.scroll(int(value) * (self._visible_rows if unit == "pages" else SCROLL_ROWS))
+
+    def _on_mouse_wheel(self, event):
+        self.scroll(-SCROLL_ROWS if event.delta > 0 else SCROLL_ROWS)
+
+    def scroll(self, rows: int):
+        self.scroll_to(self._offset + rows)
+
+    def scroll_to(self, offset: int):
+        self._offset = offset
+        self.refresh()
+
+    def refresh(self):
+        """Show the rows of the model in the visible window"""
+        row_count = len(self._model)
+        self._offset = max(0, min(self._offset, row_count - self._visible_rows))
+        rows = self._model.rows(self._offset, self._visible_rows)
+
+        for row_index, (labels, button) in enumerate(self._row_widgets):
+            if row_index < len(rows):
+                flow, attack_probability = rows[row_index]
+                texts = [flow.source_ip, flow.destination_ip, str(flow.source_port), str(flow.destination_port), str(attack_probability)]
+                button.configure(state="normal", text="View")
+            else:
+                texts = [""] * 5
+                button.configure(state="disabled", text="")
+            for label, text in zip(labels, texts):
+                label.configure(text=text)
+
+        if row_count:
+            self._scrollbar.set(self._offset / row_count, min(1, (self._offset + self._visible_rows) / row_count))
+        else:
+            self._scrollbar.set(0, 1)
+
+class AlertsWindow(customtkinter.CTkToplevel):
+    """Non-modal window summarising alerts by destination and listing recent alerts, so showing an alert never
+    blocks the GUI
+    """
+    def __init__(self, parent, alert_groups: list[AlertGroup]):
+        super().__init__(parent)
+        self.title("Alerts")
+        self.geometry("600x450")
+
+        self._summary_label = customtkinter.CTkLabel(self, text="Summary", font=("Helvetica", 12, "bold"))
+        self._summary_label.pack(pady=(10, 0))
+        self._summary_textbox = customtkinter.CTkTextbox(self, height=150, state="disabled")
+        self._summary_textbox.pack(fill="x", padx=10, pady=5)
+
+        self._recent_label = customtkinter.CTkLabel(self, text="Recent alerts", font=("Helvetica", 12, "bold"))
+        self._recent_label.pack(pady=(10, 0))
+        self._textbox = customtkinter.CTkTextbox(self, state="disabled")
+        self._textbox.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+
+        self.set_alert_groups(alert_groups)
+
+    def set_alert_groups(self, alert_groups: list[AlertGroup]):
+        self._summary_textbox.configure(state="normal")
+        self._summary_textbox.delete("1.0", "end")
+        self._summary_textbox.insert("end", "\n".join(str(alert_group) for alert_group in alert_groups))
+        self._summary_textbox.configure(state="disabled")
+
+    def add_alert(self, flow: Flow, attack_probability: float):
+        self._textbox.configure(state="normal")
+        self._textbox.insert("end", f"{datetime.now():%Y-%m-%d %H:%M:%S} DoS attack detected, attack probability {attack_probability}: {flow.source_ip}:{flow.source_port} -> {flow.destination_ip}:{flow.destination_port}\n")
+        line_count = int(self._textbox.index("end-1c").split(".")[0]) - 1
+        if line_count > ALERT_LOG_LINES:
+            self._textbox.delete("1.0", f"{line_count - ALERT_LOG_LINES + 1}.0")
+        self._textbox.see("end")
+        self._textbox.configure(state="disabled")
 
 class DisplayGUI(customtkinter.CTk):
-    def __init__(self):
+    def __init__(self, settings: dict=None):
         super().__init__()
 
         self.title("ML-Powered IDS")
@@ -124,7 +195,9 @@ class DisplayGUI(customtkinter.CTk):
         self._alerts_counter_label.grid(row=1, column=0, pady=(80, 5))
 
         self.settings_button = customtkinter.CTkButton(self, text="Settings", command=self.open_settings)
-        self.settings_button.grid(row=2, column=0, padx=10, pady=10)
+        self.settings_button.grid(row=2, column=0, padx=10, pady=10, sticky="w")
+        self.alerts_button = customtkinter.CTkButton(self, text="Alerts", command=self.open_alerts)
+        self.alerts_button.grid(row=2, column=0, padx=10, pady=10, sticky="e")
 
         self.sort_by_label = customtkinter.CTkLabel(self, text="Sort by:")
         self.sort_by_label.grid(row=3, column=0, pady=(5, 0), sticky="w")
@@ -133,42 +206,68 @@ class DisplayGUI(customtkinter.CTk):
         self.sorting_option = customtkinter.StringVar(value="First Packet Timestamp")
         self.sorting_dropdown = customtkinter.CTkComboBox(
             self,
-            values=["First Packet Timestamp", "Last Packet Timestamp", "Attack Probability"],
+            values=list(SORT_KEYS),
             variable=self.sorting_option,
-            command=self.update_flows
+            command=lambda _: self._show_flows()
         )
         self.sorting_dropdown.grid(row=4, column=0, pady=(5, 0), sticky="w")
 
-        self._flow_window = FlowWindow(master=self, width=500, corner_radius=0)
+        self._flow_table = FlowTableModel(self.sorting_option.get())
+        self._flow_window = FlowWindow(master=self, model=self._flow_table, width=500, corner_radius=0)
         self._flow_window.grid(row=5, column=0, padx=10, pady=10, sticky="nsew")
 
-        self._settings = {"attack_probability_threshold": 0.95, "alert_log_output_path": ""}
-        self._flows_data = []  # Store raw flows to allow re-sorting
-
-    def alert_generated(self, flow: Flow, attack_probability: float):
-        self._alerts += 1
-        self._alerts_counter_label.configure(text=f"Alerts: {self._alerts}")
-        messagebox.showwarning("Alert", f"DoS attack detected\nAttack probability: {attack_probability}\nFlow:\n{flow}")
-
-    def update_flows(self, flows: list[tuple] = None):
+        self._settings = dict(settings or DEFAULT_SETTINGS)
+
+        # Tk is not thread-safe, so other threads queue updates that the main loop applies
+        self._display_queue = DisplayQueue()
+        self._alerts_window = None
+        self._alert_groups = []
+        self._unseen_alerts = 0 # Alerts raised while the user had closed the Alerts window
+        self.after(UPDATE_POLL_INTERVAL, self._apply_queued_updates)
+
+    def _apply_queued_updates(self):
+        flows, alert_groups, alerts, alert_count = self._display_queue.drain()
+        if flows is not None:
+            self._flow_table.set_flows(flows)  # Keep flows in the model to allow re-sorting
+            self._show_flows()
+
+        if alert_groups is not None:
+            self._alert_groups = alert_groups
+            if self._alerts_window is not None and self._alerts_window.winfo_exists():
+                self._alerts_window.set_alert_groups(alert_groups)
+
+        if alert_count:
+            self._alerts += alert_count
+            self._alerts_counter_label.configure(text=f"Alerts: {self._alerts}")
+            if self._alerts_window is None:
+                self.open_alerts() # Only the first alert opens the window, so closing it keeps it closed
+
+            if self._alerts_window.winfo_exists():
+                for flow, attack_probability in alerts:
+                    self._alerts_window.add_alert(flow, attack_probability)
+            else:
+                self._unseen_alerts += alert_count
+                self.alerts_button.configure(text=f"Alerts ({self._unseen_alerts} new)")
+
+        self.after(UPDATE_POLL_INTERVAL, self._apply_queued_updates)
+
+    def _show_flows(self):
         """Sorts and updates the flow display."""
-        if flows:
-            self._flows_data = flows  # Store flows for re-sorting
+        self._active_flows_label.configure(text=f"Active flows: {len(self._flow_table)}")
+        self._flow_table.set_sort(self.sorting_option.get())
+        self._flow_window.refresh()
 
-        self._active_flows_label.configure(text=f"Active flows: {len(self._flows_data)}")
+    def alert_generated(self, flow: Flow, attack_probability: float):
+        """Queue an alert for display. Safe to call from any thread."""
+        self._display_queue.put_alert(flow, attack_probability)
 
-        # Sort flows based on selected option
-        sort_by = self.sorting_option.get()
-        if sort_by == "First Packet Timestamp":
-            self._flows_data.sort(key=lambda f: f[0].first_packet_timestamp)
-        elif sort_by == "Last Packet Timestamp":
-            self._flows_data.sort(key=lambda f: f[0].last_packet_timestamp)
-        elif sort_by == "Attack Probability":
-            self._flows_data.sort(key=lambda f: f[1], reverse=True)  # Highest probability first
+    def update_flows(self, flows: list[tuple]):
+        """Queue a flow table update for display. Safe to call from any thread."""
+        self._display_queue.put_flows(flows)
 
-        self._flow_window.clear()
-        for flow, attack_probability in self._flows_data:
-            self._flow_window.add_flow(flow, attack_probability)
+    def update_alert_groups(self, alert_groups: list[AlertGroup]):
+        """Queue an alert summary update for display. Safe to call from any thread."""
+        self._display_queue.put_alert_groups(alert_groups)
 
     def handle_update_settings(self, settings: dict):
         self._settings = settings
@@ -176,6 +275,12 @@ class DisplayGUI(customtkinter.CTk):
     def get_settings(self) -> dict:
         return self._settings
 
+    def open_alerts(self):
+        if self._alerts_window is None or not self._alerts_window.winfo_exists():
+            self._alerts_window = AlertsWindow(self, self._alert_groups)
+        self._unseen_alerts = 0
+        self.alerts_button.configure(text="Alerts")
+
     def open_settings(self):
         settings_window = SettingsWindow(self, self._settings)
         settings_window.grab_set()
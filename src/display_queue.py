@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from threading import Lock
+
+MAX_PENDING_ALERTS = 1_000 # Alerts held for the display before the oldest are dropped
+
+class DisplayQueue:
+    """Thread-safe hand-off from the detection pipeline to the GUI thread. Updates are merged while they wait:
+    only the latest flow table is kept, and repeated alerts for the same flow keep only the latest probability.
+    """
+    def __init__(self, max_pending_alerts: int=MAX_PENDING_ALERTS):
+        self._lock = Lock()
+        self._flows = None
+        self._alert_groups = None
+        self._alerts = OrderedDict()
+        self._max_pending_alerts = max_pending_alerts
+        self._alert_count = 0
+
+    def put_flows(self, flows: list[tuple]):
+        """Queue a flow table update, replacing any update that has not been displayed yet
+
+        Args:
+            flows (list[tuple]): (flow, attack probability) pairs
+        """
+        with self._lock:
+            self._flows = flows
+
+    def put_alert_groups(self, alert_groups: list):
+        """Queue an alert summary update, replacing any update that has not been displayed yet
+
+        Args:
+            alert_groups (list[AlertGroup]): Recent alert groups, most recent first
+        """
+        with self._lock:
+            self._alert_groups = alert_groups
+
+    def put_alert(self, flow, attack_probability: float):
+        """Queue an alert, merging it with a waiting alert for the same flow
+
+        Args:
+            flow (Flow): Flow that crossed the attack probability threshold
+            attack_probability (float): Attack probability of the flow
+        """
+        key = (flow.source_ip, flow.source_port, flow.destination_ip, flow.destination_port, flow.first_packet_timestamp)
+        with self._lock:
+            self._alert_count += 1
+            self._alerts.pop(key, None)
+            self._alerts[key] = (flow, attack_probability)
+            if len(self._alerts) > self._max_pending_alerts:
+                self._alerts.popitem(last=False)
+
+    def drain(self) -> tuple[list[tuple], list, list[tuple], int]:
+        """Take every waiting update
+
+        Returns:
+            tuple[list[tuple], list, list[tuple], int]: Latest flow table and alert summary, each None if it has not
+                changed, (flow, attack probability) alerts in arrival order, and the number of alerts queued including
+                merged and dropped ones
+        """
+        with self._lock:
+            flows, alert_groups, alerts, alert_count = self._flows, self._alert_groups, list(self._alerts.values()), self._alert_count
+            self._flows = None
+            self._alert_groups = None
+            self._alerts = OrderedDict()
+            self._alert_count = 0
+        return flows, alert_groups, alerts, alert_count
@@ -1,21 +1,42 @@
+import socket
+from collections import OrderedDict
 from scapy.all import IP, TCP, UDP
-from time import time_ns
+from time import time_ns, perf_counter_ns
 from src.data_models.flow import Flow
+from src.data_models.flow_packets import FlowPackets
 from src.data_models.flow_packet import FlowPacket, Direction
+from src.packet_parser import parse_frame
+
+FLOW_IDLE_TIMEOUT = 60_000_000 # Microseconds without packets before a flow expires
+FLOW_ACTIVE_TIMEOUT = 120_000_000 # Maximum flow duration in microseconds, matching the CICFlowMeter flow timeout
+MAX_FLOWS = 100_000 # Maximum number of flows tracked before the least recently active flow is evicted
+SCORE_PACKET_TRIGGER = 20 # Unscored packets after which a flow is due for scoring without waiting for the latency budget
+TERMINATING_FLAGS = {"FIN", "RST"}
 
 class FlowManager:
     """The FlowManager class is responsible for receiving packet-level data and sorting them into flows
     """
-    def __init__(self, ipv4_address: str, flow_mutex):
-        self._flows = {}
+    def __init__(self, ipv4_address: str, flow_mutex, idle_timeout: int=FLOW_IDLE_TIMEOUT, active_timeout: int=FLOW_ACTIVE_TIMEOUT, max_flows: int=MAX_FLOWS, score_packet_trigger: int=SCORE_PACKET_TRIGGER):
+        self._flows = OrderedDict() # Ordered from least to most recently active
+        self._expired_flows = []
+        self._unscored_flows = OrderedDict() # Flows with unscored packets, keyed by id and ordered by their first unscored packet
+        self._triggered_flows = [] # Flows that reached score_packet_trigger unscored packets
+        self._score_packet_trigger = score_packet_trigger
         self._ipv4_address = ipv4_address
+        self._packed_ipv4_address = socket.inet_aton(ipv4_address)
         self._flow_mutex = flow_mutex
+        self._idle_timeout = idle_timeout
+        self._active_timeout = active_timeout
+        self._max_flows = max_flows
+        self._capture_blocked_time = {"total": 0, "max": 0, "packets": 0}
+        self._flow_count = 0
 
-    def _process_packet(self, packet) -> FlowPacket:
+    def _process_packet(self, packet, arrival_time: int) -> FlowPacket:
         """Convert raw packet to instance of flow packet data class
 
         Args:
             packet (_type_): Raw packet from scapy
+            arrival_time (int): Packet arrival time in microseconds
 
         Returns: FlowPacket
         """
@@ -31,8 +52,14 @@ class FlowManager:
             else:
                 direction = Direction.BACKWARD
             
-            if protocol == "TCP" and "P" in packet[TCP].flags:
-                flags.add("PSH")
+            if protocol == "TCP":
+                tcp_flags = packet[TCP].flags
+                if "P" in tcp_flags:
+                    flags.add("PSH")
+                if "F" in tcp_flags:
+                    flags.add("FIN")
+                if "R" in tcp_flags:
+                    flags.add("RST")
             
             return FlowPacket(
                 protocol,
@@ -41,7 +68,7 @@ class FlowManager:
                 destination_ip,
                 source_port,
                 destination_port,
-                time_ns() // 1_000,
+                arrival_time,
                 len(packet),
                 self._get_segment_size(packet),
                 flags
@@ -83,28 +110,117 @@ class FlowManager:
         else:
             return (flow_packet.protocol, flow_packet.destination_ip, flow_packet.source_ip, flow_packet.destination_port, flow_packet.source_port)
 
-    def packet_callback(self, packet):
-        """Callback function to process each packet."""
+    def _expire_flow(self, key: tuple):
+        """Remove a flow from the flow table and queue it for a final scan
+
+        Args:
+            key (tuple): Flow key
+        """
+        self._expired_flows.append(self._flows.pop(key))
+
+    def _pop_unscored_flow(self, flow: Flow) -> Flow:
+        """Remove a flow from the unscored flows, marking its packets as scored
+
+        Args:
+            flow (Flow): Flow with unscored packets
+
+        Returns:
+            Flow: The same flow
+        """
+        del self._unscored_flows[id(flow)]
+        flow.unscored_packets = 0
+        return flow
+
+    def _acquire_flow_mutex(self):
+        """Acquire the flow mutex, recording how long the capture path was blocked if it was contended"""
+        if self._flow_mutex.acquire(blocking=False):
+            return
+
+        blocked_at = perf_counter_ns()
+        self._flow_mutex.acquire()
+        blocked_time = (perf_counter_ns() - blocked_at) // 1_000
+        self._capture_blocked_time["total"] += blocked_time
+        self._capture_blocked_time["max"] = max(self._capture_blocked_time["max"], blocked_time)
+        self._capture_blocked_time["packets"] += 1
+
+    def packet_callback(self, packet, arrival_time: int=None):
+        """Callback function to process each packet.
+
+        Args:
+            packet (_type_): Raw packet from scapy
+            arrival_time (int, optional): Capture timestamp in microseconds. Defaults to the current time.
+        """
         if TCP not in packet and UDP not in packet:
             return
         
-        flow_packet = self._process_packet(packet)
+        if arrival_time is None:
+            arrival_time = time_ns() // 1_000
+        flow_packet = self._process_packet(packet, arrival_time)
+        if flow_packet:
+            self.add_flow_packet(flow_packet)
+
+    def raw_packet_callback(self, frame, arrival_time: int=None):
+        """Callback function to process each raw Ethernet frame, decoding only the header fields needed for flows
+
+        Args:
+            frame (bytes | memoryview): Raw Ethernet frame
+            arrival_time (int, optional): Capture timestamp in microseconds. Defaults to the current time.
+        """
+        if arrival_time is None:
+            arrival_time = time_ns() // 1_000
+        flow_packet = parse_frame(frame, self._packed_ipv4_address, arrival_time)
         if flow_packet:
-            key = self._get_flow_key(flow_packet)
-            with self._flow_mutex:
-                if key not in self._flows:
-                    self._flows[key] = Flow(
-                        [],
-                        key[1],
-                        key[2],
-                        key[3],
-                        key[4],
-                        flow_packet.arrival_time,
-                        flow_packet.arrival_time
-                    )
-                
-                self._flows[key].packets.append(flow_packet)
-                self._flows[key].last_packet_timestamp = flow_packet.arrival_time
+            self.add_flow_packet(flow_packet)
+
+    def add_flow_packet(self, flow_packet: FlowPacket):
+        """Add a packet to its flow, starting a new flow if needed
+
+        Args:
+            flow_packet (FlowPacket): Flow packet
+        """
+        key = self._get_flow_key(flow_packet)
+        self._acquire_flow_mutex()
+        try:
+            flow = self._flows.get(key)
+            if flow is not None and flow_packet.arrival_time - flow.first_packet_timestamp > self._active_timeout:
+                # Flow has been active for too long, so the packet starts a new flow
+                self._expire_flow(key)
+                flow = None
+
+            if flow is None:
+                if len(self._flows) >= self._max_flows:
+                    self._expire_flow(next(iter(self._flows))) # Evict the least recently active flow
+
+                flow = Flow(
+                    FlowPackets(*key),
+                    key[1],
+                    key[2],
+                    key[3],
+                    key[4],
+                    flow_packet.arrival_time,
+                    flow_packet.arrival_time
+                )
+                self._flows[key] = flow
+                self._flow_count += 1
+            else:
+                self._flows.move_to_end(key)
+            
+            flow.packets.append(flow_packet)
+            flow.statistics.update(flow_packet)
+            flow.last_packet_timestamp = flow_packet.arrival_time
+            flow.version += 1
+
+            if flow.unscored_packets == 0:
+                flow.unscored_since = flow_packet.arrival_time
+                self._unscored_flows[id(flow)] = flow
+            flow.unscored_packets += 1
+            if flow.unscored_packets == self._score_packet_trigger:
+                self._triggered_flows.append(flow)
+
+            if flow_packet.flags & TERMINATING_FLAGS:
+                self._expire_flow(key)
+        finally:
+            self._flow_mutex.release()
 
     def get_flows(self) -> tuple[Flow]:
         """Get all current flows
@@ -112,4 +228,87 @@ class FlowManager:
         Returns:
             tuple[Flow]: Collection of Flow objects
         """
-        return self._flows.values()
\ No newline at end of file
+        return self._flows.values()
+
+    def get_flow_count(self) -> int:
+        """Get the number of flows started since the flow manager was created
+
+        Returns:
+            int: Number of flows
+        """
+        return self._flow_count
+
+    def get_capture_blocked_time(self) -> dict:
+        """Get how long packet capture has waited on the flow mutex
+
+        Returns:
+            dict: Total and maximum blocked time in microseconds, and the number of packets that were blocked
+        """
+        return dict(self._capture_blocked_time)
+
+    def pop_expired_flows(self, current_time: int=None) -> list[Flow]:
+        """Expire idle flows and remove every expired flow from the flow manager. Must be called with the flow
+        mutex held.
+
+        Args:
+            current_time (int, optional): Current time in microseconds. Defaults to the wall clock.
+
+        Returns:
+            list[Flow]: Flows that ended by timeout, TCP FIN/RST or eviction since the last call
+        """
+        if current_time is None:
+            current_time = time_ns() // 1_000
+
+        while self._flows:
+            key, flow = next(iter(self._flows.items()))
+            if current_time - flow.last_packet_timestamp <= self._idle_timeout:
+                break
+            self._expire_flow(key)
+
+        expired_flows = self._expired_flows
+        self._expired_flows = []
+        return expired_flows
+
+    def pop_unscored_flows(self, current_time: int=None, latency_budget: int=0, limit: int=None) -> list[Flow]:
+        """Remove the flows that are due for scoring: flows whose oldest unscored packet arrived at least
+        latency_budget ago, oldest first, then flows with at least score_packet_trigger unscored packets. Must be
+        called with the flow mutex held.
+
+        Args:
+            current_time (int, optional): Current time in microseconds. Defaults to the wall clock.
+            latency_budget (int, optional): Maximum time in microseconds a packet waits to be scored. Defaults to 0.
+            limit (int, optional): Maximum number of flows returned, the rest stay due. Defaults to no limit.
+
+        Returns:
+            list[Flow]: Flows due for scoring, which may include flows that have since expired
+        """
+        if current_time is None:
+            current_time = time_ns() // 1_000
+        if limit is None:
+            limit = len(self._unscored_flows)
+
+        due_flows = []
+        deadline = current_time - latency_budget
+        while self._unscored_flows and len(due_flows) < limit:
+            flow = next(iter(self._unscored_flows.values()))
+            if flow.unscored_since > deadline:
+                break
+            due_flows.append(self._pop_unscored_flow(flow))
+
+        triggered_flows = self._triggered_flows
+        self._triggered_flows = []
+        for index, flow in enumerate(triggered_flows):
+            if len(due_flows) >= limit:
+                self._triggered_flows = triggered_flows[index:]
+                break
+            if flow.unscored_packets >= self._score_packet_trigger: # Otherwise already scored by its deadline
+                due_flows.append(self._pop_unscored_flow(flow))
+
+        return due_flows
+
+    def clear_unscored_flows(self):
+        """Mark the packets of every flow as scored. Must be called with the flow mutex held."""
+        for flow in self._unscored_flows.values():
+            flow.unscored_packets = 0
+        self._unscored_flows.clear()
+        self._triggered_flows = []
@@ -0,0 +1,50 @@
+SORT_KEYS = {
+    "First Packet Timestamp": (lambda row: row[0].first_packet_timestamp, False),
+    "Last Packet Timestamp": (lambda row: row[0].last_packet_timestamp, False),
+    "Attack Probability": (lambda row: row[1], True) # Highest probability first
+}
+
+class FlowTableModel:
+    """Backing model for the flow table, holding every flow so the view only renders the rows currently visible"""
+    def __init__(self, sort_by: str="First Packet Timestamp"):
+        self._rows = []
+        self._sort_by = sort_by
+        self._sorted = True
+
+    def set_flows(self, flows: list[tuple]):
+        """Replace the rows of the table
+
+        Args:
+            flows (list[tuple]): (flow, attack probability) pairs
+        """
+        self._rows = list(flows)
+        self._sorted = False
+
+    def set_sort(self, sort_by: str):
+        """Change the sort order, one of SORT_KEYS
+
+        Args:
+            sort_by (str): Sort option
+        """
+        if sort_by != self._sort_by:
+            self._sort_by = sort_by
+            self._sorted = False
+
+    def rows(self, start: int, count: int) -> list[tuple]:
+        """Get a window of rows in sort order, sorting only if the rows or sort order changed
+
+        Args:
+            start (int): Index of the first row
+            count (int): Maximum number of rows
+
+        Returns:
+            list[tuple]: (flow, attack probability) pairs
+        """
+        if not self._sorted:
+            key, reverse = SORT_KEYS[self._sort_by]
+            self._rows.sort(key=key, reverse=reverse)
+            self._sorted = True
+        return self._rows[start:start + count]
+
+    def __len__(self):
+        return len(self._rows)
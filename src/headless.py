@@ -0,0 +1,28 @@
+from datetime import datetime
+from src.data_models.flow import Flow
+from src.settings import DEFAULT_SETTINGS
+
+class HeadlessDisplay:
+    """Settings provider and alert sink with the same interface as DisplayGUI, for running without a GUI"""
+    def __init__(self, settings: dict=None, print_alerts: bool=False):
+        self._settings = dict(settings or DEFAULT_SETTINGS)
+        self._print_alerts = print_alerts
+        self.alerts = 0
+        self.alert_groups = []
+
+    def alert_generated(self, flow: Flow, attack_probability: float):
+        self.alerts += 1
+        if self._print_alerts:
+            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} DoS attack detected, attack probability {attack_probability}: {flow.source_ip}:{flow.source_port} -> {flow.destination_ip}:{flow.destination_port}", flush=True)
+
+    def update_flows(self, flows: list[tuple] = None):
+        pass
+
+    def update_alert_groups(self, alert_groups: list):
+        self.alert_groups = alert_groups
+
+    def handle_update_settings(self, settings: dict):
+        self._settings = settings
+
+    def get_settings(self) -> dict:
+        return self._settings
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import pandas as pd
+
+from threading import Event, Lock, Thread
+from time import perf_counter_ns, time_ns
+from src.compiled_forest import load_model
+from src.data_models.model_reload import ModelReload
+from src.signal_manager import SignalManager, FEATURES
+
+MODEL_POLL_INTERVAL = 5 # Seconds between checks of the model path for a new model
+
+def validate_model(model):
+    """Check that a model can score the live feature vectors
+
+    Args:
+        model (_type_): Loaded model
+
+    Raises:
+        ValueError: The model does not take FEATURES or does not return two class probabilities
+    """
+    if not hasattr(model, "predict_proba"):
+        raise ValueError("Model has no predict_proba")
+    feature_names = getattr(model, "feature_names_in_", None)
+    if feature_names is not None and list(feature_names) != FEATURES:
+        raise ValueError(f"Model was trained on features {list(feature_names)}, expected {FEATURES}")
+    if getattr(model, "n_features_in_", len(FEATURES)) != len(FEATURES):
+        raise ValueError(f"Model takes {model.n_features_in_} features, expected {len(FEATURES)}")
+
+    probabilities = np.asarray(model.predict_proba(pd.DataFrame(np.zeros((1, len(FEATURES))), columns=FEATURES)))
+    if probabilities.shape != (1, 2) or not np.all((probabilities >= 0) & (probabilities <= 1)):
+        raise ValueError(f"Model returned probabilities of shape {probabilities.shape}, expected (1, 2)")
+
+class ModelRegistry:
+    """Loads new models in the background and swaps them into the signal manager, so capture and flow state
+    continue across model changes. A reload is requested with request_reload(), or by replacing the model file
+    or compiled forest directory when watching. A model that fails to load or validate is rejected and the
+    current model keeps scoring.
+    """
+    def __init__(self, signal_manager: SignalManager, model_path: str, watch: bool=False, poll_interval: float=MODEL_POLL_INTERVAL, load_source_model: bool=False):
+        self._signal_manager = signal_manager
+        self._model_path = model_path
+        self._load_source_model = load_source_model
+        self._poll_interval = poll_interval
+        self._reload_lock = Lock() # One reload at a time
+        self._reloads = []
+        self._stop = Event()
+
+        self._watch_thread = None
+        self._watched_signature = self._signature() # Taken before the thread starts, so an early change is not missed
+        if watch:
+            self._watch_thread = Thread(target=self._watch, daemon=True)
+            self._watch_thread.start()
+
+    def _signature(self) -> tuple:
+        """Get the modification time and size of the model, None if it does not exist. A compiled forest
+        directory is tracked by its metadata file, which is written last.
+        """
+        path = os.path.join(self._model_path, "metadata.json") if os.path.isdir(self._model_path) else self._model_path
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self):
+        signature = self._watched_signature
+        changed_signature = None
+        while not self._stop.wait(self._poll_interval):
+            current_signature = self._signature()
+            if current_signature == signature or current_signature is None:
+                changed_signature = None
+            elif current_signature == changed_signature:
+                # Unchanged for a whole poll interval, so the new model has finished being written
+                signature = current_signature
+                changed_signature = None
+                self.reload()
+            else:
+                changed_signature = current_signature
+
+    def reload(self, model_path: str=None) -> ModelReload:
+        """Load, validate and swap in a model, blocking until it is live or rejected
+
+        Args:
+            model_path (str, optional): Pickled model or compiled forest directory. Defaults to the registry's model path.
+
+        Returns:
+            ModelReload: Record of the reload, whose scoring gap is set after the next scoring pass
+        """
+        model_path = model_path or self._model_path
+        reload = ModelReload(model_path, time_ns() // 1_000)
+        requested_at = perf_counter_ns()
+        with self._reload_lock:
+            try:
+                model = load_model(model_path, self._load_source_model)
+                validate_model(model)
+            except Exception as e:
+                reload.error = str(e)
+                print(f"Error: {reload}")
+            else:
+                reload.load_time = (perf_counter_ns() - requested_at) // 1_000
+                self._signal_manager.set_model(model, reload)
+                reload.swap_latency = (perf_counter_ns() - requested_at) // 1_000
+                print(reload)
+            self._reloads.append(reload)
+        return reload
+
+    def request_reload(self, model_path: str=None) -> Thread:
+        """Reload the model in a background thread, so it can be requested from a signal handler or the GUI
+
+        Args:
+            model_path (str, optional): Pickled model or compiled forest directory. Defaults to the registry's model path.
+
+        Returns:
+            Thread: Thread running the reload
+        """
+        thread = Thread(target=self.reload, args=(model_path,), daemon=True)
+        thread.start()
+        return thread
+
+    def get_reloads(self) -> list[ModelReload]:
+        """Get every reload so far, oldest first
+
+        Returns:
+            list[ModelReload]: Reload records
+        """
+        with self._reload_lock:
+            return list(self._reloads)
+
+    def close(self):
+        """Stop watching the model path"""
+        self._stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
@@ -5,3 +5,14 @@ RANDOM_STATE = 42
 IMPORTANCE_THRESHOLD = 0.01
 CORRELATION_THRESHOLD = 0.95
 " " 
+
+# Training sweep (python main.py --sweep) and distillation (python main.py --distill)
+SWEEP_N_ESTIMATORS = [25, 50, 100]
+SWEEP_MAX_DEPTH = [12, 20, None]
+SWEEP_MIN_SAMPLES_LEAF = [1, 5, 20]
+DISTILL_N_ESTIMATORS = 25
+DISTILL_MAX_DEPTH = 12
+DISTILL_MIN_SAMPLES_LEAF = 5
+DISTILL_AUGMENT_FACTOR = 1 # Synthetic rows labelled by the teacher per training row
+DISTILL_SWAP_PROBABILITY = 0.5 # Chance that each feature of a synthetic row is taken from a second training row
+LATENCY_ROWS = 200 # Test rows scored one at a time to measure per-row latency
@@ -3,18 +3,20 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import cross_val_score, cross_validate
 from sklearn.metrics import make_scorer, roc_auc_score, f1_score, classification_report
 from config import TRAIN_FILE, TEST_FILE
+from dataset_io import read_dataset
 
 # Load the dataset
-train_data = pd.read_csv(TRAIN_FILE)
+train_data = read_dataset(TRAIN_FILE)
 
-# Split features and target
+# Split features, target and any sample weights written by the preprocessing
+sample_weight = train_data.pop('Sample_Weight').to_numpy() if 'Sample_Weight' in train_data.columns else None
 X_train = train_data.drop(columns=['Attack'])
 y_train = train_data['Attack']
 
 # Define the Random Forest model
 rf = RandomForestClassifier(
     n_estimators=100,
-    class_weight="balanced",
+    class_weight="balanced" if sample_weight is None else None,
     random_state=42,
     n_jobs=-1
 )
@@ -25,7 +27,8 @@ scoring = ['roc_auc', 'f1']
 # Perform 5-Fold Cross-Validation
 print("[INFO] Performing 5-Fold Cross-Validation...")
 cv_results = cross_validate(
-    rf, X_train, y_train, cv=5, scoring=scoring, return_train_score=True, n_jobs=-1
+    rf, X_train, y_train, cv=5, scoring=scoring, return_train_score=True, n_jobs=-1,
+    params=None if sample_weight is None else {'sample_weight': sample_weight}
 )
 
 # Output Cross-Validation Results
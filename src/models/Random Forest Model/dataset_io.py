@@ -0,0 +1,45 @@
+# dataset_io.py
+import json
+import os
+import sys
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))  # Root of the IDS package (src)
+PREPROCESSING_DIR = os.path.join(REPO_DIR, 'src', 'Data Preprocessing Code')
+
+def add_import_path(directory):
+    """
+    Makes the modules in another directory of the repository importable, after the modules of this directory.
+    """
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+# Rows are deduplicated with the same hashes as in preprocessing
+add_import_path(PREPROCESSING_DIR)
+from utils import hash_rows, duplicated_rows
+
+def read_dataset(csv_path):
+    """
+    Reads a preprocessed dataset, preferring the Parquet copy that the preprocessing pipeline writes next to
+    each CSV file. Parquet is read with memory mapping and column types intact, instead of re-parsing the CSV.
+    The Parquet copy is only used while its `.key.json` sidecar matches the CSV, or when there is no CSV.
+    """
+    base_path = os.path.splitext(csv_path)[0]
+    parquet_path = f"{base_path}.parquet"
+    if os.path.exists(parquet_path) and (not os.path.exists(csv_path) or parquet_matches_csv(base_path, csv_path)):
+        print(f"[INFO] Reading {parquet_path}")
+        return pd.read_parquet(parquet_path, memory_map=True)
+    return pd.read_csv(csv_path)
+
+def parquet_matches_csv(base_path, csv_path):
+    """
+    Returns whether the sidecar written with the Parquet copy records the current size and modification
+    time of the CSV, i.e. both were written by the same preprocessing run and the CSV was not replaced since.
+    """
+    try:
+        with open(f"{base_path}.key.json") as key_file:
+            sidecar = json.load(key_file)
+    except (OSError, ValueError):
+        return False
+    stat = os.stat(csv_path)
+    return sidecar.get('csv_size') == stat.st_size and sidecar.get('csv_mtime_ns') == stat.st_mtime_ns
@@ -1,6 +1,6 @@
 #main
 
-import pandas as pd
+import argparse
 from config import TRAIN_FILE, TEST_FILE, IMPORTANCE_THRESHOLD, CORRELATION_THRESHOLD
 from feature_engineering import (
     analyze_feature_importance,
@@ -8,25 +8,36 @@ from feature_engineering import (
     remove_highly_correlated_features,
     align_features,
 )
-from model_training_rf import train_and_evaluate_rf, plot_roc_curve_rf
+from dataset_io import read_dataset, hash_rows, duplicated_rows
+from model_training_rf import train_and_evaluate_rf, plot_roc_curve_rf, sweep_rf, distill_rf
 
 # Define file paths for saving the preprocessed datasets
 PROCESSED_TRAIN_FILE = "output/processed_train_data.csv"
 PROCESSED_TEST_FILE = "output/processed_test_data.csv"
 
-def log_duplicates(data, dataset_name, step_name):
+def log_duplicates(X, y, dataset_name, step_name):
     """
-    Logs the number of duplicate rows in the dataset at a specific step.
+    Logs the number of duplicate rows (features and label) in the dataset at a specific step,
+    and how many of them are attacks.
     """
-    duplicate_count = data.duplicated().sum()
-    print(f"[INFO] {dataset_name} dataset after {step_name}: {duplicate_count} duplicate rows found out of {len(data)} total rows.")
+    duplicates = duplicated_rows(hash_rows(X, y))
+    duplicate_count = duplicates.sum()
+    print(f"[INFO] {dataset_name} dataset after {step_name}: {duplicate_count} duplicate rows found out of {len(X)} total rows "
+          f"({y[duplicates].sum()} attacks).")
     return duplicate_count
 
 def main():
+    parser = argparse.ArgumentParser(description="Feature engineering and Random Forest model training")
+    parser.add_argument("--sweep", action="store_true", help="Also train and compare forests over the sweep grid in config.py")
+    parser.add_argument("--distill", action="store_true", help="Also distil the trained forest into a compact one")
+    args = parser.parse_args()
+
     print("[INFO] Loading training and testing datasets...")
-    train_data = pd.read_csv(TRAIN_FILE)
-    test_data = pd.read_csv(TEST_FILE)
+    train_data = read_dataset(TRAIN_FILE)
+    test_data = read_dataset(TEST_FILE)
 
+    # Written by the preprocessing with BALANCE_STRATEGY = 'sample_weight' in place of synthetic rows
+    sample_weight = train_data.pop('Sample_Weight').to_numpy() if 'Sample_Weight' in train_data.columns else None
     X_train = train_data.drop(columns=['Attack'])
     y_train = train_data['Attack']
     X_test = test_data.drop(columns=['Attack'])
@@ -36,8 +47,8 @@ def main():
     print(f"[DEBUG] Initial testing dataset: {X_test.shape[1]} features")
 
     # Log initial duplicates
-    log_duplicates(pd.concat([X_train, y_train], axis=1), "Training", "initial load")
-    log_duplicates(pd.concat([X_test, y_test], axis=1), "Testing", "initial load")
+    log_duplicates(X_train, y_train, "Training", "initial load")
+    log_duplicates(X_test, y_test, "Testing", "initial load")
 
     # Analyze feature importance
     feature_importances = analyze_feature_importance(X_train, y_train)
@@ -47,16 +58,16 @@ def main():
     X_test = remove_low_importance_features(X_test, IMPORTANCE_THRESHOLD, feature_importances)
 
     # Log duplicates after low-importance feature removal
-    log_duplicates(pd.concat([X_train, y_train], axis=1), "Training", "low-importance feature removal")
-    log_duplicates(pd.concat([X_test, y_test], axis=1), "Testing", "low-importance feature removal")
+    log_duplicates(X_train, y_train, "Training", "low-importance feature removal")
+    log_duplicates(X_test, y_test, "Testing", "low-importance feature removal")
 
     # Remove highly correlated features
     X_train = remove_highly_correlated_features(X_train, CORRELATION_THRESHOLD)
     X_test = remove_highly_correlated_features(X_test, CORRELATION_THRESHOLD)
 
     # Log duplicates after correlation-based feature removal
-    log_duplicates(pd.concat([X_train, y_train], axis=1), "Training", "correlation-based feature removal")
-    log_duplicates(pd.concat([X_test, y_test], axis=1), "Testing", "correlation-based feature removal")
+    log_duplicates(X_train, y_train, "Training", "correlation-based feature removal")
+    log_duplicates(X_test, y_test, "Testing", "correlation-based feature removal")
 
     print(f"[DEBUG] Final training dataset: {X_train.shape[1]} features")
     print(f"[DEBUG] Final testing dataset: {X_test.shape[1]} features")
@@ -65,23 +76,33 @@ def main():
     X_train, X_test = align_features(X_train, X_test)
 
     # Final duplicate check and removal before model training
-    train_data_final = pd.concat([X_train, y_train], axis=1).drop_duplicates()
-    test_data_final = pd.concat([X_test, y_test], axis=1).drop_duplicates()
+    train_duplicates = duplicated_rows(hash_rows(X_train, y_train))
+    test_duplicates = duplicated_rows(hash_rows(X_test, y_test))
+    train_data_final = X_train[~train_duplicates].assign(Attack=y_train[~train_duplicates])
+    test_data_final = X_test[~test_duplicates].assign(Attack=y_test[~test_duplicates])
     print(f"[INFO] Final training dataset after duplicate removal: {len(train_data_final)} rows.")
     print(f"[INFO] Final testing dataset after duplicate removal: {len(test_data_final)} rows.")
 
     # **Save the processed datasets to CSV**
     train_data_final.to_csv(PROCESSED_TRAIN_FILE, index=False)
     test_data_final.to_csv(PROCESSED_TEST_FILE, index=False)
+    train_data_final.to_parquet(PROCESSED_TRAIN_FILE.replace('.csv', '.parquet'), index=False)
+    test_data_final.to_parquet(PROCESSED_TEST_FILE.replace('.csv', '.parquet'), index=False)
     print(f"[INFO] Processed training data saved to {PROCESSED_TRAIN_FILE}")
     print(f"[INFO] Processed testing data saved to {PROCESSED_TEST_FILE}")
 
     # Train and evaluate the Random Forest model
-    model, y_proba = train_and_evaluate_rf(X_train, y_train, X_test, y_test)
+    model, y_proba = train_and_evaluate_rf(X_train, y_train, X_test, y_test, sample_weight)
 
     # Plot ROC curve
     plot_roc_curve_rf(y_test, y_proba)
 
+    # Compare smaller forests by accuracy, size, load time and per-row latency
+    if args.sweep:
+        sweep_rf(X_train, y_train, X_test, y_test)
+    if args.distill:
+        distill_rf(model, X_train, y_train, X_test, y_test)
+
     print("[INFO] Feature engineering and Random Forest model training completed.")
 
 if __name__ == "__main__":
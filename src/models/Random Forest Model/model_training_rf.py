@@ -1,20 +1,38 @@
 #model_training_rf.py
 import os
+import itertools
+import tempfile
+import time
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve, f1_score
 import joblib
+from config import (
+    RANDOM_STATE,
+    SWEEP_N_ESTIMATORS,
+    SWEEP_MAX_DEPTH,
+    SWEEP_MIN_SAMPLES_LEAF,
+    DISTILL_N_ESTIMATORS,
+    DISTILL_MAX_DEPTH,
+    DISTILL_MIN_SAMPLES_LEAF,
+    DISTILL_AUGMENT_FACTOR,
+    DISTILL_SWAP_PROBABILITY,
+    LATENCY_ROWS,
+)
+from dataset_io import REPO_DIR, add_import_path
 
-def train_and_evaluate_rf(X_train, y_train, X_test, y_test):
-    # Train the Random Forest model
+def train_and_evaluate_rf(X_train, y_train, X_test, y_test, sample_weight=None):
+    # Train the Random Forest model. Rows weighted by the preprocessing are not reweighted by class
     print("[INFO] Training Random Forest model...")
     model = RandomForestClassifier(
         n_estimators=100,
-        class_weight="balanced",
+        class_weight="balanced" if sample_weight is None else None,
         random_state=42,
         n_jobs=-1
     )
-    model.fit(X_train, y_train)
+    model.fit(X_train, y_train, sample_weight=sample_weight)
 
     # Predictions
     y_pred = model.predict(X_test)
@@ -51,3 +69,143 @@ def plot_roc_curve_rf(y_test, y_proba):
     plt.savefig(plot_path)
     plt.close()
     print(f"[INFO] ROC Curve saved at {plot_path}")
+
+def measure_model_cost(model_path, X_test):
+    """
+    Measures the runtime cost of a saved model in the runtime the live IDS uses, the compiled forest: pickle size,
+    load time of the pickle and of the memory-mapped compiled directory, median latency of scoring one row at a
+    time (as the IDS scores small batches) and the per-row cost of scoring the whole test set at once (which the
+    compiled forest hands to sklearn).
+    """
+    # The live IDS runtime is only needed here, so training without --sweep or --distill does not depend on it
+    add_import_path(REPO_DIR)
+    from src.compiled_forest import CompiledForest
+
+    size_mb = os.path.getsize(model_path) / 1_000_000
+
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    pickle_load_seconds = time.perf_counter() - start
+
+    compiled_model = CompiledForest(model)
+    with tempfile.TemporaryDirectory() as compiled_path:
+        compiled_model.save(compiled_path)
+        start = time.perf_counter()
+        CompiledForest.load(compiled_path)
+        load_seconds = time.perf_counter() - start
+
+    row_latencies = []
+    for index in range(min(LATENCY_ROWS, len(X_test))):
+        row = X_test.iloc[[index]]
+        start = time.perf_counter()
+        compiled_model.predict_proba(row)
+        row_latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    compiled_model.predict_proba(X_test)
+    batch_row_seconds = (time.perf_counter() - start) / len(X_test)
+
+    node_count = sum(estimator.tree_.node_count for estimator in model.estimators_)
+    return {
+        "size_mb": size_mb,
+        "nodes": node_count,
+        "pickle_load_ms": pickle_load_seconds * 1000,
+        "load_ms": load_seconds * 1000,
+        "row_latency_ms": np.median(row_latencies) * 1000,
+        "batch_row_latency_us": batch_row_seconds * 1_000_000,
+    }
+
+def evaluate_candidate(name, model, X_test, y_test, output_dir):
+    """
+    Saves a candidate model and reports its ROC-AUC and F1 next to its runtime cost.
+    """
+    model_path = os.path.join(output_dir, f"{name}.pkl")
+    joblib.dump(model, model_path)
+
+    y_proba = model.predict_proba(X_test)[:, 1]
+    result = {
+        "model": name,
+        "n_estimators": model.n_estimators,
+        "max_depth": model.max_depth,
+        "min_samples_leaf": model.min_samples_leaf,
+        "roc_auc": roc_auc_score(y_test, y_proba),
+        "f1": f1_score(y_test, model.predict(X_test)),
+    }
+    result.update(measure_model_cost(model_path, X_test))
+    print(f"[INFO] {name}: ROC-AUC {result['roc_auc']:.4f}, F1 {result['f1']:.4f}, {result['size_mb']:.1f} MB, "
+          f"load {result['load_ms']:.0f} ms, {result['row_latency_ms']:.2f} ms per row")
+    return result
+
+def sweep_rf(X_train, y_train, X_test, y_test, output_dir='output/sweep'):
+    """
+    Trains a Random Forest for every combination of SWEEP_N_ESTIMATORS, SWEEP_MAX_DEPTH and
+    SWEEP_MIN_SAMPLES_LEAF, so a model can be picked that fits the scoring latency budget.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    for n_estimators, max_depth, min_samples_leaf in itertools.product(SWEEP_N_ESTIMATORS, SWEEP_MAX_DEPTH, SWEEP_MIN_SAMPLES_LEAF):
+        name = f"rf_{n_estimators}_trees_depth_{max_depth or 'full'}_leaf_{min_samples_leaf}"
+        print(f"[INFO] Training {name}...")
+        model = RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            class_weight="balanced",
+            random_state=RANDOM_STATE,
+            n_jobs=-1
+        )
+        model.fit(X_train, y_train)
+        results.append(evaluate_candidate(name, model, X_test, y_test, output_dir))
+
+    results = pd.DataFrame(results).sort_values("row_latency_ms")
+    results_path = os.path.join(output_dir, 'rf_sweep_results.csv')
+    results.to_csv(results_path, index=False)
+    print("\nSweep Results:")
+    print(results.to_string(index=False))
+    print(f"[INFO] Sweep results saved at {results_path}")
+    return results
+
+def augment_rows(X, factor=DISTILL_AUGMENT_FACTOR, swap_probability=DISTILL_SWAP_PROBABILITY):
+    """
+    Generates factor * len(X) synthetic rows for distillation: each copies a random training row and takes
+    every feature, with probability swap_probability, from a second random row instead. The rows fall between
+    the training rows, where the teacher's predictions carry information the original labels do not.
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    rows = int(len(X) * factor)
+    values = X.to_numpy()
+    augmented = values[rng.integers(0, len(X), rows)]
+    swap = rng.random(augmented.shape) < swap_probability
+    augmented[swap] = values[rng.integers(0, len(X), rows)][swap]
+    return pd.DataFrame(augmented, columns=X.columns).astype(X.dtypes.to_dict())
+
+def distill_rf(teacher, X_train, y_train, X_test, y_test, output_dir='output/sweep'):
+    """
+    Distils a trained forest into a compact one. A fully grown teacher reproduces the labels of its own training
+    rows, so the student learns the teacher's predictions on synthetic rows from augment_rows, alongside the
+    training rows with their labels. Synthetic rows are weighted by the teacher's confidence, so rows the teacher
+    finds ambiguous do not force the shallower student trees to grow extra splits.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    print("[INFO] Distilling Random Forest model...")
+    X_augmented = augment_rows(X_train)
+    teacher_proba = teacher.predict_proba(X_augmented)[:, 1]
+    X_student = pd.concat([X_train, X_augmented], ignore_index=True)
+    y_student = np.concatenate([np.asarray(y_train), (teacher_proba >= 0.5).astype(int)])
+    sample_weight = np.concatenate([np.ones(len(X_train)), np.abs(2 * teacher_proba - 1) + 1e-3])
+    student = RandomForestClassifier(
+        n_estimators=DISTILL_N_ESTIMATORS,
+        max_depth=DISTILL_MAX_DEPTH,
+        min_samples_leaf=DISTILL_MIN_SAMPLES_LEAF,
+        random_state=RANDOM_STATE,
+        n_jobs=-1
+    )
+    student.fit(X_student, y_student, sample_weight=sample_weight)
+
+    results = pd.DataFrame([
+        evaluate_candidate("teacher", teacher, X_test, y_test, output_dir),
+        evaluate_candidate("distilled", student, X_test, y_test, output_dir),
+    ])
+    print("\nDistillation Results:")
+    print(results.to_string(index=False))
+    return student, results
@@ -0,0 +1,89 @@
+import socket
+import struct
+from src.data_models.flow_packet import FlowPacket, Direction
+
+ETHERNET_HEADER_LENGTH = 14
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = 0x8100
+IP_PROTOCOL_TCP = 6
+IP_PROTOCOL_UDP = 17
+UDP_HEADER_LENGTH = 8
+FRAME_HEADER_BYTES = 92 # Ethernet, VLAN tag, IPv4 header with options and the TCP fields parse_frame reads
+
+TCP_FIN = 0x01
+TCP_RST = 0x04
+TCP_PSH = 0x08
+
+_ETHERTYPE = struct.Struct("!H")
+_PORTS = struct.Struct("!HH")
+
+def parse_frame(frame, local_ipv4_address: bytes, arrival_time: int, frame_length: int=None) -> FlowPacket:
+    """Decode the IPv4 and TCP/UDP header fields of a raw Ethernet frame into a flow packet, without dissecting
+    the frame with scapy. Produces the same values as FlowManager._process_packet.
+
+    Args:
+        frame (bytes | memoryview): Raw Ethernet frame, or its first FRAME_HEADER_BYTES bytes when frame_length is given
+        local_ipv4_address (bytes): Packed IPv4 address of this host, used to determine packet direction
+        arrival_time (int): Packet arrival time in microseconds
+        frame_length (int, optional): Length of the whole frame. Defaults to the length of frame.
+
+    Returns:
+        FlowPacket: Flow packet, or None if the frame is not an unfragmented IPv4 TCP or UDP packet
+    """
+    header_length = len(frame)
+    if frame_length is None:
+        frame_length = header_length
+    ip_offset = ETHERNET_HEADER_LENGTH
+    if header_length < ip_offset + 20:
+        return None
+
+    ethertype = _ETHERTYPE.unpack_from(frame, 12)[0]
+    if ethertype == ETHERTYPE_VLAN:
+        ethertype = _ETHERTYPE.unpack_from(frame, 16)[0]
+        ip_offset += 4
+    if ethertype != ETHERTYPE_IPV4 or frame[ip_offset] >> 4 != 4:
+        return None
+
+    ip_header_length = (frame[ip_offset] & 0x0F) * 4
+    if frame[ip_offset + 6] & 0x1F or frame[ip_offset + 7]:
+        return None # Non-first fragments carry no transport header
+
+    ip_protocol = frame[ip_offset + 9]
+    transport_offset = ip_offset + ip_header_length
+    flags = set()
+    if ip_protocol == IP_PROTOCOL_TCP:
+        if header_length < transport_offset + 14:
+            return None
+        protocol = "TCP"
+        transport_header_length = (frame[transport_offset + 12] >> 4) * 4
+        tcp_flags = frame[transport_offset + 13]
+        if tcp_flags & TCP_PSH:
+            flags.add("PSH")
+        if tcp_flags & TCP_FIN:
+            flags.add("FIN")
+        if tcp_flags & TCP_RST:
+            flags.add("RST")
+    elif ip_protocol == IP_PROTOCOL_UDP:
+        if header_length < transport_offset + 4:
+            return None
+        protocol = "UDP"
+        transport_header_length = UDP_HEADER_LENGTH
+    else:
+        return None
+
+    source_port, destination_port = _PORTS.unpack_from(frame, transport_offset)
+    destination_address = bytes(frame[ip_offset + 16:ip_offset + 20])
+    direction = Direction.FORWARD if destination_address == local_ipv4_address else Direction.BACKWARD
+
+    return FlowPacket(
+        protocol,
+        direction,
+        socket.inet_ntoa(frame[ip_offset + 12:ip_offset + 16]),
+        socket.inet_ntoa(destination_address),
+        source_port,
+        destination_port,
+        arrival_time,
+        frame_length,
+        frame_length - ip_header_length - transport_header_length, # Matches FlowManager._get_segment_size
+        flags
+    )
@@ -0,0 +1,127 @@
+import numpy as np
+
+from dataclasses import dataclass, field
+from time import perf_counter, sleep
+from scapy.all import PcapReader, RawPcapReader
+from src.capture import capture_time
+from src.flow_manager import FlowManager
+from src.headless import HeadlessDisplay
+from src.signal_manager import SignalManager
+
+DLT_EN10MB = 1 # Ethernet link type
+
+@dataclass
+class ReplayReport:
+    """Class for representing the throughput measured during a capture replay"""
+    packets: int = 0
+    flows: int = 0
+    alerts: int = 0
+    elapsed_time: float = 0
+    scan_latencies: list[float] = field(default_factory=list)
+    scoring_delays: list[int] = field(default_factory=list)
+    capture_blocked_time: dict = field(default_factory=dict)
+
+    def __repr__(self):
+        lines = [
+            f"Packets: {self.packets} ({self.packets / self.elapsed_time:,.0f} packets/sec)",
+            f"Flows: {self.flows} ({self.flows / self.elapsed_time:,.0f} flows/sec)",
+            f"Alerts: {self.alerts}",
+            f"Elapsed time: {self.elapsed_time:.3f} s",
+            f"Scans: {len(self.scan_latencies)}"
+        ]
+        if self.scan_latencies:
+            p50, p90, p99 = np.percentile(self.scan_latencies, [50, 90, 99]) * 1_000
+            lines.append(f"Scan latency: p50 {p50:.1f} ms, p90 {p90:.1f} ms, p99 {p99:.1f} ms, max {max(self.scan_latencies) * 1_000:.1f} ms")
+        if self.scoring_delays:
+            p50, p99 = np.percentile(self.scoring_delays, [50, 99]) / 1_000
+            lines.append(f"Scoring delay (capture time): p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {max(self.scoring_delays) / 1_000:.1f} ms")
+        if self.capture_blocked_time:
+            lines.append(f"Capture blocked: {self.capture_blocked_time['total'] / 1_000:.1f} ms total, {self.capture_blocked_time['max'] / 1_000:.1f} ms max, {self.capture_blocked_time['packets']} packets")
+        return "\n".join(lines)
+
+def _read_frames(path: str):
+    """Read raw Ethernet frames and their capture timestamps in microseconds from a pcap or pcapng file"""
+    with RawPcapReader(path) as reader:
+        for frame, metadata in reader:
+            if hasattr(metadata, "tsresol"): # pcapng
+                if metadata.linktype != DLT_EN10MB:
+                    raise ValueError(f"Unsupported link type {metadata.linktype}, only Ethernet captures can be replayed with the raw backend")
+                yield frame, ((metadata.tshigh << 32) | metadata.tslow) * 1_000_000 // metadata.tsresol
+            else:
+                if reader.linktype != DLT_EN10MB:
+                    raise ValueError(f"Unsupported link type {reader.linktype}, only Ethernet captures can be replayed with the raw backend")
+                fraction = metadata.usec // 1_000 if reader.nano else metadata.usec
+                yield frame, metadata.sec * 1_000_000 + fraction
+
+def _read_packets(path: str):
+    """Read dissected packets and their capture timestamps in microseconds from a pcap or pcapng file"""
+    with PcapReader(path) as reader:
+        for packet in reader:
+            yield packet, capture_time(packet)
+
+def replay_capture(path: str, flow_manager: FlowManager, signal_manager: SignalManager, display: HeadlessDisplay, scan_interval: int, capture_backend: str="raw", speed: float=0, event_driven: bool=False) -> ReplayReport:
+    """Feed a capture file through the flow manager and signal manager, using capture timestamps as the clock
+
+    Args:
+        path (str): Path to a pcap or pcapng file
+        flow_manager (FlowManager): Flow manager receiving the packets
+        signal_manager (SignalManager): Signal manager scanning the flows
+        display (HeadlessDisplay): Display passed to the signal manager, used to count alerts
+        scan_interval (int): Capture time between scans in microseconds
+        capture_backend (str, optional): "raw" to decode headers directly or "scapy" to dissect every packet. Defaults to "raw".
+        speed (float, optional): Replay speed as a multiple of the recorded speed, or 0 for maximum speed. Defaults to 0.
+        event_driven (bool, optional): Score only flows that are due at each scan instead of every flow. Defaults to False.
+
+    Returns:
+        ReplayReport: Throughput and scan latency measured during the replay
+    """
+    if capture_backend == "raw":
+        records = _read_frames(path)
+        callback = flow_manager.raw_packet_callback
+    else:
+        records = _read_packets(path)
+        callback = flow_manager.packet_callback
+
+    report = ReplayReport()
+
+    def scan(current_time: int, final: bool=False):
+        scan_start = perf_counter()
+        if not event_driven:
+            signal_manager.scan_flows(current_time)
+        elif final:
+            signal_manager.score_due_flows(current_time, latency_budget=0, limit=None)
+        else:
+            signal_manager.score_due_flows(current_time)
+        report.scan_latencies.append(perf_counter() - scan_start)
+        if event_driven and signal_manager.get_scoring_delay():
+            report.scoring_delays.append(signal_manager.get_scoring_delay())
+
+    start = perf_counter()
+    first_arrival_time = None
+    next_scan_time = None
+    arrival_time = None
+    for record, arrival_time in records:
+        if first_arrival_time is None:
+            first_arrival_time = arrival_time
+            next_scan_time = arrival_time + scan_interval
+
+        while arrival_time >= next_scan_time:
+            scan(next_scan_time)
+            next_scan_time += scan_interval
+
+        if speed > 0:
+            delay = (arrival_time - first_arrival_time) / 1_000_000 / speed - (perf_counter() - start)
+            if delay > 0:
+                sleep(delay)
+
+        callback(record, arrival_time)
+        report.packets += 1
+
+    if arrival_time is not None:
+        scan(arrival_time, final=True) # Score the flows still active at the end of the capture
+
+    report.elapsed_time = perf_counter() - start
+    report.flows = flow_manager.get_flow_count()
+    report.alerts = display.alerts
+    report.capture_blocked_time = flow_manager.get_capture_blocked_time()
+    return report
@@ -0,0 +1,27 @@
+import json
+
+DEFAULT_SETTINGS = {"attack_probability_threshold": 0.95, "alert_log_output_path": ""}
+
+def load_settings(path: str=None) -> dict:
+    """Load settings from a JSON file, using the default for any setting the file does not set
+
+    Args:
+        path (str, optional): Path to a JSON settings file. Defaults to the default settings.
+
+    Raises:
+        ValueError: The file sets an unknown setting or a threshold outside 0 to 1
+
+    Returns:
+        dict: Settings
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    if path:
+        with open(path) as file:
+            settings.update(json.load(file))
+
+    unknown_settings = settings.keys() - DEFAULT_SETTINGS.keys()
+    if unknown_settings:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown_settings))}")
+    if not (0 <= settings["attack_probability_threshold"] <= 1):
+        raise ValueError("Threshold must be between 0 and 1.")
+    return settings
@@ -0,0 +1,237 @@
+import multiprocessing
+import socket
+
+from queue import Empty
+from threading import Lock
+from time import monotonic, time_ns
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.compiled_forest import load_model
+from src.data_models.flow import Flow
+from src.data_models.flow_packet import FlowPacket, Direction, flags_to_bitmask, bitmask_to_flags
+from src.data_models.flow_packets import FlowPackets
+from src.packet_parser import parse_frame, ETHERNET_HEADER_LENGTH, ETHERTYPE_VLAN, IP_PROTOCOL_TCP, IP_PROTOCOL_UDP, FRAME_HEADER_BYTES
+
+DISPATCH_BATCH_SIZE = 512 # Packets buffered per shard before they are sent to its worker
+DISPATCH_BATCH_INTERVAL = 0.05 # Maximum seconds a packet waits in a dispatch buffer
+SCAN_RESULT_TIMEOUT = 60 # Seconds to wait for every shard to return its scores
+
+def _pack(flow_packet: FlowPacket) -> tuple:
+    return (
+        flow_packet.protocol,
+        flow_packet.direction.value,
+        flow_packet.source_ip,
+        flow_packet.destination_ip,
+        flow_packet.source_port,
+        flow_packet.destination_port,
+        flow_packet.arrival_time,
+        flow_packet.size,
+        flow_packet.segment_size,
+        flags_to_bitmask(flow_packet.flags)
+    )
+
+def _unpack(fields: tuple) -> FlowPacket:
+    protocol, direction, source_ip, destination_ip, source_port, destination_port, arrival_time, size, segment_size, flags = fields
+    return FlowPacket(protocol, Direction(direction), source_ip, destination_ip, source_port, destination_port, arrival_time, size, segment_size, bitmask_to_flags(flags))
+
+def _frame_shard_key(frame) -> tuple:
+    """Get a key that is the same for both directions of a flow from the IPv4 protocol, addresses and ports of a
+    raw Ethernet frame, without decoding the rest of the frame
+
+    Args:
+        frame (bytes | memoryview): Raw Ethernet frame
+
+    Returns:
+        tuple: Shard key, or None if the frame is not an IPv4 TCP or UDP packet
+    """
+    if len(frame) < ETHERNET_HEADER_LENGTH + 24:
+        return None
+    ip_offset = ETHERNET_HEADER_LENGTH + 4 if frame[12] << 8 | frame[13] == ETHERTYPE_VLAN else ETHERNET_HEADER_LENGTH
+    protocol = frame[ip_offset + 9]
+    if protocol != IP_PROTOCOL_TCP and protocol != IP_PROTOCOL_UDP:
+        return None
+    transport_offset = ip_offset + (frame[ip_offset] & 0x0F) * 4
+    # XOR is symmetric, so both directions of a flow get the same key
+    addresses = int.from_bytes(frame[ip_offset + 12:ip_offset + 16]) ^ int.from_bytes(frame[ip_offset + 16:ip_offset + 20])
+    ports = int.from_bytes(frame[transport_offset:transport_offset + 2]) ^ int.from_bytes(frame[transport_offset + 2:transport_offset + 4])
+    return protocol, addresses, ports
+
+def _flow_summary(flow: Flow) -> Flow:
+    """Copy a flow without its packets or statistics, so it is cheap to send back to the dispatching process. The
+    scored versions are kept, so the alert manager can tell a rescan of an unchanged flow from a new score.
+    """
+    packets = flow.packets
+    return Flow(
+        FlowPackets(packets.protocol, packets.source_ip, packets.destination_ip, packets.source_port, packets.destination_port),
+        flow.source_ip,
+        flow.destination_ip,
+        flow.source_port,
+        flow.destination_port,
+        flow.first_packet_timestamp,
+        flow.last_packet_timestamp,
+        scored_version=flow.scored_version,
+        scored_model_version=flow.scored_model_version
+    )
+
+def _shard_worker(shard_index: int, ipv4_address: str, model_path: str, flow_manager_options: dict, packet_queue, result_queue):
+    """Own one shard of the flow table: add dispatched packets to flows and score the shard on request"""
+    model = load_model(model_path) # Compiled forest directories are memory-mapped, so shards share one copy
+    flow_mutex = Lock()
+    flow_manager = FlowManager(ipv4_address, flow_mutex, **flow_manager_options)
+    signal_manager = SignalManager(flow_manager, model, flow_mutex, 1.0, None)
+    packed_ipv4_address = socket.inet_aton(ipv4_address)
+
+    while True:
+        message, payload = packet_queue.get()
+        if message == "packets":
+            for fields in payload:
+                flow_manager.add_flow_packet(_unpack(fields))
+        elif message == "frames":
+            for header, frame_length, arrival_time in payload:
+                flow_packet = parse_frame(header, packed_ipv4_address, arrival_time, frame_length)
+                if flow_packet:
+                    flow_manager.add_flow_packet(flow_packet)
+        elif message == "scan":
+            scan_sequence, current_time = payload
+            flows, active_flow_count = signal_manager.score_flows(current_time)
+            result_queue.put((
+                scan_sequence,
+                shard_index,
+                [(_flow_summary(flow), attack_probability) for flow, attack_probability in flows],
+                active_flow_count,
+                flow_manager.get_flow_count()
+            ))
+        elif message == "stop":
+            return
+
+class ShardedFlowManager(FlowManager):
+    """FlowManager that hashes packets on their flow key to worker processes, each owning a shard of the flow
+    table with its own running statistics and model. Raw frames are sent to the workers undecoded, apart from
+    the addresses and ports they are hashed on, so the workers also do the parsing.
+    """
+    def __init__(self, ipv4_address: str, flow_mutex, model_path: str, shards: int, **flow_manager_options):
+        super().__init__(ipv4_address, flow_mutex, **flow_manager_options)
+        self._shards = shards
+        self._buffers = [[] for _ in range(shards)]
+        self._frame_buffers = [[] for _ in range(shards)]
+        self._scan_sequence = 0
+        self._last_dispatch = monotonic()
+        self._shard_flow_counts = [0] * shards
+        self._packet_queues = [multiprocessing.Queue() for _ in range(shards)]
+        self._result_queue = multiprocessing.Queue()
+        self._workers = [
+            multiprocessing.Process(
+                target=_shard_worker,
+                args=(shard_index, ipv4_address, model_path, flow_manager_options, self._packet_queues[shard_index], self._result_queue),
+                daemon=True
+            )
+            for shard_index in range(shards)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _dispatch(self, shard_index: int):
+        if self._buffers[shard_index]:
+            self._packet_queues[shard_index].put(("packets", self._buffers[shard_index]))
+            self._buffers[shard_index] = []
+        if self._frame_buffers[shard_index]:
+            self._packet_queues[shard_index].put(("frames", self._frame_buffers[shard_index]))
+            self._frame_buffers[shard_index] = []
+
+    def _buffer(self, buffers: list[list], shard_index: int, record: tuple):
+        """Add a packet record to the dispatch buffer of a shard, sending the buffers that are full or due"""
+        self._acquire_flow_mutex()
+        try:
+            buffer = buffers[shard_index]
+            buffer.append(record)
+            if len(buffer) >= DISPATCH_BATCH_SIZE:
+                self._dispatch(shard_index)
+
+            now = monotonic()
+            if now - self._last_dispatch >= DISPATCH_BATCH_INTERVAL:
+                for index in range(self._shards):
+                    self._dispatch(index)
+                self._last_dispatch = now
+        finally:
+            self._flow_mutex.release()
+
+    def add_flow_packet(self, flow_packet: FlowPacket):
+        """Buffer a packet for the worker that owns its flow
+
+        Args:
+            flow_packet (FlowPacket): Flow packet
+        """
+        self._buffer(self._buffers, hash(self._get_flow_key(flow_packet)) % self._shards, _pack(flow_packet))
+
+    def raw_packet_callback(self, frame, arrival_time: int=None):
+        """Buffer the headers of a raw Ethernet frame for the worker that owns its flow, which decodes them
+
+        Args:
+            frame (bytes | memoryview): Raw Ethernet frame
+            arrival_time (int, optional): Capture timestamp in microseconds. Defaults to the current time.
+        """
+        shard_key = _frame_shard_key(frame)
+        if shard_key is None:
+            return
+        if arrival_time is None:
+            arrival_time = time_ns() // 1_000
+        self._buffer(self._frame_buffers, hash(shard_key) % self._shards, (bytes(frame[:FRAME_HEADER_BYTES]), len(frame), arrival_time))
+
+    def score_shards(self, current_time: int=None) -> tuple[list[tuple], int]:
+        """Ask every worker to score its shard and gather the results
+
+        Args:
+            current_time (int, optional): Current time in microseconds, used to expire idle flows. Defaults to the wall clock.
+
+        Returns:
+            tuple[list[tuple], int]: (flow, attack probability) pairs with active flows first, and the number of active flows
+        """
+        with self._flow_mutex:
+            self._scan_sequence += 1
+            scan_sequence = self._scan_sequence
+            for shard_index in range(self._shards):
+                self._dispatch(shard_index)
+                self._packet_queues[shard_index].put(("scan", (scan_sequence, current_time)))
+
+        active_flows = []
+        expired_flows = []
+        pending_shards = self._shards
+        deadline = monotonic() + SCAN_RESULT_TIMEOUT
+        while pending_shards:
+            try:
+                result_sequence, shard_index, flows, active_flow_count, flow_count = self._result_queue.get(timeout=max(deadline - monotonic(), 0))
+            except Empty:
+                print(f"Error: not every shard returned its scores within {SCAN_RESULT_TIMEOUT} seconds")
+                break
+            if result_sequence != scan_sequence:
+                continue # Late result of an earlier scan that timed out
+            pending_shards -= 1
+            active_flows.extend(flows[:active_flow_count])
+            expired_flows.extend(flows[active_flow_count:])
+            self._shard_flow_counts[shard_index] = flow_count
+
+        return active_flows + expired_flows, len(active_flows)
+
+    def get_flow_count(self) -> int:
+        """Get the number of flows started across all shards, as of the last scan
+
+        Returns:
+            int: Number of flows
+        """
+        return sum(self._shard_flow_counts)
+
+    def close(self):
+        """Stop the worker processes"""
+        with self._flow_mutex:
+            for packet_queue in self._packet_queues:
+                packet_queue.put(("stop", None))
+        for worker in self._workers:
+            worker.join()
+
+class ShardedSignalManager(SignalManager):
+    """SignalManager whose scans gather scores from the workers of a ShardedFlowManager"""
+    def __init__(self, flow_manager: ShardedFlowManager, flow_mutex, attack_probability_threshold: float, display_gui):
+        super().__init__(flow_manager, None, flow_mutex, attack_probability_threshold, display_gui)
+
+    def score_flows(self, current_time: int=None) -> tuple[list[tuple], int]:
+        return self._flow_manager.score_shards(current_time)
@@ -1,14 +1,18 @@
-import csv
-
+import numpy as np
 import pandas as pd
 
-from datetime import datetime
+from threading import Lock
+from time import perf_counter_ns, time_ns
+from typing import TYPE_CHECKING
 from src.flow_manager import FlowManager
-from src.display_gui import DisplayGUI
+from src.data_models.model_reload import ModelReload
 from src.data_models.flow_packet import Direction
-from src.data_models.alert import Alert
+from src.data_models.flow_statistics import FlowStatistics
+from src.alert_manager import AlertManager
 from src.exceptions.exceptions import TooFewPacketsInFlowException
-from src.metrics import segment_size, interarrival_time, packet_length, flag_count, header_length, packet_count
+
+if TYPE_CHECKING:
+    from src.display_gui import DisplayGUI # Only imported for annotations, so the detection path does not load Tk
 
 FEATURES = [
     "Avg_Bwd_Segment_Size",
@@ -30,75 +34,266 @@ FEATURES = [
     "Fwd_IAT_Std"
 ]
 
+PREDICTION_BATCH_SIZE = 10_000 # Maximum number of flows scored per predict_proba call
+SCORE_LATENCY_BUDGET = 1_000_000 # Maximum microseconds between a packet arriving and its flow being scored
+SCORE_TICK_INTERVAL = 250_000 # Microseconds between event-driven scoring passes
+
 class SignalManager:
     """The SignalManager class is responsible for preprocessing flow data into model inputs, generating
     signals using the model and passing signals to the AlertManager
     """
-    def __init__(self, flow_manager: FlowManager, model, flow_mutex, attack_probability_threshold: float, display_gui: DisplayGUI):
+    def __init__(self, flow_manager: FlowManager, model, flow_mutex, attack_probability_threshold: float, display_gui: "DisplayGUI", alert_manager: AlertManager=None):
         self._flow_manager = flow_manager
         self._model = model
         self._flow_mutex = flow_mutex
         self._attack_probability_threshold = attack_probability_threshold
         self._display_gui = display_gui
+        self._alert_manager = alert_manager or AlertManager(display_gui)
+        self._lock_hold_time = 0
+        self._scoring_delay = 0
+
+        self._model_lock = Lock() # Guards swapping the model against a scoring pass picking it up
+        self._model_version = 0
+        self._pending_reload = None # (reload, end of the last pass before the swap) until the new model scores a pass
+        self._last_pass_finished = None
+
+    def _feature_vector(self, statistics: FlowStatistics, destination_port: int) -> list:
+        """Build the model input row for a flow, in FEATURES order
+
+        Args:
+            statistics (FlowStatistics): Statistics of the flow
+            destination_port (int): Destination port of the flow
+
+        Raises:
+            TooFewPacketsInFlowException: The flow does not have enough packets to calculate every feature
+
+        Returns:
+            list: Feature values
+        """
+        segment_size_metrics_backward = statistics.segment_size(Direction.BACKWARD)
+        packet_length_metrics = statistics.packet_length()
+        packet_length_metrics_backward = statistics.packet_length(Direction.BACKWARD)
+        packet_length_metrics_forward = statistics.packet_length(Direction.FORWARD)
+        iat_metrics = statistics.interarrival_time()
+        iat_metrics_forward = statistics.interarrival_time(Direction.FORWARD)
+        psh_flag_count = statistics.flag_count("PSH")
+        bwd_header_length = statistics.header_length(Direction.BACKWARD)
+        fwd_header_length = statistics.header_length(Direction.FORWARD)
+        act_data_pkt_fwd = statistics.packet_count(Direction.FORWARD)
+
+        return [
+            segment_size_metrics_backward["mean"],
+            packet_length_metrics["variance"],
+            packet_length_metrics_backward["sum"],
+            destination_port,
+            psh_flag_count,
+            packet_length_metrics_forward["sum"],
+            bwd_header_length,
+            packet_length_metrics_forward["max"],
+            act_data_pkt_fwd,
+            fwd_header_length,
+            iat_metrics_forward["max"],
+            packet_length_metrics_forward["mean"],
+            iat_metrics["mean"],
+            packet_length_metrics["stdev"],
+            iat_metrics["stdev"],
+            packet_length_metrics["mean"],
+            iat_metrics_forward["stdev"]
+        ]
+
+    def set_model(self, model, reload: ModelReload=None):
+        """Swap in a new model. Scoring passes already running finish with the old model, and flows scored by the
+        old model are rescored by the next scan even if they have not changed.
+
+        Args:
+            model (_type_): Model with predict_proba, validated against FEATURES
+            reload (ModelReload, optional): Reload record, whose scoring gap is set after the first pass with the new model. Defaults to None.
+        """
+        with self._model_lock:
+            self._model = model
+            self._model_version += 1
+            self._pending_reload = (reload, self._last_pass_finished) if reload is not None else None
+
+    def _finish_pass(self, model_version: int):
+        """Record the end of a scoring pass, completing the reload record once the swapped in model has scored
+
+        Args:
+            model_version (int): Version of the model used by the pass
+        """
+        finished_at = perf_counter_ns() // 1_000
+        with self._model_lock:
+            if self._pending_reload is not None and model_version == self._model_version:
+                reload, last_pass_finished = self._pending_reload
+                reload.scoring_gap = 0 if last_pass_finished is None else finished_at - last_pass_finished
+                self._pending_reload = None
+            self._last_pass_finished = finished_at
+
+    def _predict_attack_probabilities(self, input_matrix: np.ndarray, model=None) -> list[float]:
+        """Score every row of the input matrix, in chunks of at most PREDICTION_BATCH_SIZE rows
+
+        Args:
+            input_matrix (np.ndarray): Feature rows in FEATURES column order
+            model (_type_, optional): Model to score with. Defaults to the current model.
+
+        Returns:
+            list[float]: Attack probability of each row
+        """
+        if model is None:
+            model = self._model
+        attack_probabilities = []
+        for start in range(0, len(input_matrix), PREDICTION_BATCH_SIZE):
+            input_vectors = pd.DataFrame(input_matrix[start:start + PREDICTION_BATCH_SIZE], columns=FEATURES, copy=False)
+            attack_probabilities.extend(model.predict_proba(input_vectors)[:, 1].tolist())
 
-    def _predict_attack_probability(self, input_vector: pd.DataFrame) -> float:
-        return self._model.predict_proba(input_vector)[0][1]
+        return attack_probabilities
     
-    def _log_alert(self, alert: Alert, output_path: str):
-        if output_path == "":
-            return # Don't attempt to log outputs if an output path isn't set
-        
-        with open(output_path, mode="a") as file:
-            writer = csv.writer(file)
-            writer.writerow(alert.to_csv())
-
-    def scan_flows(self):
-        """Generate signals for a each network flow
+    def _generate_alerts(self, flows: list[tuple], current_time: int=None):
+        """Pass flows at or over the attack probability threshold to the alert manager
+
+        Args:
+            flows (list[tuple]): (flow, attack probability) pairs
+            current_time (int, optional): Current time in microseconds. Defaults to the wall clock.
+        """
+        threshold = self._display_gui.get_settings()["attack_probability_threshold"]
+        self._alert_manager.add_alerts([(flow, attack_probability) for flow, attack_probability in flows if attack_probability >= threshold], current_time)
+
+    def close(self):
+        """Write any buffered alerts and close the alert log"""
+        self._alert_manager.close()
+
+    def get_lock_hold_time(self) -> int:
+        """Get how long the last scan held the flow mutex
+
+        Returns:
+            int: Lock hold time in microseconds
+        """
+        return self._lock_hold_time
+
+    def _snapshot(self, flow) -> tuple:
+        """Snapshot the state needed to score a flow. Must be called with the flow mutex held.
+
+        Args:
+            flow (Flow): Flow to snapshot
+
+        Returns:
+            tuple: (flow, version, statistics), with statistics None if the flow has not changed since the current model last scored it
         """
+        if flow.version == flow.scored_version and flow.scored_model_version == self._model_version:
+            return flow, flow.version, None
+        return flow, flow.version, flow.statistics.copy()
+
+    def _score_snapshots(self, snapshots: list[tuple]) -> list[tuple]:
+        """Score flows from snapshots of their state, reusing the cached score of flows that have not changed
+        and caching the feature vector and probability of the rest on their flow
+
+        Args:
+            snapshots (list[tuple]): (flow, version, statistics) tuples from _snapshot
+
+        Returns:
+            list[tuple]: (flow, attack probability) pairs in snapshot order, with 0 for flows with too few packets
+        """
+        with self._model_lock:
+            model, model_version = self._model, self._model_version # The whole pass is scored by one model
+
+        flows = []
+        scored_indices = []
+        feature_rows = []
+        for flow, version, statistics in snapshots:
+            if statistics is None:
+                flows.append((flow, flow.attack_probability))
+                continue
+
+            flow.scored_version = version
+            flow.scored_model_version = model_version
+            try:
+                flow.feature_vector = self._feature_vector(statistics, flow.destination_port)
+            except TooFewPacketsInFlowException:
+                # Cannot continue if there are too few packets in the flow to calculate the necessary flow metrics
+                flow.feature_vector = None
+                flow.attack_probability = 0
+                flows.append((flow, 0))
+                continue
+
+            scored_indices.append(len(flows))
+            feature_rows.append(flow.feature_vector)
+            flows.append((flow, 0))
+
+        if feature_rows:
+            input_matrix = np.array(feature_rows, dtype=np.float64) # Input matrix for model, one row per flow
+            attack_probabilities = self._predict_attack_probabilities(input_matrix, model)
+            for index, attack_probability in zip(scored_indices, attack_probabilities):
+                flow = flows[index][0]
+                flow.attack_probability = attack_probability
+                flows[index] = (flow, attack_probability)
+
+        self._finish_pass(model_version)
+        return flows
+
+    def get_scoring_delay(self) -> int:
+        """Get the longest time a scored flow waited in the last event-driven scoring pass
+
+        Returns:
+            int: Time in microseconds between the first unscored packet of the flow and the pass
+        """
+        return self._scoring_delay
+
+    def score_flows(self, current_time: int=None) -> tuple[list[tuple], int]:
+        """Score every active flow and every flow that expired since the last scan
+
+        Args:
+            current_time (int, optional): Current time in microseconds, used to expire idle flows. Defaults to the wall clock.
+
+        Returns:
+            tuple[list[tuple], int]: (flow, attack probability) pairs with active flows first, and the number of active flows
+        """
+        # Hold the flow mutex only while snapshotting flow state, so packet capture continues during scoring
+        with self._flow_mutex:
+            lock_acquired_at = perf_counter_ns()
+            expired_flows = self._flow_manager.pop_expired_flows(current_time) # Scored one last time before being dropped
+            active_flows = list(self._flow_manager.get_flows())
+            snapshots = [self._snapshot(flow) for flow in active_flows + expired_flows]
+            self._flow_manager.clear_unscored_flows()
+        self._lock_hold_time = (perf_counter_ns() - lock_acquired_at) // 1_000
+
+        return self._score_snapshots(snapshots), len(active_flows)
+
+    def score_due_flows(self, current_time: int=None, latency_budget: int=SCORE_LATENCY_BUDGET, limit: int=PREDICTION_BATCH_SIZE):
+        """Score only the flows that received packets since they were last scored, once their oldest unscored
+        packet is latency_budget old or they reach the flow manager's packet trigger
+
+        Args:
+            current_time (int, optional): Current time in microseconds. Defaults to the wall clock.
+            latency_budget (int, optional): Maximum time in microseconds a packet waits to be scored. Defaults to SCORE_LATENCY_BUDGET.
+            limit (int, optional): Maximum number of flows scored in this pass, the rest are scored in the next pass. Defaults to PREDICTION_BATCH_SIZE.
+        """
+        if current_time is None:
+            current_time = time_ns() // 1_000
+
         with self._flow_mutex:
-            flows = []
-            for flow in self._flow_manager.get_flows():
-                try:
-                    segment_size_metrics_backward = segment_size(flow.packets, Direction.BACKWARD)
-                    packet_length_metrics = packet_length(flow.packets)
-                    packet_length_metrics_backward = packet_length(flow.packets, Direction.BACKWARD)
-                    packet_length_metrics_forward = packet_length(flow.packets, Direction.FORWARD)
-                    iat_metrics = interarrival_time(flow.packets)
-                    iat_metrics_forward = interarrival_time(flow.packets, Direction.FORWARD)
-                    psh_flag_count = flag_count(flow.packets, "PSH")
-                    bwd_header_length = header_length(flow.packets, Direction.BACKWARD)
-                    fwd_header_length = header_length(flow.packets, Direction.FORWARD)
-                    act_data_pkt_fwd = packet_count(flow.packets, Direction.FORWARD)
-                except TooFewPacketsInFlowException:
-                    # Cannot continue if there are too few packets in the flow to calculate the necessary flow metrics
-                    flows.append((flow, 0))
-                    continue
-                
-                input_vector = pd.DataFrame([[
-                    segment_size_metrics_backward["mean"],
-                    packet_length_metrics["variance"],
-                    packet_length_metrics_backward["sum"],
-                    flow.destination_port,
-                    psh_flag_count,
-                    packet_length_metrics_forward["sum"],
-                    bwd_header_length,
-                    packet_length_metrics_forward["max"],
-                    act_data_pkt_fwd,
-                    fwd_header_length,
-                    iat_metrics_forward["max"],
-                    packet_length_metrics_forward["mean"],
-                    iat_metrics["mean"],
-                    packet_length_metrics["stdev"],
-                    iat_metrics["stdev"],
-                    packet_length_metrics["mean"],
-                    iat_metrics_forward["stdev"]
-                ]], columns=FEATURES) # Input vector for model
-
-                attack_probability = self._predict_attack_probability(input_vector)
-                if attack_probability >= self._display_gui.get_settings()["attack_probability_threshold"]:
-                    self._display_gui.alert_generated(flow, attack_probability)
-                    self._log_alert(Alert(datetime.now(), attack_probability, flow), self._display_gui.get_settings()["alert_log_output_path"])
-
-                flows.append((flow, attack_probability))
-
-            self._display_gui.update_flows(flows)
+            lock_acquired_at = perf_counter_ns()
+            self._flow_manager.pop_expired_flows(current_time) # Expired flows stay due until their last packets are scored
+            # Flows that would exceed the latency budget before the next pass are due now
+            due_flows = self._flow_manager.pop_unscored_flows(current_time, latency_budget - SCORE_TICK_INTERVAL, limit)
+            snapshots = [self._snapshot(flow) for flow in due_flows]
+            scoring_delays = [current_time - flow.unscored_since for flow in due_flows]
+        self._lock_hold_time = (perf_counter_ns() - lock_acquired_at) // 1_000
+        self._scoring_delay = max(scoring_delays, default=0)
+
+        self._generate_alerts(self._score_snapshots(snapshots), current_time)
+
+    def refresh_display(self):
+        """Show every active flow with its most recent attack probability"""
+        with self._flow_mutex:
+            flows = [(flow, flow.attack_probability) for flow in self._flow_manager.get_flows()]
+
+        self._display_gui.update_flows(flows)
+
+    def scan_flows(self, current_time: int=None):
+        """Generate signals for a each network flow
+
+        Args:
+            current_time (int, optional): Current time in microseconds, used to expire idle flows. Defaults to the wall clock.
+        """
+        flows, active_flow_count = self.score_flows(current_time)
+        self._generate_alerts(flows, current_time)
+        self._display_gui.update_flows(flows[:active_flow_count])
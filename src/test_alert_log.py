@@ -0,0 +1,92 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from src.alert_log import AlertLogWriter
+from src.data_models.alert import Alert
+
+def alert(source_port: int) -> Alert:
+    flow = SimpleNamespace(to_csv=lambda: ["10.0.0.2", "10.0.0.1", source_port, 443, 0, 10])
+    return Alert(datetime(2024, 1, 1, 12, 0, 0), 0.9, flow)
+
+class TestAlertLogWriter(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_csv_rows_match_alert(self):
+        path = os.path.join(self.directory, "alerts.csv")
+        writer = AlertLogWriter(path)
+        for source_port in range(50000, 50003):
+            writer.write(alert(source_port))
+        writer.close()
+
+        with open(path, newline="") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual([[str(value) for value in alert(50000).to_csv()]], rows[:1])
+        self.assertEqual(3, len(rows))
+
+    def test_compressed_jsonl(self):
+        path = os.path.join(self.directory, "alerts.jsonl.gz")
+        writer = AlertLogWriter(path)
+        writer.write(alert(50000))
+        writer.close()
+
+        with gzip.open(path, mode="rt") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([{"timestamp": "2024-01-01T12:00:00", "attack_probability": 0.9, "source_ip": "10.0.0.2", "destination_ip": "10.0.0.1", "source_port": 50000, "destination_port": 443, "first_packet_timestamp": 0, "last_packet_timestamp": 10}], records)
+
+    def test_jsonl_readable_before_close(self):
+        path = os.path.join(self.directory, "alerts.jsonl")
+        writer = AlertLogWriter(path)
+        self.addCleanup(writer.close)
+        writer.write(alert(50000))
+        writer.flush()
+
+        with open(path) as file:
+            self.assertEqual([50000], [json.loads(line)["source_port"] for line in file])
+
+    def test_write_error_keeps_writer_running(self):
+        path = os.path.join(self.directory, "alerts.csv")
+        writer = AlertLogWriter(path, flush_interval=0.01)
+        self.addCleanup(writer.close)
+        writer.write(Alert(datetime(2024, 1, 1), 0.9, SimpleNamespace(to_csv=lambda: 1 / 0)))
+        deadline = time.monotonic() + 5
+        while writer._buffer and time.monotonic() < deadline: # Taken by the writer thread, whose write fails
+            time.sleep(0.01)
+        writer.write(alert(50000))
+        while not (os.path.exists(path) and os.path.getsize(path)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(writer._thread.is_alive())
+        with open(path, newline="") as file:
+            self.assertEqual(["50000"], [row[4] for row in csv.reader(file)])
+
+    def test_rotated_by_size(self):
+        path = os.path.join(self.directory, "alerts.csv")
+        writer = AlertLogWriter(path, max_bytes=1)
+        for source_port in range(50000, 50003):
+            writer.write(alert(source_port))
+            writer.flush()
+        writer.close()
+
+        self.assertEqual([f"alerts.{datetime.now().date().isoformat()}.{index}.csv" for index in range(2)] + ["alerts.csv"], sorted(os.listdir(self.directory)))
+
+    def test_oldest_alerts_dropped_when_buffer_full(self):
+        path = os.path.join(self.directory, "alerts.csv")
+        writer = AlertLogWriter(path, buffer_size=2, batch_size=10, flush_interval=60)
+        for source_port in range(50000, 50003):
+            writer.write(alert(source_port))
+        writer.close()
+
+        with open(path, newline="") as file:
+            self.assertEqual(["50001", "50002"], [row[4] for row in csv.reader(file)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from src.alert_manager import AlertManager
+from src.headless import HeadlessDisplay
+
+def flow(source_ip: str, source_port: int, destination_port: int=443, scored_version: int=1, protocol: str="TCP"):
+    return SimpleNamespace(
+        protocol=protocol, source_ip=source_ip, destination_ip="10.0.0.1", source_port=source_port, destination_port=destination_port,
+        first_packet_timestamp=0, scored_version=scored_version, scored_model_version=0, to_csv=lambda: [source_ip, source_port]
+    )
+
+class TestAlertManager(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.alert_log_path = os.path.join(directory.name, "alerts.csv")
+        self.display = HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": self.alert_log_path})
+        self.alert_manager = AlertManager(self.display, dedup_window=100, group_window=50, rate_limit=2, rate_period=10)
+        self.addCleanup(self.alert_manager.close)
+
+    def test_duplicates_suppressed_within_window(self):
+        self.assertEqual(1, self.alert_manager.add_alerts([(flow("10.0.0.2", 50000), 0.9)], current_time=0))
+        self.assertEqual(0, self.alert_manager.add_alerts([(flow("10.0.0.2", 50000, scored_version=2), 0.95)], current_time=40))
+        self.assertEqual(1, self.alert_manager.add_alerts([(flow("10.0.0.2", 50000, scored_version=3), 0.9)], current_time=100))
+        self.assertEqual(2, self.display.alerts)
+        self.alert_manager.close()
+        with open(self.alert_log_path) as file:
+            self.assertEqual(2, len(file.readlines()))
+
+        alert_groups = self.display.alert_groups # The group closed 50 after its last alert, so the third alert started a new one
+        self.assertEqual([(1, 0, 0.9), (2, 1, 0.95)], [(group.alerts, group.suppressed, group.max_attack_probability) for group in alert_groups])
+
+    def test_rate_limited_per_source_and_grouped_by_destination(self):
+        flows = [(flow("10.0.0.2", port), 0.9) for port in range(50000, 50005)] + [(flow("10.0.0.3", 50000, 80), 0.9)]
+        self.assertEqual(3, self.alert_manager.add_alerts(flows, current_time=0))
+        self.assertEqual(2, self.alert_manager.add_alerts([(flow("10.0.0.2", port, scored_version=2), 0.9) for port in range(50003, 50006)], current_time=10))
+
+        alert_groups = self.alert_manager.get_alert_groups()
+        self.assertEqual([("10.0.0.1", 443), ("10.0.0.1", 80)], [(group.destination_ip, group.destination_port) for group in alert_groups])
+        self.assertEqual((8, 4, {"10.0.0.2"}), (alert_groups[0].alerts, alert_groups[0].suppressed, alert_groups[0].source_ips))
+
+        self.alert_manager.add_alerts([(flow("10.0.0.4", 50000), 0.9)], current_time=200)
+        self.assertEqual([1, 8, 1], [group.alerts for group in self.alert_manager.get_alert_groups()]) # Earlier groups closed
+
+    def test_rescans_of_unchanged_flows_not_counted(self):
+        self.assertEqual(1, self.alert_manager.add_alerts([(flow("10.0.0.2", 50000), 0.9)], current_time=0))
+        for current_time in range(5, 30, 5): # Interval scans returning the cached score
+            self.alert_manager.add_alerts([(flow("10.0.0.2", 50000), 0.9)], current_time=current_time)
+        self.assertEqual((1, 0), (self.alert_manager.get_alert_groups()[0].alerts, self.alert_manager.get_alert_groups()[0].suppressed))
+
+        self.alert_manager.add_alerts([(flow("10.0.0.2", 50000, scored_version=2), 0.9)], current_time=30)
+        self.assertEqual((2, 1), (self.alert_manager.get_alert_groups()[0].alerts, self.alert_manager.get_alert_groups()[0].suppressed))
+
+    def test_protocol_in_flow_key(self):
+        flows = [(flow("10.0.0.2", 50000, protocol="TCP"), 0.9), (flow("10.0.0.2", 50000, protocol="UDP"), 0.9)]
+        self.assertEqual(2, self.alert_manager.add_alerts(flows, current_time=0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from src.compiled_forest import CompiledForest, SKLEARN_BATCH_SIZE, compile_model, load_model
+
+FEATURES = ["Flow Duration", "Fwd Packet Length Max", "Bwd IAT Mean", "SYN Flag Count"]
+
+class TestCompiledForest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.inputs = pd.DataFrame(rng.standard_normal((2_000, len(FEATURES))) * [1, 100, 10_000, 1], columns=FEATURES)
+        labels = (self.inputs["Flow Duration"] + rng.standard_normal(len(self.inputs)) > 0.5).astype(int)
+        self.model = RandomForestClassifier(n_estimators=20, random_state=0).fit(self.inputs, labels)
+
+    def test_identical_probabilities(self):
+        compiled_model = CompiledForest(self.model, sklearn_batch_size=None) # Score every batch with the compiled traversal
+        for rows in (1, 7, SKLEARN_BATCH_SIZE, len(self.inputs)):
+            batch = self.inputs.iloc[:rows]
+            self.assertTrue(np.array_equal(self.model.predict_proba(batch), compiled_model.predict_proba(batch)))
+            self.assertTrue(np.array_equal(self.model.predict(batch), compiled_model.predict(batch)))
+        self.assertTrue(np.array_equal(self.model.predict_proba(self.inputs.to_numpy()), compiled_model.predict_proba(self.inputs.to_numpy())))
+
+    def test_rejects_mismatched_columns(self):
+        compiled_model = CompiledForest(self.model)
+        with self.assertRaises(ValueError):
+            compiled_model.predict_proba(self.inputs[FEATURES[::-1]].iloc[:10])
+
+    def test_compile_model(self):
+        self.assertIsInstance(compile_model(self.model), CompiledForest)
+        other_model = object()
+        self.assertIs(other_model, compile_model(other_model))
+
+    def test_memory_mapped_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            CompiledForest(self.model).save(directory)
+            loaded_model = load_model(directory)
+            self.assertIsInstance(loaded_model, CompiledForest)
+            self.assertTrue(np.array_equal(self.model.predict_proba(self.inputs), loaded_model.predict_proba(self.inputs)))
+            with self.assertRaises(ValueError):
+                loaded_model.predict_proba(self.inputs[FEATURES[::-1]])
+            del loaded_model # Release the mappings before the directory is removed
+
+            with open(os.path.join(directory, "metadata.json"), "w") as metadata_file:
+                metadata_file.write('{"format": 0}')
+            with self.assertRaises(ValueError):
+                load_model(directory)
+
+    def test_loaded_forest_falls_back_to_source_model(self):
+        with tempfile.TemporaryDirectory() as directory:
+            model_path = os.path.join(directory, "model.pkl")
+            compiled_path = os.path.join(directory, "model")
+            joblib.dump(self.model, model_path)
+            CompiledForest(self.model).save(compiled_path, source_model_path=model_path)
+
+            # By default large batches stay on the shared arrays
+            loaded_model = load_model(compiled_path)
+            self.assertTrue(np.array_equal(self.model.predict_proba(self.inputs), loaded_model.predict_proba(self.inputs)))
+            self.assertIsNone(loaded_model._source_model_loader)
+            self.assertIsNone(loaded_model._model)
+
+            loaded_model = load_model(compiled_path, load_source_model=True)
+            self.assertTrue(np.array_equal(self.model.predict_proba(self.inputs), loaded_model.predict_proba(self.inputs)))
+            loaded_model._source_model_loader.join()
+            self.assertIsInstance(loaded_model._model, RandomForestClassifier) # Large batches now go to sklearn
+            self.assertTrue(np.array_equal(self.model.predict_proba(self.inputs), loaded_model.predict_proba(self.inputs)))
+
+            # A pickle replaced after compiling is not used
+            joblib.dump(RandomForestClassifier(n_estimators=2, random_state=0).fit(self.inputs, self.model.predict(self.inputs)), model_path)
+            loaded_model = load_model(compiled_path, load_source_model=True)
+            loaded_model.predict_proba(self.inputs)
+            loaded_model._source_model_loader.join()
+            self.assertIsNone(loaded_model._model)
+            del loaded_model
+
+if __name__ == "__main__":
+    unittest.main()
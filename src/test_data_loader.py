@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+# The preprocessing scripts are run from their own directory, importing their modules by name
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SRC_DIR, "Data Preprocessing Code"))
+from config import CSV_FILES, LABEL_COLUMN
+from data_loader import load_data, load_file
+
+class TestDataLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Attack labels come in contiguous blocks, so chunks of one file hold different label sets
+        for file_name, labels in zip(CSV_FILES, (["BENIGN", "DDoS"], ["PortScan", "BENIGN"])):
+            pd.DataFrame({
+                " Destination Port": range(30),
+                " Flow Duration": [1.5] * 30,
+                " Label": [labels[0]] * 10 + [labels[1]] * 20,
+            }).to_csv(os.path.join(self.directory.name, file_name), index=False)
+
+    def test_chunks_with_different_labels_stay_categorical(self):
+        data = load_file(os.path.join(self.directory.name, CSV_FILES[0]), chunksize=10)
+        self.assertIsInstance(data[LABEL_COLUMN].dtype, pd.CategoricalDtype)
+        self.assertEqual(["BENIGN"] * 10 + ["DDoS"] * 20, data[LABEL_COLUMN].tolist())
+
+    def test_files_with_different_labels_stay_categorical(self):
+        data = load_data(chunksize=10, workers=1, dataset_dir=self.directory.name)
+        self.assertIsInstance(data[LABEL_COLUMN].dtype, pd.CategoricalDtype)
+        self.assertEqual(["BENIGN", "DDoS", "PortScan"], list(data[LABEL_COLUMN].cat.categories))
+        self.assertEqual({"BENIGN": 30, "DDoS": 20, "PortScan": 10}, data[LABEL_COLUMN].value_counts().to_dict())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+# The preprocessing and model training scripts are run from their own directories, importing their modules by name
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, "Data Preprocessing Code"), os.path.join(SRC_DIR, "models", "Random Forest Model")]
+from dataset_cache import write_output
+from dataset_io import read_dataset, hash_rows
+import utils
+
+class TestDatasetIO(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.csv_path = os.path.join(self.directory.name, "train.csv")
+        self.data = pd.DataFrame({"Flow_Duration": np.arange(5, dtype=np.int32), "Attack": [0, 1, 0, 1, 0]})
+        self.read_paths = []
+        read_parquet = pd.read_parquet
+        def record_read_parquet(path, **kwargs):
+            self.read_paths.append(path)
+            return read_parquet(path, **kwargs)
+        patcher = mock.patch("dataset_io.pd.read_parquet", record_read_parquet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_parquet_written_with_csv(self):
+        write_output(self.data, self.csv_path, "split-key")
+        pd.testing.assert_frame_equal(self.data, read_dataset(self.csv_path))
+        self.assertEqual([os.path.join(self.directory.name, "train.parquet")], self.read_paths)
+
+        # A cached rerun keeps the CSV and still reads the Parquet copy
+        write_output(self.data, self.csv_path, "split-key", write_csv=False)
+        read_dataset(self.csv_path)
+        self.assertEqual(2, len(self.read_paths))
+
+    def test_replaced_csv_is_read(self):
+        write_output(self.data, self.csv_path, "split-key")
+        self.data.assign(Attack=1).to_csv(self.csv_path, index=False)
+        os.utime(self.csv_path, ns=(os.stat(self.csv_path).st_mtime_ns + 1_000_000_000,) * 2)
+
+        self.assertEqual([1] * 5, read_dataset(self.csv_path)["Attack"].tolist())
+        self.assertEqual([], self.read_paths)
+
+    def test_hashes_rows_like_preprocessing(self):
+        self.assertIs(utils.hash_rows, hash_rows)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from types import SimpleNamespace
+from src.display_queue import DisplayQueue
+
+def flow(source_port: int):
+    return SimpleNamespace(source_ip="10.0.0.2", source_port=source_port, destination_ip="10.0.0.1", destination_port=443, first_packet_timestamp=0)
+
+class TestDisplayQueue(unittest.TestCase):
+    def test_updates_merged_until_drained(self):
+        display_queue = DisplayQueue(max_pending_alerts=2)
+        display_queue.put_flows([(flow(50000), 0.1)])
+        display_queue.put_flows([(flow(50001), 0.2)])
+        display_queue.put_alert(flow(50000), 0.96)
+        display_queue.put_alert(flow(50001), 0.97)
+        display_queue.put_alert(flow(50000), 0.98)
+        display_queue.put_alert(flow(50002), 0.99)
+        display_queue.put_alert_groups(["first"])
+        display_queue.put_alert_groups(["second"])
+
+        flows, alert_groups, alerts, alert_count = display_queue.drain()
+        self.assertEqual([50001], [flow.source_port for flow, _ in flows])
+        self.assertEqual([(50000, 0.98), (50002, 0.99)], [(flow.source_port, attack_probability) for flow, attack_probability in alerts])
+        self.assertEqual(["second"], alert_groups)
+        self.assertEqual(4, alert_count)
+        self.assertEqual((None, None, [], 0), display_queue.drain())
+
+if __name__ == "__main__":
+    unittest.main()
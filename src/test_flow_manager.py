@@ -0,0 +1,95 @@
+import unittest
+from threading import Lock
+from unittest.mock import patch
+from scapy.all import Ether, IP, TCP, UDP
+from src.flow_manager import FlowManager
+
+LOCAL_IP = "10.0.0.1"
+REMOTE_IP = "10.0.0.2"
+
+def tcp_packet(source_port: int, flags: str="A", inbound: bool=True):
+    if inbound:
+        packet = Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / TCP(sport=source_port, dport=443, flags=flags) / b"payload"
+    else:
+        packet = Ether() / IP(src=LOCAL_IP, dst=REMOTE_IP) / TCP(sport=443, dport=source_port, flags=flags) / b"payload"
+    return Ether(bytes(packet)) # Dissect the built bytes so header fields are populated like a sniffed packet
+
+class TestFlowManager(unittest.TestCase):
+    def _send(self, flow_manager: FlowManager, packet, arrival_time: int):
+        with patch("src.flow_manager.time_ns", return_value=arrival_time * 1_000):
+            flow_manager.packet_callback(packet)
+
+    def test_packets_grouped_by_flow(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock())
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50000, inbound=False), 10)
+        self._send(flow_manager, Ether(bytes(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / UDP(sport=50000, dport=443))), 20)
+
+        flows = list(flow_manager.get_flows())
+        self.assertEqual(2, len(flows))
+        self.assertEqual(2, len(flows[0].packets))
+        self.assertEqual(10, flows[0].last_packet_timestamp)
+
+    def test_idle_timeout(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock(), idle_timeout=100)
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50001), 50)
+
+        self.assertEqual([], flow_manager.pop_expired_flows(current_time=100))
+        expired_flows = flow_manager.pop_expired_flows(current_time=101)
+        self.assertEqual([50000], [flow.source_port for flow in expired_flows])
+        self.assertEqual([50001], [flow.source_port for flow in flow_manager.get_flows()])
+
+    def test_active_timeout_starts_new_flow(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock(), active_timeout=100)
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50000), 90)
+        self._send(flow_manager, tcp_packet(50000), 101)
+
+        expired_flows = flow_manager.pop_expired_flows(current_time=101)
+        self.assertEqual(1, len(expired_flows))
+        self.assertEqual(2, len(expired_flows[0].packets))
+        self.assertEqual([101], [flow.first_packet_timestamp for flow in flow_manager.get_flows()])
+
+    def test_fin_and_rst_terminate_flow(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock())
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50000, "FA", inbound=False), 1)
+        self._send(flow_manager, tcp_packet(50001, "R"), 2)
+
+        self.assertEqual(0, len(flow_manager.get_flows()))
+        expired_flows = flow_manager.pop_expired_flows(current_time=2)
+        self.assertEqual([2, 1], [len(flow.packets) for flow in expired_flows])
+        self.assertEqual([], flow_manager.pop_expired_flows(current_time=2))
+
+    def test_least_recently_active_flow_evicted(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock(), max_flows=2)
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50001), 1)
+        self._send(flow_manager, tcp_packet(50000), 2)
+        self._send(flow_manager, tcp_packet(50002), 3)
+
+        self.assertEqual([50000, 50002], [flow.source_port for flow in flow_manager.get_flows()])
+        self.assertEqual([50001], [flow.source_port for flow in flow_manager.pop_expired_flows(current_time=3)])
+
+    def test_unscored_flows_due_by_latency_budget_or_packet_trigger(self):
+        flow_manager = FlowManager(LOCAL_IP, Lock(), score_packet_trigger=3)
+        self._send(flow_manager, tcp_packet(50000), 0)
+        self._send(flow_manager, tcp_packet(50001), 10)
+        for arrival_time in range(20, 23):
+            self._send(flow_manager, tcp_packet(50002), arrival_time)
+
+        self.assertEqual([50002], [flow.source_port for flow in flow_manager.pop_unscored_flows(current_time=30, latency_budget=100)])
+        self.assertEqual([50000], [flow.source_port for flow in flow_manager.pop_unscored_flows(current_time=105, latency_budget=100)])
+        self.assertEqual([], flow_manager.pop_unscored_flows(current_time=105, latency_budget=100))
+
+        self._send(flow_manager, tcp_packet(50000), 106)
+        self.assertEqual([50001], [flow.source_port for flow in flow_manager.pop_unscored_flows(current_time=300, latency_budget=100, limit=1)])
+        self.assertEqual([50000], [flow.source_port for flow in flow_manager.pop_unscored_flows(current_time=300, latency_budget=100)])
+
+        self._send(flow_manager, tcp_packet(50001), 301)
+        flow_manager.clear_unscored_flows()
+        self.assertEqual([], flow_manager.pop_unscored_flows(current_time=1_000))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from src.metrics import *
+from src.data_models.flow_packet import FlowPacket, Direction
+from src.data_models.flow_packets import FlowPackets
+
+class TestFlowPackets(unittest.TestCase):
+    def setUp(self):
+        self.packets = [
+            FlowPacket("TCP", Direction.FORWARD, "source", "dest", 55555, 443, 0, 100, 10, {"PSH"}),
+            FlowPacket("TCP", Direction.BACKWARD, "dest", "source", 443, 55555, 5, 120, 20, set()),
+            FlowPacket("TCP", Direction.FORWARD, "source", "dest", 55555, 443, 7, 90, 30, {"PSH", "FIN"}),
+        ]
+        self.flow_packets = FlowPackets("TCP", "source", "dest", 55555, 443)
+        for packet in self.packets:
+            self.flow_packets.append(packet)
+
+    def test_round_trip(self):
+        self.assertEqual(3, len(self.flow_packets))
+        self.assertEqual(self.packets, list(self.flow_packets))
+        self.assertEqual(self.packets[-1], self.flow_packets[-1])
+        self.assertEqual(self.packets[1:], self.flow_packets[1:])
+        self.assertRaises(IndexError, lambda: self.flow_packets[3])
+
+    def test_metrics(self):
+        for direction in (Direction.FORWARD, Direction.BIDIRECTIONAL):
+            self.assertEqual(packet_length(self.packets, direction), packet_length(self.flow_packets, direction))
+            self.assertEqual(header_length(self.packets, direction), header_length(self.flow_packets, direction))
+            self.assertEqual(flag_count(self.packets, "PSH", direction), flag_count(self.flow_packets, "PSH", direction))
+        self.assertEqual(interarrival_time(self.packets), interarrival_time(self.flow_packets))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+from src.metrics import *
+from src.data_models.flow_packet import FlowPacket, Direction
+from src.data_models.flow_statistics import FlowStatistics
+
+class TestFlowStatistics(unittest.TestCase):
+    def _random_packets(self, count: int, seed: int) -> list[FlowPacket]:
+        rng = random.Random(seed)
+        packets = []
+        arrival_time = 1_700_000_000_000_000
+        for _ in range(count):
+            arrival_time += rng.choice([0, 1, 7, 250, 1_000_003, rng.randrange(5_000_000)])
+            size = rng.randrange(54, 1515)
+            packets.append(FlowPacket(
+                "TCP",
+                rng.choice([Direction.FORWARD, Direction.BACKWARD]),
+                "source",
+                "dest",
+                55555,
+                443,
+                arrival_time,
+                size,
+                size - rng.choice([40, 52, 60]),
+                {"PSH"} if rng.random() < 0.3 else set()
+            ))
+        return packets
+
+    def _statistics(self, packets: list[FlowPacket]) -> FlowStatistics:
+        statistics = FlowStatistics()
+        for packet in packets:
+            statistics.update(packet)
+        return statistics
+
+    def _assert_identical(self, expected, actual):
+        self.assertEqual(expected, actual)
+        if isinstance(expected, dict):
+            for name in expected:
+                self.assertIs(type(expected[name]), type(actual[name]), name)
+
+    def _assert_matches(self, metric, running_metric, packets: list[FlowPacket], direction: Direction):
+        try:
+            expected = metric(packets, direction)
+        except TooFewPacketsInFlowException:
+            self.assertRaises(TooFewPacketsInFlowException, running_metric, direction)
+        else:
+            self._assert_identical(expected, running_metric(direction))
+
+    def test_matches_metrics(self):
+        for seed in range(20):
+            packets = self._random_packets(random.Random(seed).randrange(3, 400), seed)
+            statistics = self._statistics(packets)
+            for direction in Direction:
+                self._assert_matches(packet_length, statistics.packet_length, packets, direction)
+                self._assert_matches(interarrival_time, statistics.interarrival_time, packets, direction)
+                self._assert_matches(segment_size, statistics.segment_size, packets, direction)
+                self._assert_matches(header_length, statistics.header_length, packets, direction)
+                self.assertEqual(flag_count(packets, "PSH", direction), statistics.flag_count("PSH", direction))
+                self.assertEqual(packet_count(packets, direction), statistics.packet_count(direction))
+
+    def test_too_few_packets(self):
+        packets = self._random_packets(2, 0)
+        statistics = self._statistics(packets)
+
+        self.assertRaises(TooFewPacketsInFlowException, statistics.interarrival_time)
+        self.assertRaises(TooFewPacketsInFlowException, FlowStatistics().segment_size)
+        self.assertRaises(TooFewPacketsInFlowException, FlowStatistics().header_length)
+        self.assertEqual(0, FlowStatistics().flag_count("PSH"))
+
+if __name__ == "__main__":
+    unittest.main()
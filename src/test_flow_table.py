@@ -0,0 +1,28 @@
+import unittest
+from types import SimpleNamespace
+from src.flow_table import FlowTableModel
+
+def flow(first_packet_timestamp: int, last_packet_timestamp: int):
+    return SimpleNamespace(first_packet_timestamp=first_packet_timestamp, last_packet_timestamp=last_packet_timestamp)
+
+class TestFlowTableModel(unittest.TestCase):
+    def test_sorted_windows(self):
+        flows = [(flow(3, 4), 0.1), (flow(1, 9), 0.7), (flow(2, 5), 0.4)]
+        model = FlowTableModel()
+        model.set_flows(flows)
+
+        self.assertEqual(3, len(model))
+        self.assertEqual([1, 2], [row[0].first_packet_timestamp for row in model.rows(0, 2)])
+        self.assertEqual([3], [row[0].first_packet_timestamp for row in model.rows(2, 2)])
+
+        model.set_sort("Attack Probability")
+        self.assertEqual([0.7, 0.4, 0.1], [row[1] for row in model.rows(0, 10)])
+
+        model.set_sort("Last Packet Timestamp")
+        self.assertEqual([4, 5, 9], [row[0].last_packet_timestamp for row in model.rows(0, 10)])
+
+        model.set_flows(flows[:1])
+        self.assertEqual([], model.rows(1, 10))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+import unittest
+import joblib
+import numpy as np
+from threading import Lock
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.model_registry import ModelRegistry
+from src.headless import HeadlessDisplay
+from src.test_flow_manager import tcp_packet, LOCAL_IP
+
+class ConstantModel:
+    def __init__(self, attack_probability: float, n_features_in_: int=17):
+        self.attack_probability = attack_probability
+        self.n_features_in_ = n_features_in_
+
+    def predict_proba(self, input_vectors):
+        return np.tile([1 - self.attack_probability, self.attack_probability], (len(input_vectors), 1))
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.model_path = os.path.join(self.directory.name, "model.pkl")
+
+        flow_mutex = Lock()
+        self.flow_manager = FlowManager(LOCAL_IP, flow_mutex)
+        self.signal_manager = SignalManager(self.flow_manager, ConstantModel(0.25), flow_mutex, 0.5, HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": ""}))
+        for index in range(6):
+            self.flow_manager.packet_callback(tcp_packet(50000, "PA", inbound=index % 2 == 0), index * 1_000)
+
+    def test_reload_rescores_flows(self):
+        flows, _ = self.signal_manager.score_flows(current_time=10_000)
+        self.assertEqual([0.25], [attack_probability for _, attack_probability in flows])
+
+        joblib.dump(ConstantModel(0.75), self.model_path)
+        reload = ModelRegistry(self.signal_manager, self.model_path).reload()
+        self.assertIsNone(reload.error)
+        self.assertGreaterEqual(reload.swap_latency, reload.load_time)
+        self.assertIsNone(reload.scoring_gap)
+
+        # The flow has not changed, but its score came from the old model
+        flows, _ = self.signal_manager.score_flows(current_time=20_000)
+        self.assertEqual([0.75], [attack_probability for _, attack_probability in flows])
+        self.assertEqual(1, len(self.flow_manager.get_flows())) # Flow state survives the swap
+        self.assertGreater(reload.scoring_gap, 0)
+
+    def test_invalid_model_is_rejected(self):
+        joblib.dump(ConstantModel(0.75, n_features_in_=28), self.model_path)
+        model_registry = ModelRegistry(self.signal_manager, self.model_path)
+        reload = model_registry.reload()
+        self.assertIn("28 features", reload.error)
+        self.assertIsNone(reload.swap_latency)
+        self.assertEqual([reload], model_registry.get_reloads())
+
+        flows, _ = self.signal_manager.score_flows(current_time=10_000)
+        self.assertEqual([0.25], [attack_probability for _, attack_probability in flows]) # The old model keeps scoring
+
+        reload = model_registry.reload(os.path.join(self.directory.name, "missing.pkl"))
+        self.assertIsNotNone(reload.error)
+
+    def test_watch_reloads_changed_model(self):
+        joblib.dump(ConstantModel(0.25), self.model_path)
+        model_registry = ModelRegistry(self.signal_manager, self.model_path, watch=True, poll_interval=0.02)
+        self.addCleanup(model_registry.close)
+
+        joblib.dump(ConstantModel(0.75), self.model_path)
+        os.utime(self.model_path, ns=(time.time_ns() + 1_000_000_000,) * 2) # Changed even on a coarse clock
+        deadline = time.monotonic() + 5
+        while not model_registry.get_reloads() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(1, len(model_registry.get_reloads()))
+
+        flows, _ = self.signal_manager.score_flows(current_time=10_000)
+        self.assertEqual([0.75], [attack_probability for _, attack_probability in flows])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import socket
+import unittest
+from threading import Lock
+from scapy.all import Ether, Dot1Q, IP, TCP, UDP, ICMP
+from src.flow_manager import FlowManager
+from src.packet_parser import parse_frame, FRAME_HEADER_BYTES
+
+LOCAL_IP = "10.0.0.1"
+REMOTE_IP = "10.0.0.2"
+
+class TestPacketParser(unittest.TestCase):
+    def _assert_matches_scapy(self, packet):
+        frame = bytes(packet)
+        flow_manager = FlowManager(LOCAL_IP, Lock())
+        dissected = Ether(frame)
+        expected = flow_manager._process_packet(dissected, 42) if TCP in dissected or UDP in dissected else None
+
+        self.assertEqual(expected, parse_frame(frame, socket.inet_aton(LOCAL_IP), 42))
+        self.assertEqual(expected, parse_frame(memoryview(frame), socket.inet_aton(LOCAL_IP), 42))
+        self.assertEqual(expected, parse_frame(frame[:FRAME_HEADER_BYTES], socket.inet_aton(LOCAL_IP), 42, len(frame))) # As sent to shard workers
+
+    def test_tcp(self):
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / TCP(sport=50000, dport=443, flags="PA") / (b"x" * 100))
+        self._assert_matches_scapy(Ether() / IP(src=LOCAL_IP, dst=REMOTE_IP) / TCP(sport=443, dport=50000, flags="FA"))
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / TCP(flags="R", options=[("MSS", 1460), ("NOP", None), ("WScale", 7)]))
+
+    def test_udp(self):
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / UDP(sport=5353, dport=53) / (b"q" * 30))
+
+    def test_ip_options_and_vlan(self):
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP, options=b"\x01\x01\x01\x00") / TCP(flags="S"))
+        self._assert_matches_scapy(Ether() / Dot1Q(vlan=10) / IP(src=REMOTE_IP, dst=LOCAL_IP) / UDP(sport=1, dport=2))
+
+    def test_ignored_packets(self):
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP) / ICMP())
+        self._assert_matches_scapy(Ether() / IP(src=REMOTE_IP, dst=LOCAL_IP, frag=10) / (b"f" * 40))
+        self.assertIsNone(parse_frame(b"\x00" * 10, socket.inet_aton(LOCAL_IP), 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from threading import Lock
+from scapy.all import Ether, IP, TCP, wrpcap, wrpcapng
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.headless import HeadlessDisplay
+from src.replay import replay_capture
+
+LOCAL_IP = "10.0.0.1"
+REMOTE_IP = "10.0.0.2"
+
+class ConstantModel:
+    def __init__(self, attack_probability: float):
+        self._attack_probability = attack_probability
+
+    def predict_proba(self, input_vectors):
+        return np.tile([1 - self._attack_probability, self._attack_probability], (len(input_vectors), 1))
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.packets = []
+        for index in range(10):
+            inbound = index % 2 == 0
+            packet = Ether() / IP(src=REMOTE_IP if inbound else LOCAL_IP, dst=LOCAL_IP if inbound else REMOTE_IP) / TCP(sport=50000 if inbound else 443, dport=443 if inbound else 50000, flags="PA") / b"data"
+            packet.time = 1_700_000_000 + index * 0.25
+            self.packets.append(packet)
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _replay(self, path: str, capture_backend: str, event_driven: bool=False):
+        flow_mutex = Lock()
+        display = HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": ""})
+        flow_manager = FlowManager(LOCAL_IP, flow_mutex)
+        signal_manager = SignalManager(flow_manager, ConstantModel(0.9), flow_mutex, 0.5, display)
+        report = replay_capture(path, flow_manager, signal_manager, display, 250_000 if event_driven else 1_000_000, capture_backend, event_driven=event_driven)
+        return flow_manager, report
+
+    def test_capture_timestamps(self):
+        for writer, name in ((wrpcap, "capture.pcap"), (wrpcapng, "capture.pcapng")):
+            path = os.path.join(self.directory.name, name)
+            writer(path, self.packets)
+            for capture_backend in ("raw", "scapy"):
+                flow_manager, report = self._replay(path, capture_backend)
+                self.assertEqual(10, report.packets)
+                self.assertEqual(1, report.flows)
+                self.assertEqual(3, len(report.scan_latencies)) # Two scans at one second intervals and a final scan
+                self.assertEqual(1, report.alerts) # Scored over the threshold in the last two scans, alerted once
+
+                flow = next(iter(flow_manager.get_flows()))
+                self.assertEqual(1_700_000_000_000_000, flow.first_packet_timestamp)
+                self.assertEqual(1_700_000_002_250_000, flow.last_packet_timestamp)
+
+    def test_event_driven_scoring(self):
+        path = os.path.join(self.directory.name, "capture.pcap")
+        wrpcap(path, self.packets)
+        flow_manager, report = self._replay(path, "raw", event_driven=True)
+        self.assertEqual(1, report.alerts) # Alerts once, when the flow first crosses the threshold
+        self.assertTrue(report.scoring_delays)
+        self.assertLessEqual(max(report.scoring_delays), 1_000_000)
+        self.assertEqual(0.9, next(iter(flow_manager.get_flows())).attack_probability)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import json
+import os
+import tempfile
+import unittest
+from src.settings import DEFAULT_SETTINGS, load_settings
+
+class TestSettings(unittest.TestCase):
+    def _write(self, settings: dict) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "settings.json")
+        with open(path, mode="w") as file:
+            json.dump(settings, file)
+        return path
+
+    def test_defaults_filled_in(self):
+        self.assertEqual(DEFAULT_SETTINGS, load_settings())
+        self.assertEqual({"attack_probability_threshold": 0.8, "alert_log_output_path": ""}, load_settings(self._write({"attack_probability_threshold": 0.8})))
+
+    def test_invalid_settings_rejected(self):
+        with self.assertRaises(ValueError):
+            load_settings(self._write({"attack_probability_threshold": 1.5}))
+        with self.assertRaises(ValueError):
+            load_settings(self._write({"threshold": 0.5}))
+
+if __name__ == "__main__":
+    unittest.main()
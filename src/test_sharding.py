@@ -0,0 +1,58 @@
+import os
+import joblib
+import tempfile
+import unittest
+from threading import Lock
+from scapy.all import Ether, IP, TCP, wrpcap
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.sharding import ShardedFlowManager, ShardedSignalManager
+from src.headless import HeadlessDisplay
+from src.replay import replay_capture
+from src.test_replay import ConstantModel, LOCAL_IP, REMOTE_IP
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        packets = []
+        for index in range(80):
+            inbound = index % 2 == 0
+            remote_port = 50000 + index // 2 % 8
+            packet = Ether() / IP(src=REMOTE_IP if inbound else LOCAL_IP, dst=LOCAL_IP if inbound else REMOTE_IP) / TCP(sport=remote_port if inbound else 443, dport=443 if inbound else remote_port, flags="PA") / b"data"
+            packet.time = 1_700_000_000 + index * 0.05
+            packets.append(packet)
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.capture_path = os.path.join(self.directory.name, "capture.pcap")
+        wrpcap(self.capture_path, packets)
+        self.model_path = os.path.join(self.directory.name, "model.pkl")
+        joblib.dump(ConstantModel(0.9), self.model_path)
+
+    def test_matches_unsharded_scan(self):
+        flow_mutex = Lock()
+        display = HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": ""})
+        flow_manager = FlowManager(LOCAL_IP, flow_mutex)
+        signal_manager = SignalManager(flow_manager, ConstantModel(0.9), flow_mutex, 0.5, display)
+        expected = replay_capture(self.capture_path, flow_manager, signal_manager, display, 1_000_000)
+
+        flow_mutex = Lock()
+        display = HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": ""})
+        flow_manager = ShardedFlowManager(LOCAL_IP, flow_mutex, self.model_path, 3)
+        self.addCleanup(flow_manager.close)
+        signal_manager = ShardedSignalManager(flow_manager, flow_mutex, 0.5, display)
+        report = replay_capture(self.capture_path, flow_manager, signal_manager, display, 1_000_000)
+
+        self.assertEqual(8, expected.flows)
+        self.assertEqual(expected.flows, report.flows)
+        self.assertGreater(expected.alerts, 0)
+        self.assertEqual(expected.alerts, report.alerts)
+        self.assertEqual(len(expected.scan_latencies), len(report.scan_latencies))
+
+        flow_manager._result_queue.put((0, 0, [(None, 1.0)] * 3, 3, 3)) # Late result of an earlier scan
+        flows, active_flow_count = signal_manager.score_flows(1_700_000_004_000_000)
+        self.assertEqual(8, active_flow_count)
+        self.assertEqual(8, flow_manager.get_flow_count())
+        self.assertEqual({50000 + index for index in range(8)}, {flow.destination_port if flow.source_ip == LOCAL_IP else flow.source_port for flow, _ in flows})
+
+if __name__ == "__main__":
+    unittest.main()
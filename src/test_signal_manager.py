@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from threading import Lock
+from src.flow_manager import FlowManager
+from src.signal_manager import SignalManager
+from src.headless import HeadlessDisplay
+from src.test_flow_manager import tcp_packet, LOCAL_IP
+
+class CountingModel:
+    def __init__(self):
+        self.rows = []
+
+    def predict_proba(self, input_vectors):
+        self.rows.append(len(input_vectors))
+        return np.tile([0.25, 0.75], (len(input_vectors), 1))
+
+class TestSignalManager(unittest.TestCase):
+    def test_unchanged_flows_reuse_cached_score(self):
+        flow_mutex = Lock()
+        model = CountingModel()
+        flow_manager = FlowManager(LOCAL_IP, flow_mutex)
+        signal_manager = SignalManager(flow_manager, model, flow_mutex, 0.5, HeadlessDisplay({"attack_probability_threshold": 0.5, "alert_log_output_path": ""}))
+        for source_port in (50000, 50001):
+            for index in range(6):
+                flow_manager.packet_callback(tcp_packet(source_port, "PA", inbound=index % 2 == 0), index * 1_000)
+
+        flows, _ = signal_manager.score_flows(current_time=10_000)
+        self.assertEqual([0.75, 0.75], [attack_probability for _, attack_probability in flows])
+        self.assertEqual([2], model.rows)
+
+        flows, _ = signal_manager.score_flows(current_time=20_000)
+        self.assertEqual([0.75, 0.75], [attack_probability for _, attack_probability in flows])
+        self.assertEqual([2], model.rows) # Neither flow changed, so the model is not called
+
+        flow_manager.packet_callback(tcp_packet(50001, "PA"), 30_000)
+        signal_manager.score_flows(current_time=40_000)
+        self.assertEqual([2, 1], model.rows)
+        self.assertEqual(7, flows[1][0].scored_version)
+        self.assertEqual(17, len(flows[1][0].feature_vector))
+
+if __name__ == "__main__":
+    unittest.main()